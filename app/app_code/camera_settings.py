@@ -0,0 +1,142 @@
+import cv2
+import numpy as np
+from PyQt5.QtWidgets import QLabel, QVBoxLayout, QHBoxLayout, QWidget, QSlider, QCheckBox
+from PyQt5.QtCore import Qt
+
+
+class CameraSettings(QWidget):
+    def __init__(self, responsive=False):
+        super().__init__()
+        self.responsive = responsive  # Scale the sliders with the widget width
+        self.initUI()
+
+    def initUI(self):
+        # Main layout
+        layout = QVBoxLayout()
+
+        # Hue Slider
+        self.hue_slider = self.create_slider("Hue", 0, 179, 0)  # Hue range: 0-179
+        layout.addWidget(self.hue_slider)
+
+        # Saturation Slider
+        self.saturation_slider = self.create_slider("Saturation", 0, 255, 255)  # Saturation range: 0-255
+        layout.addWidget(self.saturation_slider)
+
+        # Brightness Slider
+        self.brightness_slider = self.create_slider("Brightness", -100, 100, 0)  # Brightness range: -100 to 100
+        layout.addWidget(self.brightness_slider)
+
+        # Contrast Slider
+        self.contrast_slider = self.create_slider("Contrast", -100, 100, 0)  # Contrast range: -100 to 100
+        layout.addWidget(self.contrast_slider)
+
+        # Invert Colors and Black & White Toggles
+        toggle_layout = QHBoxLayout()
+
+        self.invert_colors_toggle = QCheckBox("Invert Colors")
+        self.invert_colors_toggle.setStyleSheet("color: white;")
+        toggle_layout.addWidget(self.invert_colors_toggle)
+
+        self.black_white_toggle = QCheckBox("Black & White")
+        self.black_white_toggle.setStyleSheet("color: white;")
+        toggle_layout.addWidget(self.black_white_toggle)
+
+        layout.addLayout(toggle_layout)
+
+        self.setLayout(layout)
+
+    def create_slider(self, label_text, min_value, max_value, default_value):
+        """Creates a slider with a label."""
+        slider_layout = QVBoxLayout()
+
+        # Label
+        label = QLabel(label_text)
+        label.setStyleSheet("color: white;")
+        slider_layout.addWidget(label)
+
+        # Slider
+        slider = QSlider(Qt.Horizontal)
+        slider.setMinimum(min_value)
+        slider.setMaximum(max_value)
+        slider.setValue(default_value)
+        if self.responsive:
+            slider.setFixedWidth(int(self.width() * 0.8))  # Set slider width to 80% of the parent widget's width
+        slider.setStyleSheet("""
+            QSlider::groove:horizontal {
+                background: #404040;
+                height: 8px;
+                border-radius: 4px;
+            }
+            QSlider::handle:horizontal {
+                background: #ffffff;
+                width: 20px;
+                height: 20px;
+                margin: -6px 0;
+                border-radius: 10px;
+            }
+        """)
+        slider_layout.addWidget(slider)
+
+        # Container widget
+        container = QWidget()
+        container.setLayout(slider_layout)
+        return container
+
+    def get_hue(self):
+        """Returns the current hue value."""
+        return self.hue_slider.findChild(QSlider).value()
+
+    def get_saturation(self):
+        """Returns the current saturation value."""
+        return self.saturation_slider.findChild(QSlider).value()
+
+    def get_brightness(self):
+        """Returns the current brightness value."""
+        return self.brightness_slider.findChild(QSlider).value()
+
+    def get_contrast(self):
+        """Returns the current contrast value."""
+        return self.contrast_slider.findChild(QSlider).value()
+
+    def is_inverted(self):
+        """Returns whether the colors are inverted."""
+        return self.invert_colors_toggle.isChecked()
+
+    def is_black_white(self):
+        """Returns whether the feed is in black and white."""
+        return self.black_white_toggle.isChecked()
+
+    def resizeEvent(self, event):
+        """Adjusts the slider widths when the widget is resized."""
+        super().resizeEvent(event)
+        if self.responsive:
+            for slider in [self.hue_slider, self.saturation_slider, self.brightness_slider, self.contrast_slider]:
+                slider.findChild(QSlider).setFixedWidth(int(self.width() * 0.8))  # Update slider width
+
+    def apply(self, frame):
+        """Applies the settings (hue, saturation, brightness, contrast, inversion, black & white) to an RGB frame."""
+        # Convert to HSV for hue and saturation adjustments
+        hsv_frame = cv2.cvtColor(frame, cv2.COLOR_RGB2HSV)
+
+        # Adjust hue and saturation
+        hsv_frame[:, :, 0] = (hsv_frame[:, :, 0] + self.get_hue()) % 180  # Hue is cyclic (0-179)
+        hsv_frame[:, :, 1] = np.clip(hsv_frame[:, :, 1] + self.get_saturation() - 255, 0, 255)
+
+        # Convert back to RGB
+        frame = cv2.cvtColor(hsv_frame, cv2.COLOR_HSV2RGB)
+
+        # Adjust brightness and contrast
+        alpha = (self.get_contrast() + 100) / 100  # Contrast scaling factor
+        beta = self.get_brightness()  # Brightness offset
+        frame = cv2.convertScaleAbs(frame, alpha=alpha, beta=beta)
+
+        # Invert colors if enabled
+        if self.is_inverted():
+            frame = cv2.bitwise_not(frame)
+
+        # Convert to black and white if enabled
+        if self.is_black_white():
+            frame = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2RGB)
+
+        return frame
@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from checkout_core.frame_cache import fingerprint
+from checkout_core.voting import VOTE_FRAMES
+
+# ===== CAPTURE CONFIGURATION =====
+CAPTURE_SIZE = (1920, 1080)   # (width, height) requested from the camera; the inference ring is sized from it
+
+# ===== PREVIEW CONFIGURATION =====
+PREVIEW_IDLE_AFTER = 2.0      # Seconds without motion before the preview drops to the idle rate
+PREVIEW_IDLE_INTERVAL = 0.5   # Seconds between preview paints while idle (and while a scan is running)
+MOTION_THRESHOLD = 12         # Largest per-cell gray change on the 32x32 thumbnail that still counts as still
+
+
+class CaptureThread(QThread):
+    """
+    Reads the camera on its own thread and keeps the newest frames (BGR, as captured).
+    frame_ready fires for every new frame; the window decides whether to paint it.
+    Motion is judged on a tiny thumbnail so the preview can idle on an empty lane.
+    """
+
+    frame_ready = pyqtSignal()
+
+    def __init__(self, index, buffer_size=VOTE_FRAMES, size=CAPTURE_SIZE):
+        super().__init__()
+        self.index = index
+        self.size = size  # Requested resolution; a camera that can't deliver it keeps its own
+        self.sequence = 0  # Increments with every captured frame
+        self.last_motion = time.monotonic()
+        self._frames = deque(maxlen=buffer_size)  # Most recent frames, for voting scans
+        self._reference = None  # Thumbnail of the frame motion is measured against
+        self._lock = threading.Lock()
+        self._running = True
+        self._resume = threading.Event()
+        self._resume.set()
+
+    def run(self):
+        cap = cv2.VideoCapture(self.index)
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.size[0])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.size[1])
+        try:
+            while self._running:
+                self._resume.wait()  # Blocks while the window is minimized
+                ret, frame = cap.read()
+                if not ret:
+                    self.msleep(50)
+                    continue
+                thumb = fingerprint(frame)[1]
+                moved = self._reference is None or cv2.absdiff(thumb, self._reference).max() > MOTION_THRESHOLD
+                with self._lock:
+                    self._frames.append(frame)
+                    self.sequence += 1
+                    if moved:
+                        # Only move the reference on motion, so a slow drift still adds up to a change
+                        self._reference = thumb
+                        self.last_motion = time.monotonic()
+                self.frame_ready.emit()
+        finally:
+            cap.release()
+
+    def latest(self):
+        """Returns (sequence, frame) of the newest frame, or (0, None) before the first one."""
+        with self._lock:
+            return self.sequence, (self._frames[-1] if self._frames else None)
+
+    def recent(self):
+        """The buffered frames, oldest first."""
+        with self._lock:
+            return list(self._frames)
+
+    def idle(self):
+        """True when nothing has moved in front of the camera for PREVIEW_IDLE_AFTER seconds."""
+        return time.monotonic() - self.last_motion > PREVIEW_IDLE_AFTER
+
+    def set_paused(self, paused):
+        """Stops reading the camera entirely (e.g. while the window is minimized)."""
+        if paused:
+            self._resume.clear()
+        else:
+            self.last_motion = time.monotonic()  # Repaint at full rate when the window comes back
+            self._resume.set()
+
+    def stop(self):
+        self._running = False
+        self._resume.set()
+        self.wait()
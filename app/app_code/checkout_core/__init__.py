@@ -0,0 +1,5 @@
+# Shared checkout engine used by the GUIs and the command-line tools.
+#
+# Submodules are imported explicitly by each front-end (e.g. `from checkout_core.catalog
+# import load_product_details`) so a tool only pays for what it uses: nothing in this
+# package imports PyQt5, and torch/ultralytics are only loaded when a Detector is created.
@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from .model_registry import load_model, warm_up
+from .renderer import LATENCY_OK, LATENCY_SLOW
+
+# ===== ADAPTIVE INFERENCE CONFIGURATION =====
+ADAPTIVE_INFERENCE = True                        # Trade resolution (then model size) for speed when scans get slow
+LATENCY_BUDGET = LATENCY_OK                      # Seconds per scan; the green zone of the detection-time bar
+RECOVER_FRACTION = 0.5                           # Step back up once scans take less than this share of the budget
+LATENCY_WINDOW = 3                               # Scans per decision (median); one scan past LATENCY_SLOW acts at once
+RETRY_AFTER = 120                                # Seconds before a level that proved too slow is tried again
+IMGSZ_STEPS = (640, 512, 416, 320)               # Input sizes tried with the main model, largest first
+FALLBACK_MODEL = "app/models/yolov8n_best.pt"    # Smaller model used past the last step (skipped if the file is missing)
+FALLBACK_IMGSZ = 640
+ESCALATE_CONF = 0.7                              # A fallback result with any box below this is rerun on the main model
+
+
+class AdaptiveController:
+    """
+    Picks the model and imgsz for each scan from the rolling scan latency. Levels run from
+    the main model at full size, through smaller input sizes, to the fallback model. A
+    fallback result it isn't sure about is re-checked with the main model.
+    """
+
+    def __init__(self, imgsz_steps=IMGSZ_STEPS, fallback_model=FALLBACK_MODEL, budget=LATENCY_BUDGET,
+                 window=LATENCY_WINDOW):
+        self.imgsz_steps = tuple(imgsz_steps)
+        self.fallback_path = fallback_model if fallback_model and os.path.exists(fallback_model) else None
+        self.levels = [(False, imgsz) for imgsz in self.imgsz_steps]
+        if self.fallback_path:
+            self.levels.append((True, FALLBACK_IMGSZ))
+        self.budget = budget
+        self.level = 0
+        self.latencies = deque(maxlen=window)
+        self.retry_at = {}  # Level -> monotonic time it may be tried again after being too slow
+        self.escalations = 0
+        self.fallback = None  # Loaded in the background the first time it's needed
+        self._loading = False
+        self._lock = threading.Lock()
+
+    def select(self, model):
+        """Returns (model, imgsz) for the next scan, given the main model."""
+        with self._lock:
+            use_fallback, imgsz = self.levels[self.level]
+            if not use_fallback:
+                return model, imgsz
+            if self.fallback is not None:
+                return self.fallback, imgsz
+            if not self._loading:
+                self._loading = True
+                threading.Thread(target=self._load_fallback, name="FallbackLoader", daemon=True).start()
+        return model, self.imgsz_steps[-1]  # Until the fallback is warm
+
+    def _load_fallback(self):
+        try:
+            model = load_model(self.fallback_path)
+            warm_up(model, FALLBACK_IMGSZ)
+        except Exception as e:
+            print(f"Fallback model {self.fallback_path} failed to load: {e}")
+            with self._lock:
+                self.levels = [level for level in self.levels if not level[0]]
+                self.level = min(self.level, len(self.levels) - 1)
+            return
+        with self._lock:
+            self.fallback = model
+
+    def record(self, latency):
+        """
+        Adds one scan's model time in seconds (including any re-check; a batch records its
+        time per frame) and moves a level down or up when the window says so.
+        """
+        with self._lock:
+            self.latencies.append(latency)
+            if latency > LATENCY_SLOW:
+                step = 1
+            elif len(self.latencies) < self.latencies.maxlen:
+                return
+            else:
+                median = float(np.median(self.latencies))
+                step = 1 if median > self.budget else -1 if median < self.budget * RECOVER_FRACTION else 0
+            new_level = min(max(self.level + step, 0), len(self.levels) - 1)
+            now = time.monotonic()
+            if step > 0:
+                self.retry_at[self.level] = now + RETRY_AFTER
+            elif now < self.retry_at.get(new_level, 0):
+                return  # Stepping straight back up would only oscillate
+            if new_level != self.level:
+                self.level = new_level
+                self.latencies.clear()  # Judge the new level on its own scans
+                use_fallback, imgsz = self.levels[new_level]
+                print(f"Adaptive inference: {'fallback model' if use_fallback else 'main model'} at imgsz={imgsz} "
+                      f"(last scan {latency:.2f}s, budget {self.budget:.2f}s)")
+
+    def needs_escalation(self, model, main_model, confidences):
+        """True when a fallback result has a box the fallback model isn't sure about."""
+        if model is main_model or len(confidences) == 0:
+            return False
+        if np.min(confidences) < ESCALATE_CONF:
+            self.escalations += 1
+            return True
+        return False
+
+    def escalation_imgsz(self):
+        """Input size for re-checking a fallback result with the main model."""
+        return self.imgsz_steps[-1]
+
+    def status(self):
+        """Current level and recent latencies, for diagnostics."""
+        with self._lock:
+            use_fallback, imgsz = self.levels[self.level]
+            return {
+                "level": self.level,
+                "model": self.fallback_path if use_fallback else "main",
+                "imgsz": imgsz,
+                "recent_latencies": [round(latency, 3) for latency in self.latencies],
+                "escalations": self.escalations,
+            }
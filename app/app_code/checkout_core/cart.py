@@ -0,0 +1,66 @@
+def products_from_detections(boxes, confidences, class_ids, catalog):
+    """Builds one product entry per detected box, ready for the cart and the product cards."""
+    products = []
+    for box, class_id, conf in zip(boxes, class_ids, confidences):
+        class_id = int(class_id)
+        product = catalog.get(class_id)
+        products.append({
+            "class_id": class_id,
+            "name": product.name if product else f"Product {class_id}",
+            "weight": product.weight if product else "Unknown",
+            "info": product.info if product else "No info available",
+            "barcode": product.barcode if product else "N/A",
+            "confidence": float(conf),
+            "box": tuple(map(int, box))  # Store box for removal
+        })
+    return products
+
+
+class Cart:
+    """Products in the current checkout and their counts, keyed by class_id."""
+
+    def __init__(self):
+        self.products = {}
+        self.scan_times = []  # Detection time of every scan in this checkout, for the transaction journal
+
+    def add_products(self, products, detection_time=None):
+        """Adds one unit per detected product entry."""
+        if detection_time is not None:
+            self.scan_times.append(detection_time)
+        for product in products:
+            class_id = product["class_id"]
+            if class_id in self.products:
+                # If the product already exists, update its count
+                self.products[class_id]["count"] += 1
+                self.products[class_id]["confidences"].append(product["confidence"])
+            else:
+                # If the product is new, add it to the cart
+                self.products[class_id] = dict(product, count=1, confidences=[product["confidence"]])
+
+    def remove(self, class_id):
+        """Removes a product from the cart."""
+        self.products.pop(class_id, None)
+
+    def remove_units(self, class_id, count=1):
+        """Takes units of a product out of the cart, removing it when none are left."""
+        if class_id in self.products:
+            self.products[class_id]["count"] -= count
+            if self.products[class_id]["count"] <= 0:
+                self.remove(class_id)
+
+    def set_count(self, class_id, count):
+        """Sets the count of a product already in the cart."""
+        if class_id in self.products:
+            self.products[class_id]["count"] = count
+
+    def clear(self):
+        """Empties the cart."""
+        self.products.clear()
+        self.scan_times = []
+
+    def barcodes(self):
+        """Returns the barcode of every unit in the cart, repeated by count."""
+        barcodes = []
+        for product in self.products.values():
+            barcodes.extend([product.get("barcode", "N/A")] * product.get("count", 1))
+        return barcodes
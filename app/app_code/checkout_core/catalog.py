@@ -0,0 +1,203 @@
+import csv
+import os
+import sqlite3
+import threading
+import time
+
+# Product catalog (paths are relative to the repository root)
+PRODUCT_DETAILS_FILE = "PRODUCT_DETAILS.csv"
+RELOAD_CHECK_INTERVAL = 2.0  # Seconds between checks of the CSV modification time
+CATALOG_SCHEMA_VERSION = "1"
+
+# Define colors for different classes
+CLASS_COLORS = [
+    "#FF0000", "#00FF00", "#0000FF", "#FFFF00",
+    "#FFA500", "#800080", "#00FFFF", "#FF00FF",
+    "#808000", "#008080", "#800000", "#008000",
+    "#000080", "#C0C0C0", "#404040", "#FF1493",
+    "#E38800", "#CB4242", "#8327CA",
+]
+
+
+def hex_to_rgb(hex_color):
+    """Convert hex color to RGB tuple"""
+    hex_color = hex_color.lstrip('#')
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+
+# RGB versions of the class colors for OpenCV drawing
+CLASS_COLORS_RGB = [hex_to_rgb(color) for color in CLASS_COLORS]
+
+
+def class_color(class_id):
+    """Returns the RGB color of a class."""
+    return CLASS_COLORS_RGB[class_id % len(CLASS_COLORS_RGB)]
+
+
+class Product:
+    """Immutable catalog record with its display label computed once."""
+
+    __slots__ = ("class_id", "name", "weight", "info", "barcode", "label")
+
+    def __init__(self, class_id, name, weight, info, barcode):
+        for field, value in zip(self.__slots__, (class_id, name, weight, info, barcode, f"{name} ({weight})")):
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Product records are immutable")
+
+    def __repr__(self):
+        return f"Product({self.class_id!r}, {self.name!r}, barcode={self.barcode!r})"
+
+
+def compile_catalog(csv_file, db_file):
+    """Compiles the CSV into an indexed SQLite file, replacing the old one atomically."""
+    tmp_file = f"{db_file}.{os.getpid()}.tmp"  # Per-process name, so the GUI and the inference worker never collide
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+
+    with open(csv_file, mode='r', newline='') as file:
+        rows = [
+            (int(row['class_id']) if row.get('class_id', '').strip() else None,
+             row['name'], row['weight'], row['info'], row['barcode'], row['name'].lower())
+            for row in csv.DictReader(file)
+        ]
+
+    connection = sqlite3.connect(tmp_file)
+    try:
+        connection.executescript("""
+            CREATE TABLE products (
+                class_id INTEGER UNIQUE,
+                name TEXT NOT NULL,
+                weight TEXT,
+                info TEXT,
+                barcode TEXT,
+                name_key TEXT NOT NULL
+            );
+            CREATE INDEX idx_products_barcode ON products(barcode);
+            CREATE INDEX idx_products_name_key ON products(name_key);
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        connection.executemany("INSERT INTO products VALUES (?, ?, ?, ?, ?, ?)", rows)
+        connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("source_mtime_ns", str(os.stat(csv_file).st_mtime_ns)),
+            ("schema_version", CATALOG_SCHEMA_VERSION),
+        ])
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(tmp_file, db_file)
+
+
+class Catalog:
+    """
+    Product catalog compiled from the CSV into an indexed SQLite file. Lookups by class_id
+    are cached in memory; barcode and name-prefix lookups go through the indexes. The
+    compiled file is rebuilt and swapped in when the CSV changes on disk.
+    """
+
+    def __init__(self, csv_file=PRODUCT_DETAILS_FILE, db_file=None):
+        self.csv_file = csv_file
+        self.db_file = db_file or os.path.splitext(csv_file)[0] + ".sqlite"
+        self._lock = threading.Lock()
+        self._connection = None
+        self._by_class = {}
+        self._source_mtime = None
+        self._next_check = 0.0
+        self.reload_if_changed(force=True)
+
+    def __getstate__(self):
+        # Connections don't cross process boundaries; the child reopens the compiled file
+        return {"csv_file": self.csv_file, "db_file": self.db_file}
+
+    def __setstate__(self, state):
+        self.__init__(state["csv_file"], state["db_file"])
+
+    def _stored_mtime(self):
+        try:
+            connection = sqlite3.connect(f"file:{self.db_file}?mode=ro", uri=True)
+            try:
+                meta = dict(connection.execute("SELECT key, value FROM meta"))
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            return None
+        if meta.get("schema_version") != CATALOG_SCHEMA_VERSION:
+            return None
+        return meta.get("source_mtime_ns")
+
+    def reload_if_changed(self, force=False):
+        """Recompiles and reopens the catalog if the CSV changed. Checks the disk at most every RELOAD_CHECK_INTERVAL."""
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return False
+        self._next_check = now + RELOAD_CHECK_INTERVAL
+
+        source_mtime = os.stat(self.csv_file).st_mtime_ns if os.path.exists(self.csv_file) else None
+        if not force and source_mtime == self._source_mtime:
+            return False
+
+        if source_mtime is not None and self._stored_mtime() != str(source_mtime):
+            compile_catalog(self.csv_file, self.db_file)
+        elif source_mtime is None and not os.path.exists(self.db_file):
+            print(f"Warning: {self.csv_file} not found. Using default class IDs only.")
+
+        connection = None
+        if os.path.exists(self.db_file):
+            connection = sqlite3.connect(f"file:{self.db_file}?mode=ro", uri=True, check_same_thread=False)
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+            self._connection = connection
+            self._by_class = {}
+            self._source_mtime = source_mtime
+        return True
+
+    def _query(self, sql, params):
+        with self._lock:
+            if self._connection is None:
+                return []
+            return self._connection.execute(sql, params).fetchall()
+
+    def get(self, class_id, default=None):
+        """Returns the Product for a detector class id, or default."""
+        self.reload_if_changed()
+        class_id = int(class_id)
+        # One lock for the cache and the connection, so a reload can't slip an old row into the new cache
+        with self._lock:
+            product = self._by_class.get(class_id)
+            if product is None and self._connection is not None:
+                rows = self._connection.execute(
+                    "SELECT class_id, name, weight, info, barcode FROM products WHERE class_id = ?", (class_id,)
+                ).fetchall()
+                if rows:
+                    product = self._by_class[class_id] = Product(*rows[0])
+        return default if product is None else product
+
+    def by_barcode(self, barcode):
+        """Returns the Product with this barcode, or None."""
+        self.reload_if_changed()
+        rows = self._query("SELECT class_id, name, weight, info, barcode FROM products WHERE barcode = ? LIMIT 1", (str(barcode),))
+        return Product(*rows[0]) if rows else None
+
+    def search(self, prefix, limit=20):
+        """Returns products whose name starts with prefix (case-insensitive), using the name index."""
+        self.reload_if_changed()
+        key = prefix.lower()
+        rows = self._query(
+            "SELECT class_id, name, weight, info, barcode FROM products WHERE name_key >= ? AND name_key < ? ORDER BY name_key LIMIT ?",
+            (key, key + "\U0010ffff", limit),
+        )
+        return [Product(*row) for row in rows]
+
+    def __contains__(self, class_id):
+        return self.get(class_id) is not None
+
+    def __len__(self):
+        rows = self._query("SELECT COUNT(*) FROM products", ())
+        return rows[0][0] if rows else 0
+
+
+def load_catalog(csv_file=PRODUCT_DETAILS_FILE):
+    """Opens the product catalog for a CSV file (compiled to SQLite on first use or after a change)."""
+    return Catalog(csv_file)
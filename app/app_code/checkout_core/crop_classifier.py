@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+
+# ===== CROP CLASSIFIER CONFIGURATION =====
+CROP_CLASSIFIER = True                                   # Re-check look-alike SKUs on their crops (skipped if the model file is missing)
+CROP_MODEL = "app/models/classifiers/crop_classifier.pt"  # YOLOv8-cls trained by training_and_dataset_code/train_crop_classifier.py
+CROP_SIZE = 96                                           # Square classifier input; every crop is resized to this
+CROP_PADDING = 0.1                                       # Share of the box width/height added on each side for context
+OVERRIDE_CONF = 0.6                                      # Classifier probability (within the group) needed to change the class
+
+
+def pad_boxes(boxes, width, height, padding=CROP_PADDING):
+    """(N, 4) xyxy boxes grown by padding on each side and clipped to the frame."""
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    margin = (boxes[:, 2:] - boxes[:, :2]) * padding
+    padded = np.concatenate([boxes[:, :2] - margin, boxes[:, 2:] + margin], axis=1)
+    return np.clip(padded, 0, [width, height, width, height]).astype(np.float32)
+
+
+def roi_crops(frame, boxes, crop_size=CROP_SIZE, padding=CROP_PADDING):
+    """(N, 3, crop_size, crop_size) float tensor (0-1) of the padded boxes, bilinear-sampled in one roi_align call."""
+    import torch
+    from torchvision.ops import roi_align
+
+    height, width = frame.shape[:2]
+    rois = torch.from_numpy(pad_boxes(boxes, width, height, padding))
+    image = torch.from_numpy(np.ascontiguousarray(frame)).permute(2, 0, 1)[None].float() / 255
+    return roi_align(image, [rois], output_size=crop_size, spatial_scale=1.0, sampling_ratio=2, aligned=True)
+
+
+class CropClassifier:
+    """
+    Second opinion on look-alike products. Boxes whose class belongs to a confusable group are
+    cut out of the frame in one roi_align call, classified as one batch, and relabelled when the
+    classifier is confident about another class of the same group. Other boxes pass through.
+    """
+
+    def __init__(self, model_path, groups, crop_size=CROP_SIZE, padding=CROP_PADDING, override_conf=OVERRIDE_CONF):
+        import torch
+        from ultralytics import YOLO
+
+        self.torch = torch
+        self.crop_size = crop_size
+        self.padding = padding
+        self.override_conf = override_conf
+
+        yolo = YOLO(model_path, task="classify")
+        self.model = yolo.model.float().cpu().fuse(verbose=False).eval()
+        # The classifier's outputs are the crop folders it was trained on, named by detector class id
+        self.output_classes = np.array([int(yolo.names[i]) for i in range(len(yolo.names))])
+
+        # allowed[c, k]: output k may replace detector class c (both in the same group)
+        size = max([int(c) for group in groups for c in group] + list(self.output_classes)) + 1
+        self.allowed = np.zeros((size, len(self.output_classes)), dtype=bool)
+        for group in groups:
+            group = [int(c) for c in group]
+            self.allowed[np.ix_(group, np.isin(self.output_classes, group))] = True
+        self.grouped = np.any(self.allowed, axis=1)
+
+    def refine(self, frame, boxes, confidences, class_ids):
+        """Same detections with the class of confusable boxes corrected. Frames are RGB, like the detector's."""
+        class_ids = np.asarray(class_ids).astype(int)
+        in_table = class_ids < len(self.grouped)
+        grouped = np.zeros(len(class_ids), dtype=bool)
+        grouped[in_table] = self.grouped[class_ids[in_table]]
+        candidates = np.flatnonzero(grouped)
+        if len(candidates) == 0:
+            return boxes, confidences, class_ids
+
+        with self.torch.inference_mode():
+            probs = self.model(roi_crops(frame, np.asarray(boxes)[candidates], self.crop_size, self.padding))
+            if isinstance(probs, (list, tuple)):
+                probs = probs[0]  # Classify head returns (softmax, logits) outside training
+            probs = probs.float().numpy()
+
+        # Only classes of the box's own group compete; renormalize over them
+        probs = probs * self.allowed[class_ids[candidates]]
+        best = np.argmax(probs, axis=1)
+        share = probs[np.arange(len(best)), best] / np.maximum(probs.sum(axis=1), 1e-9)
+        override = share >= self.override_conf
+        class_ids = class_ids.copy()
+        class_ids[candidates[override]] = self.output_classes[best[override]]
+        return boxes, confidences, class_ids
+
+
+def load_crop_classifier(policy, model_path=CROP_MODEL):
+    """The policy's crop classifier, or None when it's turned off, has no groups or hasn't been trained yet."""
+    if not CROP_CLASSIFIER or not policy.confusable_groups:
+        return None
+    if not os.path.exists(model_path):
+        print(f"Crop classifier not found at {model_path}; confusable classes are left to the detector.")
+        return None
+    return CropClassifier(model_path, policy.confusable_groups)
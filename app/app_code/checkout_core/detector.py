@@ -0,0 +1,134 @@
+import threading
+import time
+
+from .adaptive import AdaptiveController, ADAPTIVE_INFERENCE
+from .crop_classifier import load_crop_classifier
+from .embedding_index import load_open_set
+from .frame_cache import DetectionCache, fingerprint
+from .model_registry import ModelRegistry, load_model
+from .policy import load_detection_policy
+from .tiling import sliced_predict, sliced_predict_batch, TILING_MODE
+
+
+class Detector:
+    """Loads the YOLO model once and runs it with the shared detection policy and tiling mode."""
+
+    def __init__(self, model_path, policy=None, tiling_mode=TILING_MODE, registry=None, cache=None, adaptive=True,
+                 crop_classifier=None, open_set=None, use_registry=False, imgsz=None):
+        # Lane front-ends pass use_registry=True so the active-model pointer wins over their default path;
+        # tools that name a model run exactly that model
+        self.registry = registry or ModelRegistry()
+        self.use_registry = use_registry
+        self.model_path = self.registry.resolve(model_path) if use_registry else model_path
+        if self.model_path != model_path:
+            print(f"Active model {self.model_path} (from {self.registry.active_file}) replaces {model_path}")
+        self.model = load_model(self.model_path)
+        self.imgsz = imgsz  # Pins the input size (export checks); otherwise the registry and adaptive control decide
+        self.fixed_imgsz = imgsz or self.registry.fixed_input_size(self.model_path)  # Exported artifacts take one input size
+        self.policy = policy or load_detection_policy()
+        self.tiling_mode = tiling_mode
+        # Repeat scans of an unchanged tray skip the model. "is not None": an empty cache is falsy (__len__)
+        self.cache = cache if cache is not None else DetectionCache()
+        # Lowers imgsz or switches to a smaller model when scans run over the latency budget. True builds the
+        # default controller (if ADAPTIVE_INFERENCE); None keeps one model and imgsz, as benchmarks need
+        if adaptive is True:
+            adaptive = AdaptiveController() if ADAPTIVE_INFERENCE else None
+        self.adaptive = adaptive
+        # Second stage that relabels boxes of look-alike SKUs from their crops
+        self.crop_classifier = crop_classifier or load_crop_classifier(self.policy)
+        # Names boxes after the nearest enrolled product, so new SKUs need no retraining
+        self.open_set = open_set or load_open_set()
+        self._swap_lock = threading.Lock()
+
+    def swap_model(self, model, model_path):
+        """Replaces the model atomically; a scan already running finishes on the old one."""
+        with self._swap_lock:
+            self.model, self.model_path = model, model_path
+            self.fixed_imgsz = self.imgsz or self.registry.fixed_input_size(model_path)
+            self.cache.clear()  # Cached detections came from the old model
+
+    def watch_registry(self):
+        """Follows the registry's active model in the background (see ModelRegistry.watch). Not for a pinned model_path."""
+        if not self.use_registry:
+            return None
+        return self.registry.watch(self)
+
+    def _select(self, main_model):
+        """(model, predict kwargs) for the next scan, as chosen by the adaptive controller."""
+        kwargs = self.policy.predict_kwargs()
+        if self.open_set is not None:
+            kwargs["agnostic_nms"] = True  # One box per product; the embedding index decides what it is
+        if self.fixed_imgsz:
+            return main_model, dict(kwargs, imgsz=self.fixed_imgsz)  # Nothing to adapt on a fixed-shape export
+        if self.adaptive is None:
+            return main_model, kwargs
+        model, imgsz = self.adaptive.select(main_model)
+        return model, dict(kwargs, imgsz=imgsz)
+
+    def _predict(self, model, frame, kwargs):
+        boxes, confidences, class_ids = sliced_predict(model, frame, mode=self.tiling_mode, **kwargs)
+        # Per-class thresholds and max_det, so low-confidence boxes never reach the cart
+        return self.policy.filter(boxes, confidences, class_ids)
+
+    def _predict_batch(self, model, frames, kwargs):
+        # One full-frame call for the whole batch; only crowded frames are tiled afterwards
+        return [self.policy.filter(*detections)
+                for detections in sliced_predict_batch(model, frames, mode=self.tiling_mode, **kwargs)]
+
+    def _refine(self, frame, detections):
+        for stage in (self.crop_classifier, self.open_set):
+            if stage is not None:
+                detections = stage.refine(frame, *detections)
+        return detections
+
+    def detect(self, frame, use_cache=True):
+        """
+        Returns (boxes, confidences, class_ids) in the coordinates of the given frame.
+        use_cache=False skips the repeat-scan cache, for callers that need a fresh pass per frame (voting).
+        """
+        frame_print = fingerprint(frame) if use_cache else None
+        cached = self.cache.lookup(frame, frame_print) if use_cache else None
+        if cached is not None:
+            return cached
+        main_model = self.model  # One model per scan, even if a swap lands mid-scan
+        model, kwargs = self._select(main_model)
+        start = time.perf_counter()
+        detections = self._predict(model, frame, kwargs)
+        if self.adaptive is not None and not self.fixed_imgsz:
+            if self.adaptive.needs_escalation(model, main_model, detections[1]):
+                detections = self._predict(main_model, frame, dict(kwargs, imgsz=self.adaptive.escalation_imgsz()))
+            self.adaptive.record(time.perf_counter() - start)
+        detections = self._refine(frame, detections)
+        if use_cache and main_model is self.model:  # Don't cache results of a model that was swapped out meanwhile
+            self.cache.store(frame, detections, frame_print)
+        return detections
+
+    def detect_batch(self, frames, use_cache=True):
+        """
+        Runs several frames through the model in one call. Returns one detect() result per frame.
+        use_cache is one flag for all frames or one per frame (see detect()).
+        """
+        use_cache = [use_cache] * len(frames) if isinstance(use_cache, bool) else list(use_cache)
+        prints = [fingerprint(frame) if cached else None for frame, cached in zip(frames, use_cache)]
+        detections = [self.cache.lookup(frame, frame_print) if cached else None
+                      for frame, frame_print, cached in zip(frames, prints, use_cache)]
+        misses = [i for i, cached in enumerate(detections) if cached is None]
+        if misses:
+            main_model = self.model
+            model, kwargs = self._select(main_model)
+            start = time.perf_counter()
+            results = self._predict_batch(model, [frames[i] for i in misses], kwargs)
+            if self.adaptive is not None and not self.fixed_imgsz:
+                unsure = [j for j, result in enumerate(results) if self.adaptive.needs_escalation(model, main_model, result[1])]
+                if unsure:
+                    rechecked = self._predict_batch(main_model, [frames[misses[j]] for j in unsure],
+                                                    dict(kwargs, imgsz=self.adaptive.escalation_imgsz()))
+                    for j, result in zip(unsure, rechecked):
+                        results[j] = result
+                # The budget is per scan: a micro-batch of 8 lanes is 8 scans, not one slow one
+                self.adaptive.record((time.perf_counter() - start) / len(misses))
+            for i, result in zip(misses, results):
+                detections[i] = self._refine(frames[i], result)
+                if use_cache[i] and main_model is self.model:
+                    self.cache.store(frames[i], detections[i], prints[i])
+        return detections
@@ -0,0 +1,247 @@
+import json
+import os
+import time
+
+import numpy as np
+
+from .crop_classifier import roi_crops
+from .journal import write_atomic
+
+# ===== OPEN-SET RECOGNITION CONFIGURATION =====
+OPEN_SET = False                          # Name each box after its nearest enrolled product (app_code/enroll_product.py)
+EMBEDDING_MODEL = "yolov8n-cls.pt"        # Classifier whose pooled backbone features are the crop embedding
+EMBED_SIZE = 128                          # Square crop fed to the embedding model
+EMBED_PADDING = 0.05
+INDEX_DIR = "app/models/embedding_index"  # references/<barcode>.npy raw embeddings, plus the IVF index built from them
+INDEX_DIM = 128                           # Embeddings are PCA-reduced to this many dimensions before indexing
+PCA_MIN_VECTORS = 1024                    # Fewer references than this are indexed at full size (PCA needs data)
+NPROBE = 8                                # Inverted lists scanned per lookup
+MATCH_THRESHOLD = 0.8                     # Minimum cosine similarity to the nearest reference
+KEEP_UNMATCHED = True                     # Boxes with no match keep the detector's class (False for a single-class product detector)
+KMEANS_ITERATIONS = 20
+TRAIN_SAMPLE = 65536                      # References sampled to fit the PCA and the coarse centroids
+RELOAD_CHECK_INTERVAL = 2.0               # Seconds between checks for a rebuilt index
+
+
+def normalize(vectors):
+    """Rows scaled to unit length, so a dot product is the cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+def reference_file(index_dir, barcode):
+    return os.path.join(index_dir, "references", f"{barcode}.npy")
+
+
+class CropEmbedder:
+    """Pooled backbone features of a YOLOv8-cls model, computed for every box of a frame as one batch."""
+
+    def __init__(self, model_path=EMBEDDING_MODEL, crop_size=EMBED_SIZE, padding=EMBED_PADDING):
+        import torch
+        from ultralytics import YOLO
+
+        self.torch = torch
+        self.crop_size = crop_size
+        self.padding = padding
+        model = YOLO(model_path, task="classify").model.float().cpu().fuse(verbose=False).eval()
+        layers = list(model.model)
+        head = layers[-1]
+        # Everything up to the classifier's linear layer: backbone, the head's 1x1 conv and global pooling
+        self.network = torch.nn.Sequential(*layers[:-1], head.conv, head.pool, torch.nn.Flatten())
+        self.dim = head.conv.conv.out_channels
+
+    def embed(self, frame, boxes):
+        """(N, dim) unit-length embeddings of the boxes of an RGB frame."""
+        if len(boxes) == 0:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        with self.torch.inference_mode():
+            features = self.network(roi_crops(frame, boxes, self.crop_size, self.padding))
+        return normalize(features.numpy())
+
+
+def fit_pca(vectors, dim):
+    """(mean, components) projecting onto the dim directions of largest variance; identity for small sets."""
+    if len(vectors) < PCA_MIN_VECTORS or dim >= vectors.shape[1]:
+        return np.zeros(vectors.shape[1], dtype=np.float32), np.eye(vectors.shape[1], dtype=np.float32)
+    mean = vectors.mean(axis=0)
+    centered = vectors - mean
+    _, eigenvectors = np.linalg.eigh(centered.T @ centered)
+    return mean.astype(np.float32), np.ascontiguousarray(eigenvectors[:, ::-1][:, :dim].T, dtype=np.float32)
+
+
+def nearest_centroid(vectors, centroids, chunk=65536):
+    """Index of the most similar centroid for each vector, in chunks to bound memory."""
+    return np.concatenate([np.argmax(vectors[i:i + chunk] @ centroids.T, axis=1)
+                           for i in range(0, len(vectors), chunk)])
+
+
+def spherical_kmeans(vectors, k, iterations=KMEANS_ITERATIONS, seed=0):
+    """k unit-length centroids of unit-length vectors (cosine k-means)."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)]
+    for _ in range(iterations):
+        assign = nearest_centroid(vectors, centroids)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=k)
+        sums = np.zeros_like(centroids)
+        filled = counts > 0
+        sums[filled] = np.add.reduceat(vectors[order], np.concatenate([[0], np.cumsum(counts)[:-1]])[filled])
+        centroids = normalize(sums)
+        centroids[~filled] = vectors[rng.choice(len(vectors), int(np.sum(~filled)))]  # Reseed empty lists
+    return centroids
+
+
+def save_array(index_dir, name, array):
+    """Writes one index array through a temporary file, so open memory maps keep the old one."""
+    path = os.path.join(index_dir, name)
+    tmp_file = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_file, mode='wb') as file:
+        np.save(file, array)
+    os.replace(tmp_file, path)
+
+
+def build_index(index_dir=INDEX_DIR, dim=INDEX_DIM, nlist=None):
+    """Rebuilds the IVF index from every barcode's reference embeddings. Returns the number of vectors indexed."""
+    references_dir = os.path.join(index_dir, "references")
+    names = sorted(os.listdir(references_dir)) if os.path.isdir(references_dir) else []
+    barcodes = [os.path.splitext(name)[0] for name in names if name.endswith(".npy")]
+    if not barcodes:
+        if os.path.exists(os.path.join(index_dir, "index.json")):
+            os.remove(os.path.join(index_dir, "index.json"))  # Readers drop the index rather than keep matching removed products
+        return 0
+    references = [np.load(reference_file(index_dir, barcode)) for barcode in barcodes]
+    raw = np.concatenate(references).astype(np.float32)
+    labels = np.repeat(np.arange(len(barcodes), dtype=np.int32), [len(r) for r in references])
+
+    sample = np.random.default_rng(0).permutation(len(raw))[:TRAIN_SAMPLE]
+    mean, components = fit_pca(raw[sample], dim)
+    vectors = normalize((raw - mean) @ components.T)
+    nlist = min(nlist or max(1, int(np.sqrt(len(vectors)))), len(sample))
+    centroids = spherical_kmeans(vectors[sample], nlist)
+
+    # Vectors are stored grouped by list, so each inverted list is one contiguous slice
+    assign = nearest_centroid(vectors, centroids)
+    order = np.argsort(assign, kind="stable")
+    offsets = np.searchsorted(assign[order], np.arange(nlist + 1))
+    for name, array in (("vectors.npy", vectors[order]), ("labels.npy", labels[order]),
+                        ("centroids.npy", centroids), ("offsets.npy", offsets), ("mean.npy", mean),
+                        ("components.npy", components)):
+        save_array(index_dir, name, array)
+    # Written last: readers reload when it changes
+    write_atomic(os.path.join(index_dir, "index.json"), json.dumps({
+        "barcodes": barcodes, "count": len(vectors), "dim": int(components.shape[0]), "nlist": nlist,
+        "model": EMBEDDING_MODEL, "built": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }, indent=2))
+    return len(vectors)
+
+
+class EmbeddingIndex:
+    """
+    Inverted-file (IVF) index of reference embeddings keyed by barcode. The reference vectors
+    are memory-mapped and grouped by coarse centroid; a lookup scores the queries against the
+    NPROBE nearest centroids' lists only. The index reloads itself after build_index() runs.
+    """
+
+    def __init__(self, index_dir=INDEX_DIR, nprobe=NPROBE, min_similarity=MATCH_THRESHOLD):
+        self.index_dir = index_dir
+        self.nprobe = nprobe
+        self.min_similarity = min_similarity
+        self._index = None
+        self._mtime = None
+        self._next_check = 0.0
+        self.reload_if_changed(force=True)
+
+    def reload_if_changed(self, force=False):
+        """Reopens the index if it was rebuilt. Checks the disk at most every RELOAD_CHECK_INTERVAL."""
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return False
+        self._next_check = now + RELOAD_CHECK_INTERVAL
+
+        meta_file = os.path.join(self.index_dir, "index.json")
+        mtime = os.stat(meta_file).st_mtime_ns if os.path.exists(meta_file) else None
+        if mtime == self._mtime:
+            return False
+        index = None
+        if mtime is not None:
+            with open(meta_file, mode='r') as file:
+                index = json.load(file)
+            for name in ("vectors", "labels"):
+                # Plain ndarray view of the map (no copy), which slices faster than np.memmap
+                index[name] = np.asarray(np.load(os.path.join(self.index_dir, f"{name}.npy"), mmap_mode='r'))
+            for name in ("centroids", "offsets", "mean", "components"):
+                index[name] = np.load(os.path.join(self.index_dir, f"{name}.npy"))
+        self._index, self._mtime = index, mtime  # One assignment, so a lookup never sees half of each index
+        return True
+
+    def __len__(self):
+        return len(self._index["barcodes"]) if self._index else 0
+
+    def search(self, queries):
+        """(barcode or None, similarity) of the nearest reference for each row of (N, dim) embeddings."""
+        self.reload_if_changed()
+        index = self._index
+        count = len(queries)
+        if index is None or count == 0:
+            return [None] * count, np.full(count, -np.inf, dtype=np.float32)
+
+        queries = normalize((np.asarray(queries, dtype=np.float32) - index["mean"]) @ index["components"].T)
+        nprobe = min(self.nprobe, len(index["centroids"]))
+        lists = np.argpartition(-(queries @ index["centroids"].T), nprobe - 1, axis=1)[:, :nprobe]
+        probed = np.zeros((len(index["centroids"]), count), dtype=bool)
+        probed[lists, np.arange(count)[:, None]] = True
+
+        # Each inverted list is a contiguous slice of the memory map, scored in place against the queries that probed it
+        offsets, vectors = index["offsets"], index["vectors"]
+        similarity = np.full(count, -np.inf, dtype=np.float32)
+        best = np.zeros(count, dtype=np.int64)
+        for l in np.unique(lists).tolist():
+            start, end = int(offsets[l]), int(offsets[l + 1])
+            if start == end:
+                continue
+            who = np.flatnonzero(probed[l])
+            scores = vectors[start:end] @ queries[who].T
+            top = scores.argmax(axis=0)
+            top_scores = scores[top, np.arange(len(who))]
+            better = top_scores > similarity[who]
+            similarity[who[better]] = top_scores[better]
+            best[who[better]] = start + top[better]
+        labels = np.where(np.isfinite(similarity), index["labels"][best], -1)
+        barcodes = [index["barcodes"][label] if label >= 0 and score >= self.min_similarity else None
+                    for label, score in zip(labels, similarity)]
+        return barcodes, similarity
+
+
+class OpenSetRecognizer:
+    """Relabels detector boxes with the catalog class of the nearest enrolled product."""
+
+    def __init__(self, index, embedder, catalog, keep_unmatched=KEEP_UNMATCHED):
+        self.index = index
+        self.embedder = embedder
+        self.catalog = catalog
+        self.keep_unmatched = keep_unmatched
+
+    def refine(self, frame, boxes, confidences, class_ids):
+        """Same detections with class ids looked up by barcode. Frames are RGB, like the detector's."""
+        class_ids = np.asarray(class_ids).astype(int)
+        if len(class_ids) == 0:
+            return boxes, confidences, class_ids
+        barcodes, _ = self.index.search(self.embedder.embed(frame, np.asarray(boxes)))
+        products = [self.catalog.by_barcode(barcode) if barcode else None for barcode in barcodes]
+        matched = np.array([product is not None and product.class_id is not None for product in products])
+        class_ids = class_ids.copy()
+        class_ids[matched] = [product.class_id for product, hit in zip(products, matched) if hit]
+        if self.keep_unmatched:
+            return boxes, confidences, class_ids
+        return np.asarray(boxes)[matched], np.asarray(confidences)[matched], class_ids[matched]
+
+
+def load_open_set(index_dir=INDEX_DIR):
+    """The open-set recognizer, or None when it's turned off or nothing has been enrolled yet."""
+    if not OPEN_SET:
+        return None
+    if not os.path.exists(os.path.join(index_dir, "index.json")):
+        print(f"No embedding index in {index_dir}; run app/app_code/enroll_product.py first.")
+        return None
+    from .catalog import load_catalog
+    return OpenSetRecognizer(EmbeddingIndex(index_dir), CropEmbedder(), load_catalog())
@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from .tiling import scale_boxes
+
+# ===== FRAME CACHE CONFIGURATION =====
+FRAME_CACHE_SIZE = 32      # Frames remembered per detector (0 disables the cache)
+HASH_SIZE = 16             # dHash grid (256-bit hash), used to find the candidate entry
+HASH_MAX_DISTANCE = 12     # Hamming distance (bits) under which a cached frame is a candidate
+THUMB_SIZE = 32            # Side of the grayscale thumbnail kept per entry
+THUMB_MAX_DIFF = 12        # Largest per-cell gray difference still counted as the same tray
+SAMPLE_SIZE = 256          # Nearest-neighbour pre-shrink, so the cost doesn't grow with camera resolution
+
+# Number of set bits in every byte value, for Hamming distances over packed hashes
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint16)
+
+
+def fingerprint(frame):
+    """
+    Returns (dhash, thumbnail) of a frame. The hash (sign of horizontal gradients, packed
+    to bytes) finds candidates quickly; the thumbnail confirms them, since one new item on
+    a tray may flip only a few hash bits but always moves some thumbnail cells.
+    """
+    sample = cv2.resize(frame, (SAMPLE_SIZE, SAMPLE_SIZE), interpolation=cv2.INTER_NEAREST)
+    gray = cv2.cvtColor(sample, cv2.COLOR_RGB2GRAY) if sample.ndim == 3 else sample
+    thumb = cv2.resize(gray, (THUMB_SIZE, THUMB_SIZE), interpolation=cv2.INTER_AREA)  # Averages out sensor noise
+    grid = cv2.resize(thumb, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
+    return np.packbits(grid[:, 1:] > grid[:, :-1]), thumb
+
+
+class DetectionCache:
+    """
+    Bounded LRU of recent detections keyed by the perceptual hash of the frame. A frame
+    within max_distance bits of a cached one, whose thumbnail also matches, gets the
+    cached detections scaled to its own size without running the model.
+    """
+
+    def __init__(self, size=FRAME_CACHE_SIZE, max_distance=HASH_MAX_DISTANCE):
+        self.size = size
+        self.max_distance = max_distance
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # hash bytes -> (frame shape, (boxes, confidences, class_ids))
+        self._lock = threading.Lock()
+
+    def lookup(self, frame, frame_print=None):
+        """Returns cached (boxes, confidences, class_ids) for a near-duplicate frame, or None."""
+        if self.size <= 0:
+            return None
+        frame_hash, thumb = fingerprint(frame) if frame_print is None else frame_print
+        with self._lock:
+            if self._entries:
+                keys = list(self._entries)
+                hashes = np.frombuffer(b"".join(keys), dtype=np.uint8).reshape(len(keys), -1)
+                distances = POPCOUNT[hashes ^ frame_hash].sum(axis=1)
+                best = int(distances.argmin())
+                if distances[best] <= self.max_distance:
+                    cached_thumb, shape, (boxes, confidences, class_ids) = self._entries[keys[best]]
+                    if cv2.absdiff(thumb, cached_thumb).max() <= THUMB_MAX_DIFF:
+                        self._entries.move_to_end(keys[best])
+                        self.hits += 1
+                        if shape != frame.shape[:2]:
+                            boxes = scale_boxes(boxes, shape, frame.shape)
+                        return boxes, confidences, class_ids
+            self.misses += 1
+        return None
+
+    def store(self, frame, detections, frame_print=None):
+        """Remembers the detections of a frame, evicting the least recently used entry when full."""
+        if self.size <= 0:
+            return
+        frame_hash, thumb = fingerprint(frame) if frame_print is None else frame_print
+        key = frame_hash.tobytes()
+        with self._lock:
+            self._entries[key] = (thumb, frame.shape[:2], detections)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Forgets every entry (after a model or policy change)."""
+        with self._lock:
+            self._entries.clear()
+
@@ -0,0 +1,198 @@
+import multiprocessing as mp
+import time
+from collections import deque
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from .renderer import DISPLAY_SIZE
+
+# ===== TRANSPORT CONFIGURATION =====
+RING_SLOTS = 8                # Frames that can be in flight at once (a voting scan takes VOTE_FRAMES of them)
+SLOT_SHAPE = (1080, 1920, 3)  # Default frame slot; front-ends pass their capture resolution (capture_thread.CAPTURE_SIZE)
+RESULT_SHAPE = (DISPLAY_SIZE[1], DISPLAY_SIZE[0], 3)  # Annotated results are drawn at the detected-image view size
+
+
+class FrameRing:
+    """Fixed pool of preallocated uint8 frame slots in one multiprocessing.shared_memory block."""
+
+    def __init__(self, slots=RING_SLOTS, shape=SLOT_SHAPE, name=None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        size = slots * int(np.prod(self.shape))
+        self.owner = name is None  # The creating process is the one that unlinks the block
+        self.shm = shared_memory.SharedMemory(create=True, size=size) if self.owner else shared_memory.SharedMemory(name=name)
+        self.array = np.ndarray((slots, *self.shape), dtype=np.uint8, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def slot(self, index, size=None):
+        """Returns a view of one slot (no copy), or of its top-left (height, width) region."""
+        view = self.array[index]
+        return view if size is None else view[:size[0], :size[1]]
+
+    def write(self, index, frame):
+        """
+        Copies a frame into a slot and returns its (height, width) there. A frame that fits is stored
+        unscaled in the slot's top-left corner, so the detector (and tiling) sees the camera's full
+        resolution; a larger one is scaled down to fit, keeping its aspect ratio.
+        """
+        height, width = frame.shape[:2]
+        slot_height, slot_width = self.shape[:2]
+        if height > slot_height or width > slot_width:
+            scale = min(slot_height / height, slot_width / width)
+            height, width = int(height * scale), int(width * scale)
+            self.array[index, :height, :width] = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        else:
+            self.array[index, :height, :width] = frame
+        return height, width
+
+    def close(self):
+        del self.array  # Drop the view before closing the mapping
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def inference_worker(model_path, catalog, frame_ring_name, result_ring_name, slots, shape, result_shape, requests, results):
+    """
+    Child process loop: detect on a frame slot, draw into the matching result slot, reply
+    with the slot index. Requests are (slot, frame size), or (slots, frame sizes) for a voting
+    scan, whose result goes into the last slot. Boxes are reported in result (view) coordinates,
+    as YOLOThread reports them.
+    """
+    # Imported here so the child only pays for what it needs
+    from .cart import products_from_detections
+    from .detector import Detector
+    from .renderer import draw_bboxes
+    from .runtime import load_runtime_config, runtime_diagnostics
+    from .tiling import scale_boxes
+    from .voting import detect_frames, vote_detections
+
+    load_runtime_config().apply_inference()  # Before the model loads torch; pins this process to inference_cpus
+    detector = Detector(model_path, use_registry=True)  # Lane front-ends follow the active model
+    print(f"Inference process runtime: {runtime_diagnostics()}")
+    detector.watch_registry()  # Swaps models between requests without restarting the process
+    frames = FrameRing(slots, shape, name=frame_ring_name)
+    annotated = FrameRing(slots, result_shape, name=result_ring_name)
+    try:
+        while True:
+            request = requests.recv()
+            if request is None:
+                break
+            slot, size = request
+            start_time = time.time()
+            if isinstance(slot, tuple):
+                group = [frames.slot(i, frame_size) for i, frame_size in zip(slot, size)]
+                slot, frame = slot[-1], group[-1]
+                boxes, confidences, class_ids = vote_detections(detect_frames(detector, group))
+            else:
+                frame = frames.slot(slot, size)
+                boxes, confidences, class_ids = detector.detect(frame)
+            view = annotated.slot(slot)
+            boxes = scale_boxes(boxes, frame.shape, view.shape)
+            detected_products = products_from_detections(boxes, confidences, class_ids, catalog)
+            view[:] = cv2.resize(frame, (view.shape[1], view.shape[0]))
+            draw_bboxes(view, boxes, class_ids, catalog)
+            results.send((slot, detected_products, time.time() - start_time))
+    finally:
+        frames.close()
+        annotated.close()
+
+
+class InferenceProcess:
+    """
+    Runs the detector in a separate process so the model's CPU load and crashes stay
+    out of the GUI. Frames and annotated results travel through two shared-memory
+    rings; only slot indices and the small product lists cross the pipes.
+    """
+
+    def __init__(self, model_path, catalog, slots=RING_SLOTS, shape=SLOT_SHAPE):
+        """shape is the largest frame stored at full resolution: the camera's capture size."""
+        self.model_path = model_path
+        self.catalog = catalog
+        self.frames = FrameRing(slots, shape)
+        self.annotated = FrameRing(slots, RESULT_SHAPE)
+        self._closing = False
+        self.start()
+
+    def start(self):
+        """Starts (or restarts) the worker process with every slot free."""
+        context = mp.get_context("spawn")  # Never fork a process that already runs Qt threads
+        child_requests, self._requests = context.Pipe(duplex=False)  # Pipe(duplex=False) is (receiver, sender)
+        self._results, child_results = context.Pipe(duplex=False)
+        self.free_slots = deque(range(self.frames.slots))
+        self._groups = {}  # Result slot of a voting scan -> the other slots its frames occupy
+        self.process = context.Process(
+            target=inference_worker,
+            args=(self.model_path, self.catalog, self.frames.name, self.annotated.name,
+                  self.frames.slots, self.frames.shape, self.annotated.shape, child_requests, child_results),
+            daemon=True,
+        )
+        self.process.start()
+
+        # Keep only our ends open, so a dead worker shows up as EOF in receive()
+        child_requests.close()
+        child_results.close()
+
+    def restart(self):
+        """Replaces a crashed worker."""
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+        self._requests.close()
+        self._results.close()
+        self.start()
+
+    def submit(self, frame):
+        """Copies a frame into a free slot and queues it. Returns the slot index, or None if all slots are busy."""
+        if not self.free_slots:
+            return None
+        slot = self.free_slots.popleft()
+        size = self.frames.write(slot, frame)
+        self._requests.send((slot, size))
+        return slot
+
+    def submit_many(self, frames):
+        """Queues frames as one voting scan. Returns the result slot, or None if there aren't enough free slots."""
+        if len(self.free_slots) < len(frames):
+            return None
+        group = tuple(self.free_slots.popleft() for _ in frames)
+        sizes = [self.frames.write(slot, frame) for slot, frame in zip(group, frames)]
+        self._groups[group[-1]] = group[:-1]
+        self._requests.send((group, sizes))
+        return group[-1]
+
+    def receive(self):
+        """Blocks for the next (slot, detected_products, detection_time). Returns None once closed."""
+        try:
+            return self._results.recv()
+        except (EOFError, OSError):
+            if self._closing:
+                return None
+            raise
+
+    def annotated_frame(self, slot):
+        """View of the annotated result in a slot; valid until release(slot)."""
+        return self.annotated.slot(slot)
+
+    def release(self, slot):
+        """Returns a slot (and the rest of its voting scan) to the pool once its result has been displayed."""
+        self.free_slots.extend(self._groups.pop(slot, ()))
+        self.free_slots.append(slot)
+
+    def close(self):
+        self._closing = True
+        try:
+            self._requests.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self._results.close()
+        self.frames.close()
+        self.annotated.close()
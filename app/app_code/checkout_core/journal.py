@@ -0,0 +1,207 @@
+import csv
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+# ===== JOURNAL CONFIGURATION =====
+JOURNAL_FILE = "transactions.sqlite"    # Relative to the repository root
+POS_EXPORT_FILE = "detected_products.txt"  # One barcode per counted unit of the last checkout, read by the POS
+FLUSH_INTERVAL = 0.2                    # Seconds the writer waits to group checkouts into one fsynced commit
+MAX_COMMIT_BATCH = 256                  # Checkouts per commit at most
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp REAL NOT NULL,
+        lane TEXT,
+        units INTEGER NOT NULL,
+        scans INTEGER NOT NULL,
+        scan_latency REAL NOT NULL,
+        exported INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS items (
+        transaction_id INTEGER NOT NULL REFERENCES transactions(id),
+        class_id INTEGER,
+        name TEXT,
+        barcode TEXT,
+        count INTEGER NOT NULL,
+        mean_confidence REAL,
+        min_confidence REAL
+    );
+    CREATE INDEX IF NOT EXISTS idx_items_transaction ON items(transaction_id);
+    CREATE INDEX IF NOT EXISTS idx_transactions_exported ON transactions(exported, id);
+"""
+
+
+def write_atomic(path, text):
+    """Writes a file through a temporary copy, fsynced before it replaces the old one."""
+    tmp_file = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_file, mode='w') as file:
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_file, path)
+
+
+def connect_journal(db_file=JOURNAL_FILE):
+    """Opens the journal in WAL mode, creating the tables on first use."""
+    connection = sqlite3.connect(db_file)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=FULL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def snapshot_cart(cart):
+    """Copies what the journal needs out of a Cart, so the cart can be cleared right away."""
+    items = []
+    for class_id, product in cart.products.items():
+        confidences = product.get("confidences") or [product.get("confidence", 0.0)]
+        items.append((
+            class_id, product.get("name"), product.get("barcode", "N/A"), product.get("count", 1),
+            sum(confidences) / len(confidences), min(confidences),
+        ))
+    return items, list(cart.scan_times)
+
+
+class TransactionJournal:
+    """
+    Append-only checkout log in SQLite (WAL mode). record() only snapshots the cart and
+    queues it; a writer thread groups queued checkouts into one commit, fsynced by
+    synchronous=FULL, and then writes the POS export file.
+    """
+
+    def __init__(self, db_file=JOURNAL_FILE, flush_interval=FLUSH_INTERVAL):
+        self.db_file = db_file
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        connection = connect_journal(self.db_file)  # Create the schema up front so readers never see an empty file
+        connection.close()
+        self._thread = threading.Thread(target=self._run, name="TransactionJournal", daemon=True)
+        self._thread.start()
+
+    def record(self, cart, lane=None, export_file=None):
+        """
+        Queues a finished checkout. Returns a Future resolving to the transaction id once
+        the commit is on disk. If export_file is given, it is rewritten with the barcodes
+        for the POS after the commit.
+        """
+        items, scan_times = snapshot_cart(cart)
+        future = Future()
+        self.queue.put((time.time(), lane, items, scan_times, cart.barcodes(), export_file, future))
+        return future
+
+    def _collect(self):
+        """Blocks for the first checkout, then gathers whatever arrives within flush_interval."""
+        batch = [self.queue.get()]
+        deadline = time.perf_counter() + self.flush_interval
+        while batch[-1] is not None and len(batch) < MAX_COMMIT_BATCH:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        connection = connect_journal(self.db_file)
+        try:
+            while True:
+                batch = self._collect()
+                closing = batch[-1] is None
+                entries = [entry for entry in batch if entry is not None]
+                try:
+                    self._write(connection, entries)
+                except Exception as e:  # Never let the writer die: later checkouts would wait forever
+                    print(f"Error: journal writer failed on {len(entries)} transaction(s): {e}")
+                    for entry in entries:
+                        if not entry[-1].done():
+                            entry[-1].set_exception(e)
+                if closing:
+                    break
+        finally:
+            connection.close()
+
+    def _write(self, connection, entries):
+        """Commits one batch, writes the POS export files and resolves the batch's futures."""
+        try:
+            ids = self._commit(connection, entries)
+        except Exception as e:
+            print(f"Error: could not write {len(entries)} transaction(s) to {self.db_file}: {e}")
+            for entry in entries:
+                entry[-1].set_exception(e)
+            return
+
+        # The POS file holds the latest checkout, so only the newest entry per file is written
+        exports = {entry[5]: entry[4] for entry in entries if entry[5]}
+        failed = {}
+        for export_file, barcodes in exports.items():
+            try:
+                write_atomic(export_file, "".join(f"{barcode}\n" for barcode in barcodes))
+            except OSError as e:
+                print(f"Error: could not write the POS file {export_file}: {e}")
+                failed[export_file] = e
+        for transaction_id, entry in zip(ids, entries):
+            if entry[5] in failed:
+                # Journaled, but the POS never got it: report it so the cashier doesn't assume it did
+                entry[-1].set_exception(OSError(f"Transaction {transaction_id} was journaled, but {entry[5]} "
+                                                f"could not be written: {failed[entry[5]]}"))
+            else:
+                entry[-1].set_result(transaction_id)
+
+    def _commit(self, connection, entries):
+        ids = []
+        with connection:  # One transaction (and one fsync) for the whole batch
+            for timestamp, lane, items, scan_times, _, _, _ in entries:
+                cursor = connection.execute(
+                    "INSERT INTO transactions (timestamp, lane, units, scans, scan_latency) VALUES (?, ?, ?, ?, ?)",
+                    (timestamp, lane, sum(item[3] for item in items), len(scan_times), sum(scan_times)),
+                )
+                ids.append(cursor.lastrowid)
+                connection.executemany(
+                    "INSERT INTO items VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(cursor.lastrowid, *item) for item in items],
+                )
+        return ids
+
+    def close(self):
+        """Flushes queued checkouts and stops the writer thread."""
+        self.queue.put(None)
+        self._thread.join()
+
+
+def export_pending(csv_file, db_file=JOURNAL_FILE):
+    """
+    Appends every transaction not yet exported to a POS CSV (one row per item) and
+    marks them exported. Returns the number of transactions written.
+    """
+    connection = connect_journal(db_file)  # WAL lets this run while a lane's writer thread keeps committing
+    try:
+        with connection:
+            ids = [row[0] for row in connection.execute("SELECT id FROM transactions WHERE exported = 0 ORDER BY id")]
+            if not ids:
+                return 0
+            rows = connection.execute("""
+                SELECT t.id, t.timestamp, t.lane, i.barcode, i.name, i.count, i.mean_confidence
+                FROM transactions t JOIN items i ON i.transaction_id = t.id
+                WHERE t.exported = 0 AND t.id <= ? ORDER BY t.id
+            """, (ids[-1],)).fetchall()
+            new_file = not os.path.exists(csv_file)
+            with open(csv_file, mode='a', newline='') as file:
+                writer = csv.writer(file)
+                if new_file:
+                    writer.writerow(["transaction_id", "timestamp", "lane", "barcode", "name", "count", "confidence"])
+                for transaction_id, timestamp, lane, barcode, name, count, confidence in rows:
+                    stamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(timestamp))
+                    writer.writerow([transaction_id, stamp, lane or "", barcode, name, count, f"{confidence:.3f}"])
+                file.flush()
+                os.fsync(file.fileno())
+            connection.executemany("UPDATE transactions SET exported = 1 WHERE id = ?", [(i,) for i in ids])
+    finally:
+        connection.close()
+    return len(ids)
@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+# ===== REGISTRY CONFIGURATION =====
+MODELS_DIR = "app/models"                   # Relative to the repository root
+ACTIVE_MODEL_FILE = "active.json"           # {"model": "<file name in MODELS_DIR>"} picks the serving model
+EXPORT_MANIFEST_FILE = "export_manifest.json"  # Written by training_and_dataset_code/export_models.py
+WATCH_INTERVAL = 5.0                        # Seconds between checks of the active model pointer
+WARMUP_RUNS = 2
+DEFAULT_IMGSZ = 640
+
+# Weight formats Ultralytics can load, by suffix
+MODEL_BACKENDS = {
+    ".pt": "pytorch",
+    ".torchscript": "torchscript",
+    ".onnx": "onnx",
+    ".engine": "tensorrt",
+    "_openvino_model": "openvino",  # Directory produced by model.export(format="openvino")
+}
+
+
+def model_backend(path):
+    """Returns the backend name for a weights file or export directory, or None if it isn't a model."""
+    for suffix, backend in MODEL_BACKENDS.items():
+        if path.endswith(suffix):
+            return backend
+    return None
+
+
+def load_model(model_path):
+    """Loads weights with Ultralytics (imported lazily so catalog-only tools never load torch)."""
+    from ultralytics import YOLO
+    from .torch_fast_path import TORCH_FAST_PATH, fast_path
+    model = YOLO(model_path)
+    if TORCH_FAST_PATH and model_backend(model_path) == "pytorch":
+        from .policy import load_detection_policy
+        model = fast_path(model, **load_detection_policy().predict_kwargs())
+    return model
+
+
+def warm_up(model, imgsz=DEFAULT_IMGSZ):
+    """Runs a few blank frames so the first real scan doesn't pay for lazy initialisation."""
+    blank = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+    for _ in range(WARMUP_RUNS):
+        model(blank, imgsz=imgsz, verbose=False)
+
+
+class ModelRegistry:
+    """
+    Models available in app/models with their metadata, plus the active-model pointer.
+    Metadata comes from an optional sidecar `<model file>.json` with class_map, imgsz and
+    backend. Without one, the backend is taken from the file name, imgsz is DEFAULT_IMGSZ
+    and class_map is None (the model's own class names apply).
+    """
+
+    def __init__(self, models_dir=MODELS_DIR):
+        self.models_dir = models_dir
+        self.active_file = os.path.join(models_dir, ACTIVE_MODEL_FILE)
+
+    def model_info(self, name):
+        """Metadata of one model in the registry."""
+        path = os.path.join(self.models_dir, name)
+        info = {
+            "name": name,
+            "path": path,
+            "backend": model_backend(name),
+            "imgsz": DEFAULT_IMGSZ,
+            "class_map": None,
+            "modified": os.path.getmtime(path),
+        }
+        sidecar = path + ".json"
+        if os.path.exists(sidecar):
+            with open(sidecar, mode='r') as file:
+                info.update(json.load(file))
+        return info
+
+    def list_models(self):
+        """All models in the registry, newest first."""
+        if not os.path.isdir(self.models_dir):
+            return []
+        names = [name for name in os.listdir(self.models_dir) if model_backend(name)]
+        return sorted((self.model_info(name) for name in names), key=lambda info: info["modified"], reverse=True)
+
+    def active_model(self):
+        """Name of the model the pointer file selects, or None."""
+        try:
+            with open(self.active_file, mode='r') as file:
+                return json.load(file).get("model")
+        except (OSError, ValueError):
+            return None
+
+    def resolve(self, default_path):
+        """Path of the active model, falling back to the front-end's default."""
+        name = self.active_model()
+        if name and os.path.exists(os.path.join(self.models_dir, name)):
+            return os.path.join(self.models_dir, name)
+        return default_path
+
+    def set_active(self, name):
+        """Points the registry at another model; running lanes pick it up on their next poll."""
+        if not os.path.exists(os.path.join(self.models_dir, name)):
+            raise FileNotFoundError(f"No model named {name} in {self.models_dir}")
+        tmp_file = self.active_file + ".tmp"
+        with open(tmp_file, mode='w') as file:
+            json.dump({"model": name, "activated": time.strftime("%Y-%m-%dT%H:%M:%S")}, file)
+        os.replace(tmp_file, self.active_file)  # Readers never see a half-written pointer
+
+    def input_size(self, model_path):
+        """imgsz recorded for a model (sidecar metadata), or DEFAULT_IMGSZ for models outside the registry."""
+        name = os.path.basename(model_path)
+        return self.model_info(name)["imgsz"] if os.path.exists(os.path.join(self.models_dir, name)) else DEFAULT_IMGSZ
+
+    def fixed_input_size(self, model_path):
+        """imgsz an exported artifact was built for, or None for .pt weights that take any size."""
+        return None if model_backend(model_path) in (None, "pytorch") else self.input_size(model_path)
+
+    def fastest_valid(self):
+        """Name of the fastest exported artifact that passed the parity check, or None without a manifest."""
+        try:
+            with open(os.path.join(self.models_dir, EXPORT_MANIFEST_FILE), mode='r') as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            return None
+        valid = [artifact for artifact in manifest.get("artifacts", [])
+                 if artifact.get("valid") and not artifact.get("reference") and os.path.exists(os.path.join(self.models_dir, artifact["name"]))]
+        return min(valid, key=lambda artifact: artifact["latency_ms"])["name"] if valid else None
+
+    def load_warm(self, model_path):
+        """Loads and warms up a model. Blocking; meant for a background thread."""
+        model = load_model(model_path)
+        warm_up(model, self.input_size(model_path))
+        return model
+
+    def watch(self, detector, interval=WATCH_INTERVAL):
+        """
+        Starts a daemon thread that follows the active-model pointer. When it changes, the
+        new model is loaded and warmed in the background while the old one keeps serving,
+        then swapped into the detector between scans.
+        """
+        def run():
+            failed_path = None  # Don't retry a broken model until the pointer moves on
+            while True:
+                time.sleep(interval)
+                model_path = self.resolve(detector.model_path)
+                if model_path == failed_path or os.path.abspath(model_path) == os.path.abspath(detector.model_path):
+                    continue
+                print(f"Loading model {model_path} in the background...")
+                try:
+                    model = self.load_warm(model_path)
+                except Exception as e:
+                    print(f"Model {model_path} failed to load, keeping {detector.model_path}: {e}")
+                    failed_path = model_path
+                    continue
+                detector.swap_model(model, model_path)
+                print(f"Now serving {model_path}")
+
+        thread = threading.Thread(target=run, name="ModelWatcher", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,81 @@
+import os
+import numpy as np
+import yaml
+
+# Policy file shared by every entry point (paths are relative to the repository root)
+DETECTION_POLICY_FILE = "app/config/detection_policy.yaml"
+
+
+class DetectionPolicy:
+    """Confidence/IoU thresholds, allowed classes and box limit applied to every inference call."""
+
+    def __init__(self, conf=0.25, iou=0.7, max_det=300, classes=None, class_conf=None, confusable_groups=None):
+        self.conf = float(conf)
+        self.iou = float(iou)
+        self.max_det = int(max_det)
+        self.classes = sorted(int(c) for c in classes) if classes is not None else None
+        self.class_conf = {int(k): float(v) for k, v in (class_conf or {}).items()}
+        self.confusable_groups = [[int(c) for c in group] for group in (confusable_groups or [])]  # See crop_classifier.py
+
+        # Lookup table so per-class thresholds are applied in one vectorized step
+        size = max(self.class_conf, default=-1) + 1
+        self._thresholds = np.full(size, self.conf, dtype=np.float32)
+        for class_id, threshold in self.class_conf.items():
+            self._thresholds[class_id] = threshold
+
+    def predict_kwargs(self):
+        """Keyword arguments for the Ultralytics model call."""
+        # The model only takes one global threshold, so pass the loosest one and let filter() finish the job
+        return {
+            "conf": min([self.conf, *self.class_conf.values()]),
+            "iou": self.iou,
+            "classes": self.classes,
+            "max_det": self.max_det,
+        }
+
+    def threshold_for(self, class_id):
+        """Returns the confidence threshold of one class."""
+        return self.class_conf.get(int(class_id), self.conf)
+
+    def filter(self, boxes, confidences, class_ids):
+        """Applies per-class thresholds, the class allow-list and max_det to detections already produced."""
+        confidences = np.asarray(confidences)
+        class_ids = np.asarray(class_ids).astype(int)
+        if len(confidences) == 0:
+            return boxes, confidences, class_ids
+
+        # Classes without an override fall back to the global threshold
+        thresholds = np.full(len(class_ids), self.conf, dtype=np.float32)
+        in_table = class_ids < len(self._thresholds)
+        thresholds[in_table] = self._thresholds[class_ids[in_table]]
+        keep = confidences >= thresholds
+        if self.classes is not None:
+            keep &= np.isin(class_ids, self.classes)
+
+        keep = np.nonzero(keep)[0]
+        if len(keep) > self.max_det:
+            keep = keep[np.argsort(-confidences[keep], kind="stable")[:self.max_det]]
+        return np.asarray(boxes)[keep], confidences[keep], class_ids[keep]
+
+
+def load_detection_policy(policy_file=DETECTION_POLICY_FILE, root=""):
+    """
+    Loads the detection policy from YAML, falling back to the defaults if the file is missing.
+    Relative paths (policy_file and its thresholds_file) are taken from root, the repo root.
+    """
+    policy_file = os.path.join(root, policy_file)
+    if not os.path.exists(policy_file):
+        print(f"Warning: {policy_file} not found. Using default detection policy.")
+        return DetectionPolicy()
+    with open(policy_file, mode='r') as file:
+        config = yaml.safe_load(file) or {}
+
+    # Thresholds tuned on validation data (tune_thresholds.py) take precedence once they exist
+    thresholds_file = config.pop("thresholds_file", None)
+    if thresholds_file:
+        thresholds_file = os.path.join(root, thresholds_file)
+    if thresholds_file and os.path.exists(thresholds_file):
+        with open(thresholds_file, mode='r') as file:
+            tuned = yaml.safe_load(file) or {}
+        config.update({key: tuned[key] for key in ("conf", "iou", "class_conf") if key in tuned})
+    return DetectionPolicy(**config)
@@ -0,0 +1,77 @@
+import copy
+
+# Pruned checkpoints pickle C2fSplit by this module path, so anything that loads one
+# (the app, export_models.py) needs app/app_code on sys.path, as all of them already have.
+# torch is only imported when C2fSplit is first looked up (unpickling goes through the
+# module __getattr__ below too), so importing checkout_core never loads it.
+
+
+def split_conv(conv, channels):
+    """Splits an Ultralytics Conv (conv + BN) into two Convs producing the first `channels` outputs and the rest."""
+    from torch import nn
+
+    parts = []
+    for rows in (slice(0, channels), slice(channels, None)):
+        part = copy.deepcopy(conv)
+        part.conv.weight = nn.Parameter(conv.conv.weight.data[rows].clone())
+        part.conv.out_channels = part.conv.weight.shape[0]
+        part.bn.weight = nn.Parameter(conv.bn.weight.data[rows].clone())
+        part.bn.bias = nn.Parameter(conv.bn.bias.data[rows].clone())
+        part.bn.running_mean = conv.bn.running_mean[rows].clone()
+        part.bn.running_var = conv.bn.running_var[rows].clone()
+        part.bn.num_features = part.conv.out_channels
+        parts.append(part)
+    return parts
+
+
+def _c2f_split_class():
+    """The C2fSplit module class, defined on first use."""
+    if "C2fSplit" not in globals():
+        import torch
+        from torch import nn
+
+        class C2fSplit(nn.Module):
+            """
+            Ultralytics C2f with its first Conv split in two instead of chunking one output.
+            Same weights and outputs, but each half can lose a different number of channels
+            when pruned, which torch.chunk would not allow.
+            """
+
+            def __init__(self, c2f):
+                super().__init__()
+                self.cv0, self.cv1 = split_conv(c2f.cv1, c2f.c)
+                self.cv2 = c2f.cv2
+                self.m = c2f.m
+                for attr in ("f", "i", "type", "np"):  # Layer bookkeeping Ultralytics' forward pass relies on
+                    if hasattr(c2f, attr):
+                        setattr(self, attr, getattr(c2f, attr))
+
+            def forward(self, x):
+                y = [self.cv0(x), self.cv1(x)]
+                y.extend(m(y[-1]) for m in self.m)
+                return self.cv2(torch.cat(y, 1))
+
+        C2fSplit.__qualname__ = "C2fSplit"  # Pickled as checkout_core.pruning.C2fSplit
+        globals()["C2fSplit"] = C2fSplit
+    return globals()["C2fSplit"]
+
+
+def __getattr__(name):
+    if name == "C2fSplit":
+        return _c2f_split_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def split_c2f_blocks(module):
+    """Replaces every C2f in a model with an equivalent C2fSplit, in place. Returns how many were replaced."""
+    from ultralytics.nn.modules import C2f
+
+    C2fSplit = _c2f_split_class()
+    replaced = 0
+    for name, child in module.named_children():
+        if isinstance(child, C2f):
+            setattr(module, name, C2fSplit(child))
+            replaced += 1
+        else:
+            replaced += split_c2f_blocks(child)
+    return replaced
@@ -0,0 +1,82 @@
+import cv2
+import numpy as np
+
+from .catalog import class_color
+
+DISPLAY_SIZE = (960, 720)  # (width, height) of the detected image view
+FILL_ALPHA = 0.15          # Opacity of the box fill
+
+# Detection time thresholds (seconds) for the green/orange/red indicator
+LATENCY_OK = 1
+LATENCY_SLOW = 3
+
+
+def draw_bboxes(frame, boxes, class_ids, catalog):
+    """Draws bounding boxes with Roboflow-like design on an RGB frame (in place)."""
+    height, width = frame.shape[:2]
+    for box, class_id in zip(boxes, class_ids):
+        x_min, y_min, x_max, y_max = map(int, box)
+        color = class_color(int(class_id))
+        product = catalog.get(int(class_id))
+        label = product.label if product else f"Product {class_id} (Unknown)"  # Precomputed by the catalog
+
+        # Semi-transparent fill, blended only inside the box instead of over a full-frame copy
+        x0, y0 = max(x_min, 0), max(y_min, 0)
+        x1, y1 = min(x_max + 1, width), min(y_max + 1, height)
+        if x1 > x0 and y1 > y0:
+            roi = frame[y0:y1, x0:x1]
+            fill = np.empty_like(roi)
+            fill[:] = color
+            frame[y0:y1, x0:x1] = cv2.addWeighted(fill, FILL_ALPHA, roi, 1 - FILL_ALPHA, 0)
+
+        # Draw bounding box
+        cv2.rectangle(frame, (x_min, y_min), (x_max, y_max), color, thickness=2)
+
+        # Add Label with white text on a colored background
+        text_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)[0]
+        text_x = x_min + 5  # Padding from the left
+        text_y = y_min - 5  # Padding above the bounding box
+        cv2.rectangle(frame, (text_x - 2, text_y - text_size[1] - 2), (text_x + text_size[0] + 2, text_y + 2), color, -1)
+        cv2.putText(frame, label, (text_x, text_y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)  # White text
+
+    return frame
+
+
+def latency_color(detection_time):
+    """Returns the indicator color for a detection time."""
+    if detection_time <= LATENCY_OK:
+        return (49, 96, 61)  # deepGreen
+    elif detection_time <= LATENCY_SLOW:
+        return (255, 167, 79)  # kindaOrange
+    return (210, 61, 45)  # AlmostRed
+
+
+def draw_detection_time_bar(frame, detection_time):
+    """Draws a wide detection-time bar along the bottom of the frame."""
+    bar_height = 40
+    bar_width = int(frame.shape[1] * 0.8)  # 80% of the frame width
+    bar_x = (frame.shape[1] - bar_width) // 2
+    bar_y = frame.shape[0] - bar_height  # Position at the bottom
+    cv2.rectangle(frame, (bar_x, bar_y), (bar_x + bar_width, bar_y + bar_height), latency_color(detection_time), -1)
+
+    # Add text indicating the detection time
+    text = f"Detection Time: {detection_time:.2f} sec"
+    text_size = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)[0]
+    text_x = bar_x + (bar_width - text_size[0]) // 2
+    text_y = bar_y + (bar_height + text_size[1]) // 2  # Center text vertically within the bar
+    cv2.putText(frame, text, (text_x, text_y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+    return frame
+
+
+def draw_detection_time_badge(frame, detection_time):
+    """Draws a small detection-time indicator in the top-left corner of the frame."""
+    bar_size = 40
+    bar_x = bar_y = 20
+    cv2.rectangle(frame, (bar_x, bar_y), (bar_x + bar_size, bar_y + bar_size), latency_color(detection_time), -1)
+
+    text = f" {detection_time:.2f} sec"
+    text_size = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)[0]
+    text_x = 40 + (text_size[0] // 2)
+    text_y = 40 + (text_size[1] // 2)
+    cv2.putText(frame, text, (text_x, text_y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (105, 105, 105), 2)
+    return frame
@@ -0,0 +1,105 @@
+import os
+import sys
+
+import cv2
+import yaml
+
+# Runtime file shared by every entry point (paths are relative to the repository root)
+RUNTIME_CONFIG_FILE = "app/config/runtime.yaml"
+
+# Environment variables that size the OpenMP/BLAS pools; read once when torch loads
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+class RuntimeConfig:
+    """Thread pool sizes and CPU affinity for torch, OpenCV, OpenMP/MKL and Qt."""
+
+    def __init__(self, torch_threads=None, torch_interop_threads=None, opencv_threads=None, omp_threads=None,
+                 qt_threads=None, inference_cpus=None, ui_cpus=None):
+        self.torch_threads = torch_threads
+        self.torch_interop_threads = torch_interop_threads
+        self.opencv_threads = opencv_threads
+        self.omp_threads = omp_threads
+        self.qt_threads = qt_threads
+        self.inference_cpus = sorted(int(cpu) for cpu in inference_cpus) if inference_cpus else None
+        self.ui_cpus = sorted(int(cpu) for cpu in ui_cpus) if ui_cpus else None
+
+    def apply_environment(self):
+        """Sets the OpenMP/MKL pool sizes. Must run before torch is imported (child processes inherit it)."""
+        if self.omp_threads is not None:
+            for name in THREAD_ENV_VARS:
+                os.environ[name] = str(self.omp_threads)
+
+    def apply_inference(self, pin=True):
+        """Sizes the torch and OpenCV pools for the process that runs the model, and pins it to inference_cpus."""
+        self.apply_environment()
+        import torch
+        if self.torch_threads is not None:
+            torch.set_num_threads(self.torch_threads)
+        if self.torch_interop_threads is not None:
+            try:
+                torch.set_num_interop_threads(self.torch_interop_threads)
+            except RuntimeError:
+                pass  # Only settable before the first parallel op; the earlier setting stays
+        if self.opencv_threads is not None:
+            cv2.setNumThreads(self.opencv_threads)
+        if pin:
+            set_affinity(self.inference_cpus)
+
+    def apply_ui(self):
+        """Sizes the OpenCV pool for the capture/preview process and pins it to ui_cpus."""
+        self.apply_environment()
+        if self.opencv_threads is not None:
+            cv2.setNumThreads(self.opencv_threads)
+        set_affinity(self.ui_cpus)
+
+
+def set_affinity(cpus):
+    """Pins the current process (and the threads it starts afterwards) to the given cores."""
+    if not cpus:
+        return
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+        return
+    try:
+        import psutil
+    except ImportError:
+        print("Warning: CPU affinity needs psutil on this platform. Install it with `pip install psutil`.")
+        return
+    psutil.Process().cpu_affinity(cpus)
+
+
+def get_affinity():
+    """Cores the current process may run on, or None if the platform can't tell."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    try:
+        import psutil
+        return psutil.Process().cpu_affinity()
+    except (ImportError, AttributeError):
+        return None
+
+
+def runtime_diagnostics():
+    """Effective thread pool sizes and affinity of the current process."""
+    info = {
+        "cpu_count": os.cpu_count(),
+        "affinity": get_affinity(),
+        "opencv_threads": cv2.getNumThreads(),
+        "env": {name: os.environ.get(name) for name in THREAD_ENV_VARS},
+    }
+    if "torch" in sys.modules:  # Don't load torch just to report on it
+        torch = sys.modules["torch"]
+        info["torch_threads"] = torch.get_num_threads()
+        info["torch_interop_threads"] = torch.get_num_interop_threads()
+    return info
+
+
+def load_runtime_config(config_file=RUNTIME_CONFIG_FILE):
+    """Loads the runtime configuration from YAML, leaving every library at its default if the file is missing."""
+    if not os.path.exists(config_file):
+        print(f"Warning: {config_file} not found. Using library default thread settings.")
+        return RuntimeConfig()
+    with open(config_file, mode='r') as file:
+        config = yaml.safe_load(file) or {}
+    return RuntimeConfig(**config)
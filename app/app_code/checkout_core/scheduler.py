@@ -0,0 +1,111 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+# ===== SCHEDULER DEFAULTS =====
+MAX_BATCH_SIZE = 8     # Frames per batched forward pass
+MAX_WAIT_MS = 15       # How long the oldest frame waits for the batch to fill
+MAX_QUEUE_DEPTH = 32   # Frames waiting before submit() refuses new work
+METRICS_WINDOW = 200   # Batches kept for the rolling metrics
+
+
+class InferenceScheduler:
+    """
+    Collects frames from several producers (lanes, cameras, HTTP requests) and runs
+    them through the detector as one batch once max_batch_size frames are waiting
+    or the oldest frame has waited max_wait_ms. Each caller gets its own Future.
+    """
+
+    def __init__(self, detector, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS,
+                 max_queue_depth=MAX_QUEUE_DEPTH):
+        self.detector = detector
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.queue = queue.Queue(maxsize=max_queue_depth)
+        self.frames = 0
+        self.batches = 0
+        self._history = deque(maxlen=METRICS_WINDOW)  # (batch size, oldest wait ms, inference ms)
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="InferenceScheduler", daemon=True)
+        self._thread.start()
+
+    @property
+    def model_path(self):
+        return self.detector.model_path
+
+    def submit(self, frame, callback=None, use_cache=True):
+        """
+        Queues a frame and returns a Future resolving to (boxes, confidences, class_ids).
+        The optional callback receives the finished Future on the scheduler thread (e.g. to emit a Qt signal).
+        use_cache=False skips the detector's repeat-scan cache for this frame.
+        Raises queue.Full when max_queue_depth frames are already waiting.
+        """
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+        self.queue.put_nowait((frame, future, time.perf_counter(), use_cache))
+        return future
+
+    def detect(self, frame, use_cache=True):
+        """Blocking call with the same signature as Detector.detect, so callers can use either."""
+        return self.submit(frame, use_cache=use_cache).result()
+
+    def _collect(self):
+        """Blocks for the first frame, then gathers more until the batch is full or the wait budget is spent."""
+        batch = [self.queue.get()]
+        deadline = batch[0][2] + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            start = time.perf_counter()
+            wait_ms = (start - batch[0][2]) * 1000
+            try:
+                results = self.detector.detect_batch([item[0] for item in batch], use_cache=[item[3] for item in batch])
+            except Exception as e:
+                for _, future, _, _ in batch:
+                    future.set_exception(e)
+                continue
+            inference_ms = (time.perf_counter() - start) * 1000
+
+            with self._lock:
+                self.frames += len(batch)
+                self.batches += 1
+                self._history.append((len(batch), wait_ms, inference_ms))
+
+            for (_, future, _, _), result in zip(batch, results):
+                future.set_result(result)
+
+    def metrics(self):
+        """Queue depth, batch size and wait/inference time statistics over the recent batches."""
+        with self._lock:
+            history = np.array(self._history, dtype=np.float64).reshape(-1, 3)
+            metrics = {
+                "queue_depth": self.queue.qsize(),
+                "frames": self.frames,
+                "batches": self.batches,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+            }
+        if len(history):
+            metrics.update({
+                "mean_batch_size": float(history[:, 0].mean()),
+                "mean_wait_ms": float(history[:, 1].mean()),
+                "p95_wait_ms": float(np.percentile(history[:, 1], 95)),
+                "mean_inference_ms": float(history[:, 2].mean()),
+                "mean_inference_ms_per_frame": float(history[:, 2].sum() / history[:, 0].sum()),
+            })
+        return metrics
@@ -0,0 +1,159 @@
+import numpy as np
+
+# ===== TILING CONFIGURATION =====
+TILING_MODE = "auto"            # "off", "always" or "auto" (tile only when the full-frame pass looks crowded)
+TILE_SIZE = 640                 # Tile width/height in pixels of the full-resolution frame
+TILE_OVERLAP = 0.2              # Fraction of the tile shared with its neighbour
+TILE_INCLUDE_FULL_FRAME = True  # Add the whole frame to the tile batch so large products are not cut up
+TILE_MERGE_IOU = 0.5            # Overlap above which two same-class boxes are treated as one product
+TILE_MATCH_METRIC = "ios"       # "ios" (intersection over smaller box) catches boxes cut at a seam, "iou" is plain NMS
+TILE_MERGE_BOXES = True         # Grow the kept box to cover the boxes it suppressed
+
+# "auto" mode heuristic
+TILE_AUTO_MIN_SCALE = 1.5           # Only tile frames whose longer side is at least this many tiles wide
+TILE_AUTO_MIN_DETECTIONS = 12       # A crowded tray: this many boxes on the full-frame pass
+TILE_AUTO_SMALL_BOX_FRACTION = 0.005  # Or any box smaller than this fraction of the frame area
+
+
+def extract_detections(result):
+    """Returns (boxes, confidences, class_ids) as NumPy arrays from one Ultralytics result."""
+    boxes = result.boxes.xyxy.cpu().numpy().astype(np.float32)
+    confidences = result.boxes.conf.cpu().numpy().astype(np.float32)
+    class_ids = result.boxes.cls.cpu().numpy().astype(int)
+    return boxes, confidences, class_ids
+
+
+def tile_origins(length, tile_size=TILE_SIZE, overlap=TILE_OVERLAP):
+    """Returns the start offsets of overlapping tiles covering one image axis."""
+    if length <= tile_size:
+        return [0]
+    step = max(1, int(tile_size * (1 - overlap)))
+    origins = list(range(0, length - tile_size, step))
+    origins.append(length - tile_size)  # Last tile is flush with the edge
+    return origins
+
+
+def make_tiles(frame, tile_size=TILE_SIZE, overlap=TILE_OVERLAP):
+    """Splits a frame into overlapping tiles. Returns (tiles, offsets) with offsets as (x, y)."""
+    height, width = frame.shape[:2]
+    tiles, offsets = [], []
+    for y in tile_origins(height, tile_size, overlap):
+        for x in tile_origins(width, tile_size, overlap):
+            tiles.append(frame[y:y + tile_size, x:x + tile_size])
+            offsets.append((x, y))
+    return tiles, offsets
+
+
+def needs_tiling(frame_shape, boxes, tile_size=TILE_SIZE):
+    """
+    Decides from a full-frame pass whether the frame is worth tiling: a crowded tray or a box
+    small enough to have lost detail. An empty pass (nothing on the scanner) is not tiled.
+    """
+    height, width = frame_shape[:2]
+    if max(height, width) < tile_size * TILE_AUTO_MIN_SCALE:
+        return False  # Downscaling such a frame loses little detail
+    if len(boxes) == 0:
+        return False
+    if len(boxes) >= TILE_AUTO_MIN_DETECTIONS:
+        return True
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return bool(areas.min() < TILE_AUTO_SMALL_BOX_FRACTION * height * width)
+
+
+def merge_detections(boxes, confidences, class_ids, iou_threshold=TILE_MERGE_IOU,
+                     metric=TILE_MATCH_METRIC, merge_boxes=TILE_MERGE_BOXES):
+    """Class-aware greedy NMS used to merge duplicate detections across tile seams."""
+    if len(boxes) == 0:
+        return boxes, confidences, class_ids
+
+    order = np.argsort(-confidences, kind="stable")
+    boxes, confidences, class_ids = boxes[order], confidences[order], class_ids[order]
+    merged = boxes.copy()
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    suppressed = np.zeros(len(boxes), dtype=bool)
+    keep = []
+
+    for i in range(len(boxes)):
+        if suppressed[i]:
+            continue
+        keep.append(i)
+
+        # Remaining candidates of the same class
+        rest = np.nonzero(~suppressed[i + 1:])[0] + i + 1
+        rest = rest[class_ids[rest] == class_ids[i]]
+        if rest.size == 0:
+            continue
+
+        inter_w = np.clip(np.minimum(boxes[i, 2], boxes[rest, 2]) - np.maximum(boxes[i, 0], boxes[rest, 0]), 0, None)
+        inter_h = np.clip(np.minimum(boxes[i, 3], boxes[rest, 3]) - np.maximum(boxes[i, 1], boxes[rest, 1]), 0, None)
+        inter = inter_w * inter_h
+        if metric == "ios":
+            overlap = inter / np.maximum(np.minimum(areas[i], areas[rest]), 1e-6)
+        else:
+            overlap = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-6)
+
+        matched = rest[overlap > iou_threshold]
+        suppressed[matched] = True
+        if merge_boxes and matched.size:
+            merged[i, :2] = np.minimum(merged[i, :2], boxes[matched, :2].min(axis=0))
+            merged[i, 2:] = np.maximum(merged[i, 2:], boxes[matched, 2:].max(axis=0))
+
+    keep = np.asarray(keep, dtype=int)
+    return merged[keep], confidences[keep], class_ids[keep]
+
+
+def scale_boxes(boxes, from_shape, to_shape):
+    """Rescales xyxy boxes from one frame size to another, e.g. full resolution to the 960x720 view."""
+    scale_x = to_shape[1] / from_shape[1]
+    scale_y = to_shape[0] / from_shape[0]
+    return boxes * np.array([scale_x, scale_y, scale_x, scale_y], dtype=np.float32)
+
+
+def tile_predict(model, frame, parts, include_full_frame, tile_size=TILE_SIZE, overlap=TILE_OVERLAP, **predict_kwargs):
+    """Runs the frame's tiles (and optionally the whole frame) as one batch and merges them with parts."""
+    batch, offsets = [], []
+    if include_full_frame:
+        batch.append(frame)
+        offsets.append((0, 0))
+    tiles, tile_offsets = make_tiles(frame, tile_size, overlap)
+    batch.extend(tiles)
+    offsets.extend(tile_offsets)
+
+    # One model call for the whole batch
+    parts = list(parts)
+    for result, (x, y) in zip(model(batch, **predict_kwargs), offsets):
+        boxes, confidences, class_ids = extract_detections(result)
+        boxes += np.array([x, y, x, y], dtype=np.float32)
+        parts.append((boxes, confidences, class_ids))
+
+    boxes = np.concatenate([p[0] for p in parts]).reshape(-1, 4)
+    confidences = np.concatenate([p[1] for p in parts])
+    class_ids = np.concatenate([p[2] for p in parts])
+    return merge_detections(boxes, confidences, class_ids)
+
+
+def sliced_predict(model, frame, mode=TILING_MODE, tile_size=TILE_SIZE, overlap=TILE_OVERLAP, **predict_kwargs):
+    """
+    Runs the detector on a full-resolution frame, tiling it when the mode asks for it.
+    All tiles go through the model as one batch. Returns (boxes, confidences, class_ids)
+    in full-resolution frame coordinates.
+    """
+    return sliced_predict_batch(model, [frame], mode, tile_size, overlap, **predict_kwargs)[0]
+
+
+def sliced_predict_batch(model, frames, mode=TILING_MODE, tile_size=TILE_SIZE, overlap=TILE_OVERLAP, **predict_kwargs):
+    """
+    sliced_predict() for several frames. The full-frame pass of every frame is one batched
+    model call; only the frames that turn out to need tiling get a second (tile) call.
+    """
+    if mode == "always":
+        return [tile_predict(model, frame, [], TILE_INCLUDE_FULL_FRAME, tile_size, overlap, **predict_kwargs)
+                for frame in frames]
+
+    full = [extract_detections(result) for result in model(list(frames), **predict_kwargs)]
+    if mode == "off":
+        return full
+    # "auto": the full-frame detections join the merge of the frames that go on to be tiled
+    return [tile_predict(model, frame, [detections], False, tile_size, overlap, **predict_kwargs)
+            if needs_tiling(frame.shape, detections[0], tile_size) else detections
+            for frame, detections in zip(frames, full)]
@@ -0,0 +1,167 @@
+import copy
+import os
+
+import cv2
+import numpy as np
+
+# ===== PYTORCH CPU FAST PATH CONFIGURATION =====
+TORCH_FAST_PATH = False         # Run .pt models through TorchFastPath instead of the generic Ultralytics predictor
+FAST_PATH_GRAPH = "trace"       # None (eager), "trace" (TorchScript at FAST_PATH_IMGSZ) or "compile" (torch.compile)
+FAST_PATH_IMGSZ = 640           # Fixed square input the graph is specialised for; other sizes run eagerly
+FAST_PATH_CHANNELS_LAST = True
+PARITY_IMAGES_DIR = "app/assets/parity"  # Sample tray photos checked at load; the fast path is dropped on a mismatch
+PARITY_IOU = 0.9                # Matching boxes must overlap at least this much
+PARITY_CONF_TOLERANCE = 0.05    # ... and differ in confidence by at most this (the predictor pads less)
+
+
+class FastBoxes:
+    """Same fields as Ultralytics' Boxes (xyxy, conf, cls as tensors), enough for extract_detections()."""
+
+    def __init__(self, detections):
+        self.xyxy = detections[:, :4]
+        self.conf = detections[:, 4]
+        self.cls = detections[:, 5]
+
+
+class FastResult:
+    def __init__(self, detections):
+        self.boxes = FastBoxes(detections)
+
+
+class TorchFastPath:
+    """
+    Callable stand-in for an Ultralytics YOLO model on CPU. Conv+BN are fused once, the
+    network runs under torch.inference_mode on channels_last tensors and, for the fixed
+    FAST_PATH_IMGSZ input, as a traced or compiled graph. Pre- and post-processing use
+    Ultralytics' own letterbox, NMS and box scaling, so results match the predictor.
+    """
+
+    def __init__(self, yolo, imgsz=FAST_PATH_IMGSZ, graph=FAST_PATH_GRAPH, channels_last=FAST_PATH_CHANNELS_LAST):
+        import torch
+        from ultralytics.nn.modules import Detect
+
+        self.torch = torch
+        self.yolo = yolo  # Kept for the parity check and anything that needs the full model object
+        self.names = yolo.names
+        self.imgsz = imgsz
+        self.memory_format = torch.channels_last if channels_last else torch.contiguous_format
+
+        model = copy.deepcopy(yolo.model).float().cpu().fuse(verbose=False).eval()  # The original keeps serving the parity check
+        for module in model.modules():
+            if isinstance(module, Detect):
+                module.export = True  # Return only the decoded predictions, not the per-level feature maps
+        self.stride = int(max(model.stride.max(), 32))
+        self.model = model.to(memory_format=self.memory_format)
+
+        self.graph = None
+        if graph:
+            example = torch.zeros(1, 3, imgsz, imgsz).to(memory_format=self.memory_format)
+            try:
+                with torch.no_grad():  # Tracing doesn't accept inference-mode tensors
+                    if graph == "trace":
+                        self.graph = torch.jit.freeze(torch.jit.trace(self.model, example, strict=False))
+                    else:
+                        self.graph = torch.compile(self.model, dynamic=False)
+                    self.graph(example)  # Compile/optimise now rather than on the first scan
+            except Exception as e:
+                print(f"Warning: {graph} failed, the fast path runs eagerly: {e}")
+                self.graph = None
+
+    def preprocess(self, frames, imgsz):
+        """Letterboxes frames to a square imgsz batch tensor, flipping channels the way the predictor does."""
+        from ultralytics.data.augment import LetterBox
+
+        letterbox = LetterBox(new_shape=(imgsz, imgsz), auto=False, stride=self.stride)
+        batch = np.stack([letterbox(image=frame) for frame in frames])[..., ::-1]  # The predictor treats arrays as BGR
+        tensor = self.torch.from_numpy(np.ascontiguousarray(batch)).permute(0, 3, 1, 2)
+        return (tensor.float() / 255).contiguous(memory_format=self.memory_format)
+
+    def __call__(self, source, conf=0.25, iou=0.7, classes=None, max_det=300, imgsz=None, agnostic_nms=False, verbose=False):
+        """
+        Runs one frame or a list of frames. Returns one result per frame, like the YOLO model call.
+        Takes only the predictor arguments it implements (verbose is accepted and ignored: it never logs).
+        """
+        from ultralytics.utils import ops
+
+        frames = source if isinstance(source, list) else [source]
+        imgsz = int(imgsz or self.imgsz)
+        imgsz = max(self.stride, imgsz // self.stride * self.stride)
+        with self.torch.inference_mode():
+            batch = self.preprocess(frames, imgsz)
+            network = self.graph if self.graph is not None and imgsz == self.imgsz else self.model
+            predictions = network(batch)
+            if isinstance(predictions, (list, tuple)):
+                predictions = predictions[0]
+            detections = ops.non_max_suppression(predictions, conf, iou, classes=classes, agnostic=agnostic_nms,
+                                                 max_det=max_det)
+
+        results = []
+        for frame, frame_detections in zip(frames, detections):
+            frame_detections[:, :4] = ops.scale_boxes((imgsz, imgsz), frame_detections[:, :4], frame.shape)
+            results.append(FastResult(frame_detections))
+        return results
+
+
+def boxes_match(reference, candidate, iou_threshold=PARITY_IOU, conf_tolerance=PARITY_CONF_TOLERANCE):
+    """True if every box of one (boxes, confidences, class_ids) set has a same-class twin in the other."""
+    from .voting import box_iou
+
+    if len(reference[0]) != len(candidate[0]):
+        return False
+    if len(reference[0]) == 0:
+        return True
+    iou = box_iou(reference[0], candidate[0])
+    iou[reference[2][:, None] != candidate[2][None, :]] = 0
+    best = iou.argmax(axis=1)
+    if len(set(best.tolist())) != len(best):
+        return False
+    return bool(np.all(iou[np.arange(len(best)), best] >= iou_threshold) and
+                np.all(np.abs(reference[1] - candidate[1][best]) <= conf_tolerance))
+
+
+def check_parity(fast_model, frames, **predict_kwargs):
+    """
+    Runs frames through the generic predictor and the fast path with the same settings.
+    Returns (matching frame count, total frames).
+    """
+    from .tiling import extract_detections
+
+    predict_kwargs = dict(predict_kwargs, imgsz=predict_kwargs.get("imgsz", fast_model.imgsz))
+    matched = 0
+    for frame in frames:
+        reference = extract_detections(fast_model.yolo(frame, verbose=False, **predict_kwargs)[0])
+        candidate = extract_detections(fast_model(frame, **predict_kwargs)[0])
+        matched += boxes_match(reference, candidate)
+    return matched, len(frames)
+
+
+def load_parity_frames(images_dir=PARITY_IMAGES_DIR):
+    """RGB sample frames for the parity check (the app scans RGB frames)."""
+    if not os.path.isdir(images_dir):
+        return []
+    frames = []
+    for name in sorted(os.listdir(images_dir)):
+        image = cv2.imread(os.path.join(images_dir, name))
+        if image is not None:
+            frames.append(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    return frames
+
+
+def fast_path(yolo, images_dir=PARITY_IMAGES_DIR, **predict_kwargs):
+    """Wraps a loaded YOLO model in TorchFastPath if its boxes still match on the parity images, else returns it as is."""
+    try:
+        fast_model = TorchFastPath(yolo)
+    except Exception as e:
+        print(f"Warning: PyTorch fast path unavailable, using the Ultralytics predictor: {e}")
+        return yolo
+    frames = load_parity_frames(images_dir)
+    if not frames:
+        print(f"Warning: no images in {images_dir}; PyTorch fast path enabled without a parity check.")
+        return fast_model
+    matched, total = check_parity(fast_model, frames, **predict_kwargs)
+    if matched < total:
+        print(f"Warning: PyTorch fast path matched {matched}/{total} parity images, using the Ultralytics predictor.")
+        return yolo
+    mode = FAST_PATH_GRAPH if fast_model.graph is not None else "eager"
+    print(f"PyTorch fast path enabled ({mode}, parity {matched}/{total}).")
+    return fast_model
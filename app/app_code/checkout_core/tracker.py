@@ -0,0 +1,143 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from .voting import box_iou
+
+# ===== TRACKING CONFIGURATION =====
+CONTINUOUS_SCAN = False  # Detect continuously and update the cart when tracked products appear or leave
+DETECT_EVERY = 5         # Camera frames between full model runs; boxes are propagated in between
+TRACK_IOU = 0.3          # Minimum IoU between a predicted track and a detection to match them
+TRACK_MIN_HITS = 3       # Detections before a track counts as a product in the cart
+TRACK_MAX_MISSES = 3     # Detection rounds a track may go unmatched before it is dropped
+
+# Constant-velocity model over (cx, cy, w, h) and their per-frame velocities
+STATE_SIZE = 8
+TRANSITION = np.eye(STATE_SIZE) + np.eye(STATE_SIZE, k=4)
+OBSERVATION = np.eye(4, STATE_SIZE)
+PROCESS_NOISE = np.diag([1.0, 1.0, 1.0, 1.0, 0.1, 0.1, 0.01, 0.01])
+MEASUREMENT_NOISE = np.diag([1.0, 1.0, 10.0, 10.0])
+INITIAL_COVARIANCE = np.diag([10.0, 10.0, 10.0, 10.0, 1000.0, 1000.0, 1000.0, 1000.0])
+
+
+def xyxy_to_state(boxes):
+    """(N, 4) xyxy boxes -> (N, 4) center/size measurements."""
+    return np.column_stack([(boxes[:, :2] + boxes[:, 2:]) / 2, boxes[:, 2:] - boxes[:, :2]])
+
+
+def state_to_xyxy(states):
+    """(N, >=4) states -> (N, 4) xyxy boxes."""
+    half = np.clip(states[:, 2:4], 1, None) / 2
+    return np.column_stack([states[:, :2] - half, states[:, :2] + half])
+
+
+class Tracker:
+    """
+    SORT-style tracker: every track is a Kalman filter over its box, and detections are
+    matched to the predicted boxes with the Hungarian algorithm on IoU. All tracks are
+    predicted and updated together as stacked NumPy arrays.
+    update() reports the products that appeared (track confirmed) and left (confirmed
+    track lost), which is all the cart needs to change.
+    """
+
+    def __init__(self, iou_threshold=TRACK_IOU, min_hits=TRACK_MIN_HITS, max_misses=TRACK_MAX_MISSES):
+        self.iou_threshold = iou_threshold
+        self.min_hits = min_hits
+        self.max_misses = max_misses
+        self.next_id = 1
+        self.states = np.zeros((0, STATE_SIZE))
+        self.covariances = np.zeros((0, STATE_SIZE, STATE_SIZE))
+        self.ids = np.zeros(0, dtype=int)
+        self.hits = np.zeros(0, dtype=int)
+        self.misses = np.zeros(0, dtype=int)
+        self.class_votes = []  # Per track: {class_id: confidence sum}
+        self.counted_class = np.zeros(0, dtype=int)  # Class the cart holds for a confirmed track, -1 before
+
+    def __len__(self):
+        return len(self.ids)
+
+    def predict(self):
+        """Advances every track by one camera frame. Returns (boxes, class_ids, track_ids) of the confirmed tracks."""
+        if len(self):
+            self.states = self.states @ TRANSITION.T
+            self.covariances = TRANSITION @ self.covariances @ TRANSITION.T + PROCESS_NOISE
+        return self.confirmed()
+
+    def confirmed(self):
+        """(boxes, class_ids, track_ids) of the tracks currently counted in the cart."""
+        mask = self.counted_class >= 0
+        return state_to_xyxy(self.states[mask]), self.counted_class[mask], self.ids[mask]
+
+    def update(self, boxes, confidences, class_ids):
+        """
+        Matches one round of detections to the tracks. Returns (appeared, left), each a list
+        of (track_id, class_id, confidence, box) for products to add to or take out of the cart.
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        confidences, class_ids = np.asarray(confidences, dtype=np.float64), np.asarray(class_ids, dtype=int)
+        predicted = state_to_xyxy(self.states)
+        iou = box_iou(predicted, boxes)
+        rows, cols = linear_sum_assignment(-iou) if iou.size else (np.zeros(0, dtype=int), np.zeros(0, dtype=int))
+        good = iou[rows, cols] >= self.iou_threshold
+        rows, cols = rows[good], cols[good]
+
+        self._correct(rows, xyxy_to_state(boxes[cols]))
+        self.hits[rows] += 1
+        self.misses += 1
+        self.misses[rows] = 0
+        for track, detection in zip(rows, cols):
+            votes = self.class_votes[track]
+            votes[int(class_ids[detection])] = votes.get(int(class_ids[detection]), 0.0) + float(confidences[detection])
+
+        unmatched = np.setdiff1d(np.arange(len(boxes)), cols)
+        self._spawn(boxes[unmatched], confidences[unmatched], class_ids[unmatched])
+
+        newly_confirmed = np.nonzero((self.hits >= self.min_hits) & (self.counted_class < 0))[0]
+        for track in newly_confirmed:
+            self.counted_class[track] = max(self.class_votes[track].items(), key=lambda vote: vote[1])[0]
+        appeared = [self._event(track) for track in newly_confirmed]
+
+        lost = self.misses > self.max_misses
+        left = [self._event(track) for track in np.nonzero(lost & (self.counted_class >= 0))[0]]
+        self._keep(~lost)
+        return appeared, left
+
+    def _event(self, track):
+        class_id = int(self.counted_class[track])
+        confidence = self.class_votes[track][class_id] / float(self.hits[track])
+        return int(self.ids[track]), class_id, confidence, state_to_xyxy(self.states[track:track + 1])[0]
+
+    def _correct(self, tracks, measurements):
+        """Kalman update of the matched tracks, all at once."""
+        if len(tracks) == 0:
+            return
+        covariances = self.covariances[tracks]
+        innovation = measurements - self.states[tracks] @ OBSERVATION.T
+        innovation_cov = OBSERVATION @ covariances @ OBSERVATION.T + MEASUREMENT_NOISE
+        gain = covariances @ OBSERVATION.T @ np.linalg.inv(innovation_cov)
+        self.states[tracks] += (gain @ innovation[:, :, None])[:, :, 0]
+        self.covariances[tracks] = (np.eye(STATE_SIZE) - gain @ OBSERVATION) @ covariances
+
+    def _keep(self, mask):
+        self.states, self.covariances = self.states[mask], self.covariances[mask]
+        self.ids, self.hits, self.misses = self.ids[mask], self.hits[mask], self.misses[mask]
+        self.counted_class = self.counted_class[mask]
+        self.class_votes = [votes for votes, keep in zip(self.class_votes, mask) if keep]
+
+    def _spawn(self, boxes, confidences, class_ids):
+        count = len(boxes)
+        if count == 0:
+            return
+        states = np.zeros((count, STATE_SIZE))
+        states[:, :4] = xyxy_to_state(boxes)
+        self.states = np.vstack([self.states, states])
+        self.covariances = np.concatenate([self.covariances, np.repeat(INITIAL_COVARIANCE[None], count, axis=0)])
+        self.ids = np.concatenate([self.ids, np.arange(self.next_id, self.next_id + count)])
+        self.next_id += count
+        self.hits = np.concatenate([self.hits, np.ones(count, dtype=int)])
+        self.misses = np.concatenate([self.misses, np.zeros(count, dtype=int)])
+        self.counted_class = np.concatenate([self.counted_class, np.full(count, -1, dtype=int)])
+        self.class_votes.extend({int(class_id): float(conf)} for class_id, conf in zip(class_ids, confidences))
+
+    def reset(self):
+        """Drops every track (new customer)."""
+        self.__init__(self.iou_threshold, self.min_hits, self.max_misses)
@@ -0,0 +1,84 @@
+import numpy as np
+
+# ===== TEMPORAL VOTING CONFIGURATION =====
+TEMPORAL_VOTING = False  # Scan the last VOTE_FRAMES captured frames as one batch and vote per object
+VOTE_FRAMES = 5          # Frames per scan (size of the capture buffer)
+VOTE_IOU = 0.4           # Minimum IoU to associate a box with an object from the earlier frames
+VOTE_MIN_FRACTION = 0.5  # An object must be seen in at least this fraction of the frames to count
+
+
+def box_iou(boxes_a, boxes_b):
+    """Pairwise IoU matrix between two sets of xyxy boxes."""
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)), dtype=np.float32)
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    inter = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    area_a = (boxes_a[:, 2:] - boxes_a[:, :2]).prod(axis=1)
+    area_b = (boxes_b[:, 2:] - boxes_b[:, :2]).prod(axis=1)
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+
+def detect_frames(detector, frames):
+    """
+    Detects on several frames with as few model calls as the detector allows. The repeat-scan
+    cache is bypassed: the frames are nearly identical, so it would hand every frame the first
+    frame's result and leave nothing to vote on.
+    """
+    if hasattr(detector, "detect_batch"):
+        return detector.detect_batch(frames, use_cache=False)
+    if hasattr(detector, "submit"):
+        futures = [detector.submit(frame, use_cache=False) for frame in frames]  # Queued together, so the scheduler batches them
+        return [future.result() for future in futures]
+    return [detector.detect(frame, use_cache=False) for frame in frames]
+
+
+def vote_detections(per_frame, iou_threshold=VOTE_IOU, min_fraction=VOTE_MIN_FRACTION):
+    """
+    Associates the detections of consecutive frames by IoU and votes on each object.
+    per_frame holds (boxes, confidences, class_ids) per frame, oldest first. Each object
+    gets the class with the largest confidence sum, that class's share of the frames as
+    its confidence, and its box from the newest frame it was seen in. Returns
+    (boxes, confidences, class_ids) in the newest frame's coordinates.
+    """
+    objects = []  # Each: {"box": latest box, "votes": {class_id: confidence sum}, "frames": count}
+    for boxes, confidences, class_ids in per_frame:
+        if len(boxes) == 0:
+            continue
+        boxes = np.asarray(boxes, dtype=np.float32)
+        iou = box_iou(np.array([obj["box"] for obj in objects], dtype=np.float32).reshape(-1, 4), boxes)
+
+        # Greedy association, best overlaps first; unmatched boxes start new objects
+        matched_objects, matched_boxes = set(), set()
+        for flat in np.argsort(-iou, axis=None):
+            obj_index, box_index = np.unravel_index(flat, iou.shape)
+            if iou[obj_index, box_index] < iou_threshold:
+                break
+            if obj_index in matched_objects or box_index in matched_boxes:
+                continue
+            matched_objects.add(obj_index)
+            matched_boxes.add(box_index)
+            obj = objects[obj_index]
+            obj["box"] = boxes[box_index]
+            obj["frames"] += 1
+            class_id = int(class_ids[box_index])
+            obj["votes"][class_id] = obj["votes"].get(class_id, 0.0) + float(confidences[box_index])
+
+        for box_index in range(len(boxes)):
+            if box_index not in matched_boxes:
+                objects.append({
+                    "box": boxes[box_index],
+                    "votes": {int(class_ids[box_index]): float(confidences[box_index])},
+                    "frames": 1,
+                })
+
+    frame_count = max(len(per_frame), 1)
+    kept = [obj for obj in objects if obj["frames"] >= min_fraction * frame_count]
+    if not kept:
+        return np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=int)
+
+    winners = [max(obj["votes"].items(), key=lambda vote: vote[1]) for obj in kept]
+    boxes = np.array([obj["box"] for obj in kept], dtype=np.float32)
+    confidences = np.array([score / frame_count for _, score in winners], dtype=np.float32)
+    class_ids = np.array([class_id for class_id, _ in winners], dtype=int)
+    return boxes, confidences, class_ids
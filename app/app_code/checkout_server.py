@@ -0,0 +1,257 @@
+import argparse
+import asyncio
+import ipaddress
+import json
+import os
+import queue
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+from urllib.parse import urlsplit, parse_qs
+
+import cv2
+import numpy as np
+
+from checkout_core.cart import Cart, products_from_detections
+from checkout_core.catalog import load_catalog
+from checkout_core.detector import Detector
+from checkout_core.journal import TransactionJournal
+from checkout_core.runtime import load_runtime_config, runtime_diagnostics
+from checkout_core.scheduler import InferenceScheduler
+
+# ===== SERVER CONFIGURATION =====
+HOST = "127.0.0.1"          # Use --host 0.0.0.0 to serve lane clients on the store network
+PORT = 8765
+MODEL_PATH = "app/models/yolov8m_14march_withgreyscale_best.pt"
+QUEUE_SIZE = 32             # Frames waiting for inference before new requests get 503
+BATCH_SIZE = 8              # Maximum frames per model call
+BATCH_WAIT_MS = 15          # How long the first frame of a batch waits for company
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class CheckoutService:
+    """Loads the model once and serves detections and per-lane carts to thin lane clients."""
+
+    def __init__(self, scheduler, catalog, journal):
+        self.scheduler = scheduler  # Micro-batches frames from concurrent requests into one model call
+        self.catalog = catalog
+        self.journal = journal  # Every lane's checkouts go into the same transaction log
+        self.carts = {}  # lane id -> Cart
+
+    async def detect(self, frame, lane):
+        """Queues one frame, waits for its batch and updates the lane's cart."""
+        start_time = time.time()
+        try:
+            future = self.scheduler.submit(frame)
+        except queue.Full:
+            raise HttpError(503, "Inference queue is full")
+
+        boxes, confidences, class_ids = await asyncio.wrap_future(future)
+        inference_time = time.time() - start_time  # Queueing + batched inference
+        products = products_from_detections(boxes, confidences, class_ids, self.catalog)
+
+        cart_delta = {}
+        if lane is not None:
+            self.carts.setdefault(lane, Cart()).add_products(products, inference_time)
+            for product in products:
+                cart_delta[product["class_id"]] = cart_delta.get(product["class_id"], 0) + 1
+
+        return {
+            "detections": products,
+            "cart_delta": [{"class_id": class_id, "barcode": getattr(self.catalog.get(class_id), "barcode", "N/A"), "count": count}
+                           for class_id, count in cart_delta.items()],
+            "inference_time": inference_time,
+        }
+
+    def lane_cart(self, lane):
+        """Returns the lane's cart as a list of products with counts."""
+        cart = self.carts.get(lane, Cart())
+        return {"lane": lane, "products": list(cart.products.values()), "barcodes": cart.barcodes()}
+
+    async def checkout_lane(self, lane):
+        """Journals the lane's cart and empties it. Answers once the transaction is on disk."""
+        cart = self.carts.pop(lane, Cart())
+        transaction_id = await asyncio.wrap_future(self.journal.record(cart, lane=lane))
+        return {"lane": lane, "transaction_id": transaction_id, "barcodes": cart.barcodes()}
+
+    def reset_lane(self, lane):
+        """Empties the lane's cart without journaling it (e.g. an abandoned checkout)."""
+        self.carts.pop(lane, None)
+        return {"lane": lane, "reset": True}
+
+    def health(self):
+        cache = self.scheduler.detector.cache
+        return {"status": "ok", "model": self.scheduler.model_path, "scheduler": self.scheduler.metrics(),
+                "cache": {"hits": cache.hits, "misses": cache.misses, "entries": len(cache)},
+                "adaptive": self.scheduler.detector.adaptive.status() if self.scheduler.detector.adaptive else None,
+                "runtime": runtime_diagnostics()}
+
+
+def is_loopback(peer):
+    """True when a connection's peername is on this machine."""
+    try:
+        return ipaddress.ip_address(peer[0]).is_loopback
+    except (TypeError, IndexError, ValueError):
+        return False
+
+
+def attach_shared_memory(name):
+    """
+    Opens a client's shared-memory block without adopting it. Before Python 3.13 attaching
+    registers the block with this process's resource_tracker, which would unlink it (and warn
+    about a leak) when the service exits, so it is unregistered again right away.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name != "nt":  # Windows has no resource_tracker for shared memory
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def decode_frame(body, content_type, local=False):
+    """
+    Turns a request body (JPEG/PNG bytes or a shared-memory handle) into an RGB frame.
+    Shared-memory handles are only accepted from clients on this machine (local).
+    Blocking, so the service runs it in an executor.
+    """
+    if content_type.startswith("application/json"):
+        # {"shm": name, "shape": [h, w, 3]} pointing at a uint8 frame the client keeps in shared memory
+        if not local:
+            raise HttpError(403, "Shared-memory frames are only accepted from loopback clients")
+        try:
+            handle = json.loads(body)
+            shape = tuple(int(x) for x in handle["shape"])
+            shm = attach_shared_memory(handle["shm"])
+        except (ValueError, KeyError, TypeError, FileNotFoundError) as e:
+            raise HttpError(400, f"Bad shared-memory handle: {e}")
+        try:
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf).copy()
+        except TypeError as e:
+            raise HttpError(400, f"Shape does not fit the shared-memory block: {e}")
+        finally:
+            shm.close()
+        return frame
+
+    frame = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise HttpError(400, "Body is not a decodable image")
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+
+async def read_request(reader):
+    """Reads one HTTP/1.1 request. Returns (method, path, query, headers, body) or None on EOF."""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "Malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HttpError(400, "Bad Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+
+    url = urlsplit(target)
+    return method.upper(), url.path, parse_qs(url.query), headers, body
+
+
+def write_response(writer, status, payload):
+    reasons = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 413: "Payload Too Large",
+               500: "Internal Server Error", 503: "Service Unavailable"}
+    body = json.dumps(payload).encode()
+    writer.write(
+        f"HTTP/1.1 {status} {reasons.get(status, '')}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+
+
+async def route(service, method, path, query, headers, body, local=False):
+    parts = [p for p in path.split("/") if p]
+    if method == "GET" and parts == ["health"]:
+        return service.health()
+    if method == "POST" and parts == ["detect"]:
+        # Decoding a JPEG takes milliseconds; off the event loop, other lanes' requests keep flowing
+        frame = await asyncio.get_running_loop().run_in_executor(
+            None, decode_frame, body, headers.get("content-type", "image/jpeg"), local)
+        lane = query.get("lane", [headers.get("x-lane-id")])[0]
+        return await service.detect(frame, lane)
+    if len(parts) == 3 and parts[0] == "lanes":
+        if method == "GET" and parts[2] == "cart":
+            return service.lane_cart(parts[1])
+        if method == "POST" and parts[2] == "reset":
+            return service.reset_lane(parts[1])
+        if method == "POST" and parts[2] == "checkout":
+            return await service.checkout_lane(parts[1])
+    raise HttpError(404, f"No route for {method} {path}")
+
+
+async def handle_connection(service, reader, writer):
+    """Serves requests on one keep-alive connection."""
+    local = is_loopback(writer.get_extra_info("peername"))
+    try:
+        while True:
+            request = None
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, query, headers, body = request
+                write_response(writer, 200, await route(service, method, path, query, headers, body, local))
+            except HttpError as e:
+                write_response(writer, e.status, {"error": e.message})
+                if request is None:
+                    await writer.drain()
+                    break  # The request itself was unreadable, so the stream position is unknown
+            except asyncio.IncompleteReadError:
+                break
+            except Exception as e:
+                write_response(writer, 500, {"error": str(e)})
+            await writer.drain()
+            if request is not None and request[3].get("connection", "").lower() == "close":
+                break
+    finally:
+        writer.close()
+
+
+async def serve(host, port, model_path=None):
+    """Serves model_path, or the registry's active model (swapped in between batches) when it is None."""
+    load_runtime_config().apply_inference()  # The whole service is inference, so it takes inference_cpus
+    detector = Detector(model_path or MODEL_PATH, use_registry=model_path is None)
+    detector.watch_registry()
+    scheduler = InferenceScheduler(detector, max_batch_size=BATCH_SIZE,
+                                   max_wait_ms=BATCH_WAIT_MS, max_queue_depth=QUEUE_SIZE)
+    service = CheckoutService(scheduler, load_catalog(), TransactionJournal())
+    server = await asyncio.start_server(lambda r, w: handle_connection(service, r, w), host, port)
+    print(f"Checkout service listening on http://{host}:{port} (model: {detector.model_path})")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless checkout detection service")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--model", help=f"Serve this model instead of the registry's active one (default {MODEL_PATH})")
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.model))
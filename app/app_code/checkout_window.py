@@ -0,0 +1,304 @@
+import time
+
+import cv2
+from PyQt5.QtWidgets import QApplication, QWidget
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtCore import QEvent, QThreadPool
+from PyQt5.QtMultimedia import QSound
+
+from checkout_core.cart import Cart, products_from_detections
+from checkout_core.catalog import CLASS_COLORS
+from checkout_core.detector import Detector
+from checkout_core.inference_process import InferenceProcess
+from checkout_core.journal import TransactionJournal, POS_EXPORT_FILE
+from checkout_core.renderer import draw_bboxes, draw_detection_time_bar, DISPLAY_SIZE
+from checkout_core.runtime import load_runtime_config, runtime_diagnostics
+from checkout_core.tiling import scale_boxes
+from checkout_core.tracker import CONTINUOUS_SCAN, DETECT_EVERY, Tracker
+from checkout_core.voting import TEMPORAL_VOTING
+from capture_thread import CaptureThread, PREVIEW_IDLE_INTERVAL
+from product_card import ProductCard
+from yolo_thread import YOLOThread, InferenceProcessListener
+
+
+def configure_process(separate_inference):
+    """
+    Applies app/config/runtime.yaml to this process: thread pools, and CPU affinity when inference
+    runs elsewhere. Front-ends call it first thing in __main__: the OpenMP/MKL pool sizes only take
+    effect before a Detector imports torch.
+    """
+    runtime = load_runtime_config()
+    if separate_inference:
+        runtime.apply_ui()  # The inference process pins itself to inference_cpus
+    else:
+        runtime.apply_inference(pin=False)  # Capture and inference share this process, so no pinning
+    return runtime
+
+
+def report_saved(future):
+    """Reports the outcome of a journal commit (runs on the journal thread)."""
+    if future.exception() is None:
+        print(f"✅ Results saved! (transaction {future.result()})")
+    else:
+        print(f"❌ Checkout not saved: {future.exception()}")
+
+
+class CheckoutWindowBase(QWidget):
+    """
+    Camera preview, scanning and cart handling shared by the checkout windows.
+    Subclasses build the layout in initUI() and must create camera_label,
+    scanned_label, product_layout and camera_settings.
+    """
+
+    def __init__(self, detector, catalog, draw_detection_time=draw_detection_time_bar):
+        super().__init__()
+        self.detector = detector  # A Detector, an InferenceScheduler shared by several lanes, or an InferenceProcess
+        self.catalog = catalog
+        self.draw_detection_time = draw_detection_time  # Style of the detection-time indicator
+        self.cart = Cart()  # Detected products and their counts
+        self.journal = TransactionJournal()  # Durable checkout log, written on its own thread
+        self.capture = None  # Camera capture thread
+        self.current_frame = None  # Store the current frame
+        self.current_sequence = 0  # Capture sequence number of current_frame
+        self.last_paint = 0.0
+        self.tracker = Tracker() if CONTINUOUS_SCAN else None  # Continuous scanning: the cart follows the tracks
+        self.tracked_sequence = 0  # Capture sequence number the tracks have been advanced to
+        self.frames_since_detect = 0
+        self.scan_in_flight = False
+        self.last_annotated_frame = None  # Store the last annotated frame
+        self.inference_listener = None
+        self.configure_runtime()
+        if isinstance(detector, InferenceProcess):
+            self.start_inference_listener()
+        elif isinstance(detector, Detector):
+            detector.watch_registry()  # The inference process runs its own watcher
+        self.initUI()
+
+    def initUI(self):
+        raise NotImplementedError
+
+    def configure_runtime(self):
+        """Sizes the Qt thread pool from app/config/runtime.yaml (the rest is applied by configure_process in __main__)."""
+        runtime = load_runtime_config()
+        if runtime.qt_threads is not None:
+            QThreadPool.globalInstance().setMaxThreadCount(runtime.qt_threads)
+        print(f"GUI runtime: {runtime_diagnostics()}")
+
+    def open_camera(self, index):
+        """Opens a camera and starts the live feed."""
+        if self.capture is not None:
+            self.capture.stop()
+        self.capture = CaptureThread(index)
+        self.tracked_sequence = 0  # A new capture thread counts from zero
+        self.capture.frame_ready.connect(self.on_frame_ready)
+        self.capture.start()
+
+    def paint_interval(self):
+        """Seconds between preview paints: the display refresh, or the idle rate when nothing moves or a scan runs."""
+        if self.capture.idle() or (self.scan_in_flight and self.tracker is None):
+            return PREVIEW_IDLE_INTERVAL
+        screen = self.windowHandle().screen() if self.windowHandle() else QApplication.primaryScreen()
+        return 1.0 / max(screen.refreshRate(), 1.0)
+
+    def on_frame_ready(self):
+        """Paints the newest captured frame, unless the last paint was less than paint_interval() ago."""
+        if self.tracker is not None:
+            self.advance_tracks()  # Per captured frame, not per paint, so the tracks move at the camera's rate
+        now = time.monotonic()
+        if now - self.last_paint < self.paint_interval():
+            return
+        self.last_paint = now
+        self.update_frame()
+
+    def prepare_frame(self, frame):
+        """Converts a captured BGR frame to RGB and applies the camera settings."""
+        return self.camera_settings.apply(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+    def refresh_current_frame(self):
+        """Brings current_frame up to the newest capture. Returns False if there is nothing new."""
+        if self.capture is None:
+            return False
+        sequence, frame = self.capture.latest()
+        if frame is None or sequence == self.current_sequence:
+            return False
+        self.current_frame = self.prepare_frame(frame)
+        self.current_sequence = sequence
+        return True
+
+    def update_frame(self):
+        if not self.refresh_current_frame():
+            return
+
+        # Scale down the frame for the live camera view
+        small_frame = cv2.resize(self.current_frame, (self.camera_label.width(), self.camera_label.height()))
+        if self.tracker is not None:
+            self.track_frame(small_frame)
+        small_image = QImage(small_frame.data, small_frame.shape[1], small_frame.shape[0], QImage.Format_RGB888)
+        self.camera_label.setPixmap(QPixmap.fromImage(small_image))
+
+    def changeEvent(self, event):
+        # Stop reading the camera while minimized; nobody sees the preview
+        if event.type() == QEvent.WindowStateChange and self.capture is not None:
+            self.capture.set_paused(self.isMinimized())
+        super().changeEvent(event)
+
+    def advance_tracks(self):
+        """Continuous scanning: moves the tracked boxes one step per captured frame and runs the model every DETECT_EVERY frames."""
+        sequence = self.capture.sequence
+        for _ in range(sequence - self.tracked_sequence):
+            self.tracker.predict()
+        self.frames_since_detect += sequence - self.tracked_sequence
+        self.tracked_sequence = sequence
+        if self.frames_since_detect >= DETECT_EVERY and not self.scan_in_flight:
+            self.frames_since_detect = 0
+            self.scan_image()
+
+    def track_frame(self, view_frame):
+        """Draws the confirmed tracks on the preview."""
+        boxes, class_ids, _ = self.tracker.confirmed()
+        boxes = scale_boxes(boxes, (DISPLAY_SIZE[1], DISPLAY_SIZE[0]), view_frame.shape)
+        draw_bboxes(view_frame, boxes, class_ids, self.catalog)
+
+    def start_inference_listener(self):
+        """Waits for results from the inference process on a background thread."""
+        self.inference_listener = InferenceProcessListener(self.detector)
+        self.inference_listener.result_signal.connect(self.display_slot_result)
+        self.inference_listener.crashed_signal.connect(self.restart_inference_process)
+        self.inference_listener.start()
+
+    def restart_inference_process(self, reason):
+        """Brings the inference process back after a crash; the GUI keeps running meanwhile."""
+        print(f"Inference process stopped ({reason}), restarting.")
+        self.scan_in_flight = False
+        self.detector.restart()
+        self.start_inference_listener()
+
+    def scan_image(self):
+        self.refresh_current_frame()  # The preview may be idling on an older frame
+        if self.current_frame is None:
+            return
+        frames = [self.prepare_frame(frame) for frame in self.capture.recent()] if TEMPORAL_VOTING else None
+        if self.inference_listener is not None:
+            # Frames are copied straight into shared-memory slots; only the slot indices are sent
+            slot = self.detector.submit_many(frames) if frames else self.detector.submit(self.current_frame)
+            if slot is None:
+                print("All inference slots are busy, scan ignored.")
+            else:
+                self.scan_in_flight = True
+            return
+        self.scan_in_flight = True
+        self.yolo_thread = YOLOThread(self.detector, self.current_frame.copy(), self.catalog, frames)
+        self.yolo_thread.result_signal.connect(self.display_result)
+        self.yolo_thread.start()
+
+    def display_slot_result(self, slot, detected_products, detection_time):
+        """Shows a result from the inference process, then hands its shared-memory slot back."""
+        try:
+            self.display_result(self.detector.annotated_frame(slot), detected_products, detection_time)
+            if self.last_annotated_frame is not None:
+                self.last_annotated_frame = self.last_annotated_frame.copy()  # The slot is about to be reused
+        finally:
+            self.detector.release(slot)
+
+    def display_result(self, annotated_frame, detected_products, detection_time):
+        self.scan_in_flight = False
+
+        # Store the annotated frame for later use
+        self.last_annotated_frame = annotated_frame
+
+        # Resize the annotated frame to fit the scanned_label
+        size = (self.scanned_label.width(), self.scanned_label.height())
+        if (annotated_frame.shape[1], annotated_frame.shape[0]) != size:
+            annotated_frame = cv2.resize(annotated_frame, size)
+
+        # Draw the detection time indicator
+        self.draw_detection_time(annotated_frame, detection_time)
+
+        # Convert the annotated frame to QImage
+        annotated_image = QImage(annotated_frame.data, annotated_frame.shape[1], annotated_frame.shape[0], QImage.Format_RGB888)
+        if annotated_image.isNull():
+            print("Error: Annotated image is null.")
+            return
+
+        # Display the annotated image in the scanned_label
+        self.scanned_label.setPixmap(QPixmap.fromImage(annotated_image))
+
+        if self.tracker is not None:
+            self.update_tracks(detected_products, detection_time)
+            return
+
+        # Update the cart and the product cards
+        self.cart.add_products(detected_products, detection_time)
+        self.refresh_product_cards()
+
+        # Play sound to indicate scanning is complete
+        QSound.play("app/assets/scan_complete.wav")
+
+    def update_tracks(self, detected_products, detection_time):
+        """Feeds a detection round to the tracker; the cart changes only when a tracked product appears or leaves."""
+        self.cart.scan_times.append(detection_time)  # Every round is a scan for the journal, even if the cart doesn't change
+        appeared, left = self.tracker.update(
+            [product["box"] for product in detected_products],
+            [product["confidence"] for product in detected_products],
+            [product["class_id"] for product in detected_products],
+        )
+        for _, class_id, confidence, box in appeared:
+            self.cart.add_products(products_from_detections([box], [confidence], [class_id], self.catalog))
+        for _, class_id, _, _ in left:
+            self.cart.remove_units(class_id)
+        if appeared or left:
+            self.refresh_product_cards()
+        if appeared:
+            QSound.play("app/assets/scan_complete.wav")
+
+    def refresh_product_cards(self):
+        """Rebuilds the product cards from the cart."""
+        self.clear_product_layout()
+        for class_id, product in self.cart.products.items():
+            card = ProductCard(product, CLASS_COLORS, product["count"])
+            card.remove_signal.connect(self.remove_product)
+            card.count_changed_signal.connect(self.update_product_count)
+            self.product_layout.addWidget(card)
+
+    def remove_product(self, class_id):
+        """Removes the product with the given class_id from the cart."""
+        self.cart.remove(class_id)
+        self.refresh_product_cards()
+
+    def clear_product_layout(self):
+        """Clears all widgets from the product layout."""
+        for i in reversed(range(self.product_layout.count())):
+            self.product_layout.itemAt(i).widget().setParent(None)
+
+    def save_results(self):
+        """Journals the checkout, exports it for the POS and resets the UI. The disk writes happen off the UI thread."""
+        saved = self.journal.record(self.cart, export_file=POS_EXPORT_FILE)
+        saved.add_done_callback(report_saved)
+
+        # Play sound to indicate results are saved
+        QSound.play("app/assets/beep.wav")
+
+        # Reset the UI
+        self.reset_ui()
+
+    def reset_ui(self):
+        """Resets the UI to a clean state."""
+        self.cart.clear()
+        if self.tracker is not None:
+            self.tracker.reset()
+        self.clear_product_layout()
+        self.scanned_label.clear()
+        self.last_annotated_frame = None
+
+    def update_product_count(self, class_id, new_count):
+        """Updates the count of a product in the cart."""
+        self.cart.set_count(class_id, new_count)
+
+    def closeEvent(self, event):
+        if self.capture is not None:
+            self.capture.stop()
+        self.journal.close()  # Flush checkouts still waiting for their commit
+        if self.inference_listener is not None:
+            self.detector.close()
+            self.inference_listener.wait()
+        event.accept()
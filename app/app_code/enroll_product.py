@@ -0,0 +1,142 @@
+import argparse
+import csv
+import io
+import os
+import time
+
+import cv2
+import numpy as np
+
+from checkout_core.catalog import PRODUCT_DETAILS_FILE, load_catalog
+from checkout_core.embedding_index import INDEX_DIR, CropEmbedder, EmbeddingIndex, build_index, reference_file
+from checkout_core.journal import write_atomic
+from checkout_core.model_registry import ModelRegistry, load_model
+from checkout_core.tiling import extract_detections
+
+# Configuration
+MODEL_PATH = "app/models/yolov8m_14march_withgreyscale_best.pt"  # Used when no model is active in the registry
+ENROLL_CONF = 0.25  # Lowest confidence for the product box in an enrollment photo
+
+
+def read_photo(path):
+    """An enrollment photo as an RGB frame, like the camera frames the lanes scan."""
+    image = cv2.imread(path)
+    if image is None:
+        raise SystemExit(f"Could not read {path}")
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def product_box(model, frame):
+    """(1, 4) most confident box in a photo, or the whole photo when the detector finds nothing."""
+    boxes, confidences, _ = extract_detections(model(frame, conf=ENROLL_CONF, agnostic_nms=True, verbose=False)[0])
+    if len(confidences) == 0:
+        height, width = frame.shape[:2]
+        return np.array([[0, 0, width, height]], dtype=np.float32)
+    return np.asarray(boxes, dtype=np.float32)[[int(np.argmax(confidences))]]
+
+
+def embed_photos(photos):
+    """One embedding per photo, of the product box the active detector finds in it."""
+    model = load_model(ModelRegistry().resolve(MODEL_PATH))
+    embedder = CropEmbedder()
+    embeddings = []
+    for path in photos:
+        frame = read_photo(path)
+        embeddings.append(embedder.embed(frame, product_box(model, frame)))
+    return np.concatenate(embeddings)
+
+
+def add_catalog_row(barcode, name, weight, info, csv_file=PRODUCT_DETAILS_FILE):
+    """Appends a product to the catalog CSV under the next free class id. Returns the class id."""
+    with open(csv_file, mode='r', newline='') as file:
+        text = file.read()
+    class_ids = [int(row["class_id"]) for row in csv.DictReader(io.StringIO(text)) if row.get("class_id", "").strip()]
+    class_id = max(class_ids, default=-1) + 1
+    row = io.StringIO()
+    csv.writer(row, lineterminator="\n").writerow([class_id, name, weight, info, barcode])
+    write_atomic(csv_file, text + ("" if text.endswith("\n") else "\n") + row.getvalue())  # Running lanes recompile it
+    return class_id
+
+
+def enroll(barcode, photos, name=None, weight="", info="", index_dir=INDEX_DIR):
+    catalog = load_catalog()
+    product = catalog.by_barcode(barcode)
+    if product is None:
+        if not name:
+            raise SystemExit(f"Barcode {barcode} is not in {PRODUCT_DETAILS_FILE}; pass --name (and --weight, --info) to add it")
+        class_id = add_catalog_row(barcode, name, weight, info)
+        print(f"Added {name} to {PRODUCT_DETAILS_FILE} as class {class_id}")
+    elif product.class_id is None:
+        raise SystemExit(f"Barcode {barcode} has no class_id in {PRODUCT_DETAILS_FILE}; give it one first")
+
+    embeddings = embed_photos(photos).astype(np.float32)
+    path = reference_file(index_dir, barcode)
+    if os.path.exists(path):
+        embeddings = np.concatenate([np.load(path), embeddings])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.save(path, embeddings)
+    print(f"{barcode}: {len(embeddings)} reference photos")
+    print(f"Index rebuilt with {build_index(index_dir)} references; running lanes reload it within seconds")
+
+
+def remove(barcode, index_dir=INDEX_DIR):
+    path = reference_file(index_dir, barcode)
+    if not os.path.exists(path):
+        raise SystemExit(f"{barcode} is not enrolled")
+    os.remove(path)
+    print(f"Index rebuilt with {build_index(index_dir)} references")
+
+
+def list_enrolled(index_dir=INDEX_DIR):
+    catalog = load_catalog()
+    references_dir = os.path.join(index_dir, "references")
+    names = sorted(os.listdir(references_dir)) if os.path.isdir(references_dir) else []
+    if not names:
+        print(f"Nothing enrolled in {index_dir}")
+    for name in names:
+        barcode = os.path.splitext(name)[0]
+        product = catalog.by_barcode(barcode)
+        count = len(np.load(os.path.join(references_dir, name), mmap_mode='r'))
+        print(f"{barcode:<16} {product.name if product else '(not in catalog)':<40} {count} photos")
+
+
+def query(photos, index_dir=INDEX_DIR):
+    """Looks each photo up in the index and reports the match and the lookup time."""
+    catalog = load_catalog()
+    index = EmbeddingIndex(index_dir)
+    for path, embedding in zip(photos, embed_photos(photos)):
+        start = time.perf_counter()
+        (barcode,), (similarity,) = index.search(embedding[None])
+        elapsed = (time.perf_counter() - start) * 1000
+        product = catalog.by_barcode(barcode) if barcode else None
+        name = product.name if product else "no match"
+        print(f"{os.path.basename(path)}: {barcode or '-'} {name} (similarity {similarity:.3f}, lookup {elapsed:.3f} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enroll products in the embedding index used for open-set recognition")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    add = subparsers.add_parser("add", help="Enroll a product from a few photos (adds it to the catalog if --name is given)")
+    add.add_argument("barcode")
+    add.add_argument("photos", nargs="+")
+    add.add_argument("--name")
+    add.add_argument("--weight", default="")
+    add.add_argument("--info", default="")
+    drop = subparsers.add_parser("remove", help="Remove a product's reference photos from the index")
+    drop.add_argument("barcode")
+    subparsers.add_parser("list", help="Show the enrolled products")
+    subparsers.add_parser("build", help="Rebuild the index from the stored references")
+    lookup = subparsers.add_parser("query", help="Look photos up in the index")
+    lookup.add_argument("photos", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "add":
+        enroll(args.barcode, args.photos, args.name, args.weight, args.info)
+    elif args.command == "remove":
+        remove(args.barcode)
+    elif args.command == "list":
+        list_enrolled()
+    elif args.command == "build":
+        print(f"Index rebuilt with {build_index()} references")
+    else:
+        query(args.photos)
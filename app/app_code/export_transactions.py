@@ -0,0 +1,14 @@
+import argparse
+
+from checkout_core.journal import JOURNAL_FILE, export_pending
+
+POS_CSV_FILE = "pos_transactions.csv"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Append journaled checkouts that the POS has not seen yet to a CSV")
+    parser.add_argument("--journal", default=JOURNAL_FILE)
+    parser.add_argument("--out", default=POS_CSV_FILE)
+    args = parser.parse_args()
+    count = export_pending(args.out, args.journal)
+    print(f"Exported {count} transaction(s) to {args.out}")
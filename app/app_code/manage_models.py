@@ -0,0 +1,39 @@
+import argparse
+import time
+
+from checkout_core.model_registry import ModelRegistry
+
+
+def list_models(registry):
+    active = registry.active_model()
+    models = registry.list_models()
+    if not models:
+        print(f"No models found in {registry.models_dir}")
+    for info in models:
+        marker = "*" if info["name"] == active else " "
+        modified = time.strftime("%Y-%m-%d %H:%M", time.localtime(info["modified"]))
+        classes = len(info["class_map"]) if info["class_map"] else "?"
+        print(f"{marker} {info['name']:<50} {info['backend']:<12} imgsz={info['imgsz']:<5} classes={classes:<4} {modified}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List the model registry or switch the active model")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="Show the models in app/models (* marks the active one)")
+    activate = subparsers.add_parser("activate", help="Make a model active; running lanes swap to it within seconds")
+    activate.add_argument("name", help="File name of the model in app/models")
+    subparsers.add_parser("fastest", help="Activate the fastest artifact that passed export_models.py's parity check")
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    if args.command == "list":
+        list_models(registry)
+    elif args.command == "fastest":
+        name = registry.fastest_valid()
+        if name is None:
+            raise SystemExit(f"No validated exports in {registry.models_dir}; run training_and_dataset_code/export_models.py first")
+        registry.set_active(name)
+        print(f"Active model set to {name}")
+    else:
+        registry.set_active(args.name)
+        print(f"Active model set to {args.name}")
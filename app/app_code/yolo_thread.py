@@ -0,0 +1,65 @@
+import time
+import cv2
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from checkout_core.cart import products_from_detections
+from checkout_core.renderer import draw_bboxes, DISPLAY_SIZE
+from checkout_core.tiling import scale_boxes
+from checkout_core.voting import detect_frames, vote_detections
+
+
+class YOLOThread(QThread):
+    result_signal = pyqtSignal(np.ndarray, list, float)  # Emit annotated image + detected products + detection time
+
+    def __init__(self, detector, frame, catalog, frames=None):
+        super().__init__()
+        self.detector = detector
+        self.frame = frame
+        self.catalog = catalog
+        self.frames = frames  # Recent frames for a voting scan (frame is the newest of them)
+
+    def run(self):
+        # Resize the frame to 960x720 for display
+        display_frame = cv2.resize(self.frame, DISPLAY_SIZE)
+
+        # Start timing
+        start_time = time.time()
+
+        # Perform inference on the full frame (or vote over the recent frames), boxes mapped back to 960x720
+        if self.frames:
+            boxes, confidences, class_ids = vote_detections(detect_frames(self.detector, self.frames))
+        else:
+            boxes, confidences, class_ids = self.detector.detect(self.frame)
+        boxes = scale_boxes(boxes, self.frame.shape, display_frame.shape)
+
+        detected_products = products_from_detections(boxes, confidences, class_ids, self.catalog)
+
+        # Draw Bounding Boxes on image
+        annotated_frame = draw_bboxes(display_frame, boxes, class_ids, self.catalog)
+
+        # Calculate detection time
+        detection_time = time.time() - start_time
+
+        self.result_signal.emit(annotated_frame, detected_products, detection_time)  # Send processed frame, detected products list, and detection time
+
+
+class InferenceProcessListener(QThread):
+    result_signal = pyqtSignal(int, list, float)  # Emit result slot index + detected products + detection time
+    crashed_signal = pyqtSignal(str)  # Emit the reason the inference process went away
+
+    def __init__(self, inference_process):
+        super().__init__()
+        self.inference_process = inference_process
+
+    def run(self):
+        # Only slot indices arrive here; the annotated frame stays in shared memory
+        while True:
+            try:
+                message = self.inference_process.receive()
+            except (EOFError, OSError) as e:
+                self.crashed_signal.emit(str(e) or "inference process exited")
+                return
+            if message is None:
+                return
+            self.result_signal.emit(*message)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The app and training scripts import their modules by name, as when run from their own folders
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "app", "app_code"))
+sys.path.insert(0, os.path.join(REPO_ROOT, "training_and_dataset_code"))
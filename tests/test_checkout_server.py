@@ -0,0 +1,143 @@
+import asyncio
+import sqlite3
+import threading
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+import pytest
+
+from checkout_core.catalog import Catalog
+from checkout_core.journal import TransactionJournal
+from checkout_core.scheduler import InferenceScheduler
+from checkout_server import CheckoutService, HttpError, route
+
+BOX = (10, 20, 110, 220)
+
+
+class StubDetector:
+    """Stands in for Detector: finds one product of class 0 per frame and records every batch."""
+
+    model_path = "stub.pt"
+    adaptive = None
+
+    def __init__(self, gate=None):
+        self.batch_sizes = []
+        self.entered = threading.Event()
+        self.gate = gate  # When set, detect_batch waits for it, so the scheduler's queue backs up
+
+    def detect_batch(self, frames, use_cache=True):
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.batch_sizes.append(len(frames))
+        return [([BOX], [0.9], [0]) for _ in frames]
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    csv_file = tmp_path / "PRODUCT_DETAILS.csv"
+    csv_file.write_text("class_id,name,weight,info,barcode\n0,Test Biscuit,100g,Food,1234567890123\n")
+    return Catalog(str(csv_file))
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = TransactionJournal(str(tmp_path / "transactions.sqlite"), flush_interval=0)
+    yield journal
+    journal.close()
+
+
+def jpeg_body():
+    ok, encoded = cv2.imencode(".jpg", np.zeros((240, 320, 3), dtype=np.uint8))
+    return encoded.tobytes()
+
+
+def post_detect(service, lane="1", body=None, headers=None, local=False):
+    headers = headers or {"content-type": "image/jpeg"}
+    return route(service, "POST", "/detect", {"lane": [lane]}, headers, jpeg_body() if body is None else body, local)
+
+
+def test_concurrent_requests_share_one_batch(catalog, journal):
+    detector = StubDetector()
+    scheduler = InferenceScheduler(detector, max_batch_size=4, max_wait_ms=2000)
+    service = CheckoutService(scheduler, catalog, journal)
+
+    async def scan_all():
+        return await asyncio.gather(*(post_detect(service, lane=str(lane)) for lane in range(4)))
+
+    responses = asyncio.run(scan_all())
+    assert detector.batch_sizes == [4]
+    assert scheduler.metrics()["batches"] == 1
+    for response in responses:
+        assert response["detections"][0]["barcode"] == "1234567890123"
+        assert response["cart_delta"] == [{"class_id": 0, "barcode": "1234567890123", "count": 1}]
+
+
+def test_full_queue_answers_503(catalog, journal):
+    gate = threading.Event()
+    detector = StubDetector(gate)
+    scheduler = InferenceScheduler(detector, max_batch_size=1, max_wait_ms=0, max_queue_depth=1)
+    service = CheckoutService(scheduler, catalog, journal)
+    try:
+        frame = np.zeros((240, 320, 3), dtype=np.uint8)
+        scheduler.submit(frame)  # Taken by the scheduler thread, which then blocks in detect_batch
+        assert detector.entered.wait(5)
+        scheduler.submit(frame)  # Fills the queue
+
+        with pytest.raises(HttpError) as error:
+            asyncio.run(post_detect(service))
+        assert error.value.status == 503
+    finally:
+        gate.set()
+
+
+def test_shared_memory_frames_only_from_loopback(catalog, journal):
+    service = CheckoutService(InferenceScheduler(StubDetector()), catalog, journal)
+    frame = np.full((240, 320, 3), 7, dtype=np.uint8)
+    shm = shared_memory.SharedMemory(create=True, size=frame.nbytes)
+    try:
+        np.ndarray(frame.shape, dtype=np.uint8, buffer=shm.buf)[:] = frame
+        body = f'{{"shm": "{shm.name}", "shape": [240, 320, 3]}}'.encode()
+        headers = {"content-type": "application/json"}
+
+        with pytest.raises(HttpError) as error:
+            asyncio.run(post_detect(service, body=body, headers=headers, local=False))
+        assert error.value.status == 403
+
+        response = asyncio.run(post_detect(service, body=body, headers=headers, local=True))
+        assert len(response["detections"]) == 1
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_checkout_journals_the_lane_cart(catalog, journal, tmp_path):
+    service = CheckoutService(InferenceScheduler(StubDetector()), catalog, journal)
+
+    async def scan_and_checkout():
+        await post_detect(service, lane="3")
+        await post_detect(service, lane="3")
+        return await route(service, "POST", "/lanes/3/checkout", {}, {}, b"")
+
+    response = asyncio.run(scan_and_checkout())
+    assert response["barcodes"] == ["1234567890123", "1234567890123"]
+    assert service.lane_cart("3")["products"] == []
+
+    connection = sqlite3.connect(str(tmp_path / "transactions.sqlite"))
+    try:
+        lane, units, scans = connection.execute(
+            "SELECT lane, units, scans FROM transactions WHERE id = ?", (response["transaction_id"],)).fetchone()
+        items = connection.execute("SELECT barcode, count FROM items WHERE transaction_id = ?",
+                                   (response["transaction_id"],)).fetchall()
+    finally:
+        connection.close()
+    assert (lane, units, scans) == ("3", 2, 2)
+    assert items == [("1234567890123", 2)]
+
+
+def test_unknown_route_is_404(catalog, journal):
+    service = CheckoutService(InferenceScheduler(StubDetector()), catalog, journal)
+    with pytest.raises(HttpError) as error:
+        asyncio.run(route(service, "GET", "/lanes/3/receipt", {}, {}, b""))
+    assert error.value.status == 404
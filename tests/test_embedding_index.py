@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+
+from checkout_core.embedding_index import EmbeddingIndex, build_index, normalize, reference_file
+
+
+def enroll(index_dir, centers, per_product, rng, noise=0.05):
+    """Writes per_product noisy reference embeddings around each center, one barcode per center."""
+    os.makedirs(os.path.join(index_dir, "references"), exist_ok=True)
+    barcodes = [f"89000000000{i:02d}" for i in range(len(centers))]
+    for barcode, center in zip(barcodes, centers):
+        np.save(reference_file(index_dir, barcode), normalize(center + noise * rng.standard_normal((per_product, len(center)))))
+    return barcodes
+
+
+def test_lookup_finds_the_enrolled_product(tmp_path):
+    rng = np.random.default_rng(0)
+    centers = normalize(rng.standard_normal((12, 256)))
+    barcodes = enroll(str(tmp_path), centers, 150, rng)  # 1800 vectors: PCA-reduced and split into lists
+    assert build_index(str(tmp_path), dim=64) == 1800
+
+    index = EmbeddingIndex(str(tmp_path))
+    queries = normalize(centers + 0.05 * rng.standard_normal(centers.shape))
+    found, _ = index.search(queries)
+    assert found == barcodes  # Every query clears MATCH_THRESHOLD
+
+    unrelated, _ = index.search(normalize(rng.standard_normal((3, 256))))
+    assert unrelated == [None, None, None]
+
+
+def test_probing_every_list_matches_brute_force(tmp_path):
+    rng = np.random.default_rng(1)
+    centers = normalize(rng.standard_normal((5, 32)))
+    enroll(str(tmp_path), centers, 40, rng, noise=0.3)
+    build_index(str(tmp_path), nlist=8)
+
+    index = EmbeddingIndex(str(tmp_path), nprobe=8, min_similarity=-1.0)
+    queries = normalize(rng.standard_normal((20, 32)))
+    _, similarity = index.search(queries)
+
+    references = np.load(os.path.join(str(tmp_path), "vectors.npy"))  # Under 1024 vectors there is no PCA
+    assert np.allclose(similarity, (references @ queries.T).max(axis=0), atol=1e-5)
+
+
+def test_rebuild_is_picked_up_and_empty_index_matches_nothing(tmp_path):
+    rng = np.random.default_rng(2)
+    centers = normalize(rng.standard_normal((2, 32)))
+    barcodes = enroll(str(tmp_path), centers, 20, rng)
+    build_index(str(tmp_path))
+    index = EmbeddingIndex(str(tmp_path))
+    assert len(index) == 2
+
+    os.remove(reference_file(str(tmp_path), barcodes[1]))
+    build_index(str(tmp_path))
+    assert index.reload_if_changed(force=True)
+    assert index.search(centers)[0] == [barcodes[0], None]
+
+    os.remove(reference_file(str(tmp_path), barcodes[0]))
+    assert build_index(str(tmp_path)) == 0
+    index.reload_if_changed(force=True)
+    assert len(index) == 0
+    assert index.search(centers)[0] == [None, None]
@@ -0,0 +1,80 @@
+import json
+
+import numpy as np
+
+from evaluate_model import Predictions, aligned_iou, evaluate, nms
+
+
+def write_predictions(path, preds, gts, num_images, nc=2, cache_iou=0.9):
+    """Saves (image, class, box, conf) predictions and (image, class, box) labels in cache_predictions' layout."""
+    preds = list(preds)
+    gts = list(gts)
+    np.savez(path,
+             pred_image=np.array([p[0] for p in preds], dtype=np.int32),
+             pred_cls=np.array([p[1] for p in preds], dtype=np.int16),
+             pred_boxes=np.array([p[2] for p in preds], dtype=np.float32).reshape(-1, 4),
+             pred_conf=np.array([p[3] for p in preds], dtype=np.float32),
+             gt_image=np.array([g[0] for g in gts], dtype=np.int32),
+             gt_cls=np.array([g[1] for g in gts], dtype=np.int16),
+             gt_boxes=np.array([g[2] for g in gts], dtype=np.float32).reshape(-1, 4),
+             shapes=np.full((num_images, 2), 640, dtype=np.int32),
+             files=np.array([f"{i}.jpg" for i in range(num_images)]),
+             meta=np.array(json.dumps({"names": {str(c): f"class{c}" for c in range(nc)}, "iou": cache_iou})))
+    return Predictions(str(path))
+
+
+def reference_nms(image, cls, boxes, conf, iou_threshold):
+    """Plain greedy NMS, one box at a time."""
+    keep = np.zeros(len(conf), dtype=bool)
+    for i in np.argsort(-conf, kind="stable"):
+        same = keep & (image == image[i]) & (cls == cls[i])
+        if not np.any(aligned_iou(boxes[same], np.repeat(boxes[i:i + 1], same.sum(), axis=0)) > iou_threshold):
+            keep[i] = True
+    return keep
+
+
+def test_nms_matches_greedy_reference():
+    rng = np.random.default_rng(0)
+    count = 400
+    xy = rng.uniform(0, 200, (count, 2))
+    boxes = np.concatenate([xy, xy + rng.uniform(20, 60, (count, 2))], axis=1)
+    image, cls = rng.integers(0, 3, count), rng.integers(0, 2, count)
+    conf = rng.random(count)
+    for iou_threshold in (0.3, 0.5, 0.7):
+        assert np.array_equal(nms(image, cls, boxes, conf, iou_threshold),
+                              reference_nms(image, cls, boxes, conf, iou_threshold))
+
+
+def test_nms_keeps_box_whose_suppressor_was_suppressed():
+    # a suppresses b, b would suppress c, a and c don't overlap: greedy keeps a and c
+    boxes = np.array([[0, 0, 10, 10], [5, 0, 15, 10], [10, 0, 20, 10]], dtype=np.float64)
+    keep = nms(np.zeros(3, dtype=int), np.zeros(3, dtype=int), boxes, np.array([0.9, 0.8, 0.7]), 0.3)
+    assert keep.tolist() == [True, False, True]
+
+
+def test_perfect_predictions_score_one(tmp_path):
+    labels = [(0, 0, (0, 0, 50, 50)), (0, 1, (100, 100, 180, 160)), (1, 1, (10, 10, 90, 70))]
+    preds = write_predictions(tmp_path / "predictions.npz",
+                              [(image, cls, box, 0.9) for image, cls, box in labels], labels, num_images=2)
+    metrics = evaluate(preds, conf=0.25, iou=0.7)
+    assert metrics["mAP50-95"] == 1.0
+    assert metrics["cart_accuracy"] == 1.0
+    assert metrics["recall"].tolist() == [1.0, 1.0]
+    assert np.array_equal(metrics["confusion"], np.diag([1, 2, 0]))
+
+
+def test_thresholds_and_class_swaps_show_up_in_the_report(tmp_path):
+    labels = [(0, 0, (0, 0, 50, 50)), (1, 1, (10, 10, 90, 70))]
+    predictions = [(0, 1, (0, 0, 50, 50), 0.9),    # Right box, wrong class
+                   (1, 1, (10, 10, 90, 70), 0.2)]  # Right box, below the global threshold
+    preds = write_predictions(tmp_path / "predictions.npz", predictions, labels, num_images=2)
+
+    metrics = evaluate(preds, conf=0.25, iou=0.7)
+    assert metrics["cart_accuracy"] == 0.0
+    assert metrics["recall"].tolist() == [0.0, 0.0]
+    assert metrics["confusion"][1, 0] == 1  # Predicted class 1 where the label is class 0
+    assert metrics["confusion"][2, 1] == 1  # Class 1 missed in image 1
+
+    lowered = evaluate(preds, conf=0.25, iou=0.7, class_conf={1: 0.1})
+    assert lowered["recall"][1] == 1.0
+    assert lowered["kept"].tolist() == [True, True]
@@ -0,0 +1,45 @@
+import numpy as np
+
+from checkout_core.tracker import Tracker
+
+
+def run_rounds(tracker, rounds):
+    """Feeds (boxes, confidences, class_ids) rounds; returns every (appeared, left) pair."""
+    return [tracker.update(*detections) for detections in rounds]
+
+
+def test_product_counted_once_after_min_hits_and_removed_after_max_misses():
+    tracker = Tracker(min_hits=3, max_misses=2)
+    box = np.array([[100, 100, 200, 220]], dtype=np.float64)
+    moving = [(box + [5 * step, 0, 5 * step, 0], [0.9], [4]) for step in range(5)]
+
+    events = run_rounds(tracker, moving)
+    appeared = [event for appeared, _ in events for event in appeared]
+    assert [class_id for _, class_id, _, _ in appeared] == [4]
+    assert events[2][0] and not events[1][0]  # Confirmed on the third detection, not before
+    assert len(tracker.confirmed()[0]) == 1
+
+    gone = run_rounds(tracker, [(np.zeros((0, 4)), [], [])] * 3)
+    left = [event for _, left in gone for event in left]
+    assert [track_id for track_id, _, _, _ in left] == [appeared[0][0]]
+    assert len(tracker) == 0
+
+
+def test_class_is_voted_by_confidence():
+    tracker = Tracker(min_hits=3)
+    box = np.array([[0, 0, 50, 50]], dtype=np.float64)
+    events = run_rounds(tracker, [(box, [0.4], [1]), (box, [0.9], [2]), (box, [0.8], [2])])
+    (_, class_id, confidence, _), = events[-1][0]
+    assert class_id == 2
+    assert np.isclose(confidence, (0.9 + 0.8) / 3)
+
+
+def test_separate_products_get_separate_tracks():
+    tracker = Tracker(min_hits=1)
+    boxes = np.array([[0, 0, 50, 50], [300, 300, 360, 380]], dtype=np.float64)
+    appeared, _ = tracker.update(boxes, [0.9, 0.8], [0, 1])
+    assert sorted(class_id for _, class_id, _, _ in appeared) == [0, 1]
+    assert len({track_id for track_id, _, _, _ in appeared}) == 2
+
+    predicted, class_ids, _ = tracker.predict()
+    assert np.allclose(np.sort(predicted, axis=0), np.sort(boxes, axis=0))  # No velocity yet, boxes stay put
@@ -1,125 +1,34 @@
 import cv2
-import numpy as np
 import os
+import sys
 import time
-from ultralytics import YOLO
+
+# Shared checkout engine lives in app/app_code
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app", "app_code"))
+from checkout_core.catalog import load_catalog
+from checkout_core.detector import Detector
+from checkout_core.renderer import draw_bboxes
 
 # ===== CONFIGURATION =====
 INPUT_FOLDER = "A:/Academic/CSE498R/Dataset/test/photo"  # Folder containing images to process
 OUTPUT_FOLDER = "A:/Academic/CSE498R/Dataset/test/result"  # Folder to save processed images
 CONVERT_TO_GRAYSCALE = True           # Convert images to grayscale before inference
-model = YOLO("app/models/12m.pt")  # Change to your trained YOLO model
-CONFIDENCE_THRESHOLD = 0.5            # Minimum confidence score to keep detection
 MODEL_PATH = "app/models/12m.pt"  # Path to the YOLO model
-
-# Define colors for different classes (19 distinct colors)
-CLASS_COLORS = [
-    "#FF0000", "#00FF00", "#0000FF", "#FFFF00", "#FFA500",
-    "#800080", "#00FFFF", "#FF00FF", "#808000", "#008080",
-    "#800000", "#008000", "#000080", "#C0C0C0", "#404040",
-    "#FF1493", "#E38800", "#CB4242", "#8327CA"
-]
-
-# ===== HELPER FUNCTIONS =====
-def load_product_details(csv_file="product_details.csv"):
-    """Load product details from CSV file if available"""
-    product_details = {}
-    if os.path.exists(csv_file):
-        import csv
-        with open(csv_file, mode='r') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                class_id = int(row['class_id'])
-                product_details[class_id] = {
-                    "name": row['name'],
-                    "weight": row['weight'],
-                    "info": row['info'],
-                    "barcode": row['barcode']
-                }
-        print(f"Loaded product details for {len(product_details)} classes")
-    else:
-        print("No product_details.csv found - using default class IDs")
-    return product_details
-
-def hex_to_rgb(hex_color):
-    """Convert hex color to RGB tuple"""
-    hex_color = hex_color.lstrip('#')
-    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-
-# Convert class colors to RGB
-CLASS_COLORS = [hex_to_rgb(color) for color in CLASS_COLORS]
+# Confidence thresholds come from the shared detection policy (app/config/detection_policy.yaml)
 
 # Load product details
-PRODUCT_DETAILS = load_product_details()
-
-# ===== DETECTION FUNCTIONS =====
-def extract_detections(results):
-    """
-    Universal detection extractor compatible with YOLOv8 and future versions
-    Returns: (boxes, confidences, class_ids)
-    """
-    # YOLOv8 style
-    if hasattr(results[0], 'boxes'):
-        boxes = results[0].boxes.xyxy.cpu().numpy()
-        confidences = results[0].boxes.conf.cpu().numpy()
-        class_ids = results[0].boxes.cls.cpu().numpy().astype(int)
-    # Hypothetical YOLOv12 style (if API changes)
-    # elif hasattr(results, 'detections'):
-    #     boxes = results.detections.xyxy
-    #     confidences = results.detections.confidence
-    #     class_ids = results.detections.class_id
-    else:
-        raise ValueError("Unsupported results format - check YOLO version")
-    
-    return boxes, confidences, class_ids
-
-def draw_detections(image, boxes, class_ids, confidences):
-    """Draw bounding boxes and labels on image"""
-    for box, class_id, conf in zip(boxes, class_ids, confidences):
-        if conf < CONFIDENCE_THRESHOLD:
-            continue
-            
-        x1, y1, x2, y2 = map(int, box)
-        color = CLASS_COLORS[class_id % len(CLASS_COLORS)]
-        
-        # Draw bounding box
-        cv2.rectangle(image, (x1, y1), (x2, y2), color, 2)
-        
-        # Get product info
-        product_name = PRODUCT_DETAILS.get(class_id, {}).get("name", f"Class {class_id}")
-        weight = PRODUCT_DETAILS.get(class_id, {}).get("weight", "")
-        
-        # Create label
-        label = f"{product_name} {weight}".strip()
-        label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)[0]
-        
-        # Draw label background
-        cv2.rectangle(image, (x1, y1 - label_size[1] - 10), 
-                     (x1 + label_size[0], y1), color, -1)
-        
-        # Draw label text
-        cv2.putText(image, label, (x1, y1 - 5), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-    
-    return image
+CATALOG = load_catalog()
 
 # ===== IMAGE PROCESSING =====
 def preprocess_image(image):
-    """Convert and resize image for processing"""
+    """Convert image to the RGB (or grayscale-as-RGB) input the model was trained on"""
     if CONVERT_TO_GRAYSCALE:
         image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
-    else:
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    
-    # Resize while maintaining aspect ratio
-    height, width = image.shape[:2]
-    new_height = 720
-    new_width = int(width * (new_height / height))
-    return cv2.resize(image, (new_width, new_height))
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
 
 # ===== MAIN PROCESSING =====
-def process_image(image_path, model):
+def process_image(image_path, detector):
     """Process a single image through the model"""
     # Load and preprocess image
     image = cv2.imread(image_path)
@@ -129,18 +38,16 @@ def process_image(image_path, model):
     
     processed_image = preprocess_image(image)
     
-    # Run inference
+    # Run inference (boxes come back in full-resolution image coordinates)
     start_time = time.time()
-    results = model(processed_image)
+    boxes, confidences, class_ids = detector.detect(processed_image, use_cache=False)  # Every image is timed on the model
     inference_time = time.time() - start_time
     
-    # Extract detections
-    boxes, confidences, class_ids = extract_detections(results)
-    
-    # Draw detections on original image (not resized)
-    annotated_image = draw_detections(image, boxes, class_ids, confidences)
+    # Draw detections on the original image
+    annotated_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    annotated_image = draw_bboxes(annotated_image, boxes, class_ids, CATALOG)
     
-    return annotated_image, inference_time
+    return cv2.cvtColor(annotated_image, cv2.COLOR_RGB2BGR), inference_time
 
 def process_all_images():
     """Batch process all images in input folder"""
@@ -150,7 +57,7 @@ def process_all_images():
     
     # Load model
     print(f"Loading YOLO model from {MODEL_PATH}...")
-    model = YOLO(MODEL_PATH)
+    detector = Detector(MODEL_PATH, adaptive=None)  # Same model and imgsz for every image
     
     # Get image files
     image_files = [f for f in os.listdir(INPUT_FOLDER) 
@@ -173,7 +80,7 @@ def process_all_images():
         print(f"Processing {image_file}...", end=" ", flush=True)
         
         try:
-            result, inference_time = process_image(input_path, model)
+            result, inference_time = process_image(input_path, detector)
             if result is not None:
                 cv2.imwrite(output_path, result)
                 total_time += inference_time
@@ -194,4 +101,4 @@ def process_all_images():
         print("\nNo images were successfully processed")
 
 if __name__ == "__main__":
-    process_all_images()
\ No newline at end of file
+    process_all_images()
@@ -0,0 +1,298 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# Shared checkout engine lives in app/app_code; pack_dataset.py sits next to this script.
+# Relative paths below are anchored here, not on the cwd.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(os.path.join(REPO_ROOT, "app", "app_code"))
+from checkout_core.policy import DETECTION_POLICY_FILE, load_detection_policy
+from pack_dataset import IMAGE_EXTENSIONS, read_labels
+
+# Configuration
+MODEL_PATH = os.path.join(REPO_ROOT, "app/models/yolov8m_14march_withgreyscale_best.pt")
+DATA_YAML = os.path.join(SCRIPT_DIR, "data.yaml")
+PREDICTIONS_FILE = os.path.join(SCRIPT_DIR, "runs/eval/predictions.npz")
+IMGSZ = 640
+CACHE_CONF = 0.001      # Keep nearly every box so any threshold can be applied afterwards
+CACHE_NMS_IOU = 0.9     # Loose NMS at cache time; stricter IoU thresholds are re-applied on the cached boxes
+CACHE_MAX_DET = 300
+BATCH_SIZE = 16
+FEED_RGB = True         # Feed frames as RGB arrays, exactly as the checkout lanes do
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)  # mAP@0.5:0.95
+RECALL_POINTS = np.linspace(0, 1, 101)       # COCO 101-point interpolation
+
+
+# ===== CACHING =====
+def cache_predictions(model_path, images_dir, predictions_file=PREDICTIONS_FILE, imgsz=IMGSZ):
+    """Runs the model once over a split and stores predictions and ground truth as flat columns."""
+    from ultralytics import YOLO
+
+    model = YOLO(model_path)
+    files = sorted(os.path.join(images_dir, name) for name in os.listdir(images_dir)
+                   if name.lower().endswith(IMAGE_EXTENSIONS))
+    columns = {key: [] for key in ("pred_image", "pred_boxes", "pred_conf", "pred_cls", "gt_image", "gt_boxes", "gt_cls")}
+    shapes = []
+    start = time.perf_counter()
+    for first in range(0, len(files), BATCH_SIZE):
+        frames = []
+        for path in files[first:first + BATCH_SIZE]:
+            image = cv2.imread(path)
+            frames.append(cv2.cvtColor(image, cv2.COLOR_BGR2RGB) if FEED_RGB else image)
+        results = model(frames, imgsz=imgsz, conf=CACHE_CONF, iou=CACHE_NMS_IOU, max_det=CACHE_MAX_DET, verbose=False)
+        for offset, (frame, result) in enumerate(zip(frames, results)):
+            image_index = first + offset
+            height, width = frame.shape[:2]
+            shapes.append((height, width))
+            count = len(result.boxes)
+            columns["pred_image"].append(np.full(count, image_index, dtype=np.int32))
+            columns["pred_boxes"].append(result.boxes.xyxy.cpu().numpy().astype(np.float32))
+            columns["pred_conf"].append(result.boxes.conf.cpu().numpy().astype(np.float32))
+            columns["pred_cls"].append(result.boxes.cls.cpu().numpy().astype(np.int16))
+
+            labels = read_labels(files[image_index])
+            xywh = labels[:, 1:] * np.array([width, height, width, height], dtype=np.float32)
+            columns["gt_image"].append(np.full(len(labels), image_index, dtype=np.int32))
+            columns["gt_boxes"].append(np.concatenate([xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2], axis=1))
+            columns["gt_cls"].append(labels[:, 0].astype(np.int16))
+    print(f"Ran {model_path} over {len(files)} images in {time.perf_counter() - start:.1f}s")
+
+    os.makedirs(os.path.dirname(predictions_file) or ".", exist_ok=True)
+    np.savez(predictions_file,
+             **{key: np.concatenate(values) if values else np.zeros(0) for key, values in columns.items()},
+             shapes=np.array(shapes, dtype=np.int32).reshape(-1, 2),
+             files=np.array(files),
+             meta=np.array(json.dumps({"model": model_path, "imgsz": imgsz, "names": model.names,
+                                       "conf": CACHE_CONF, "iou": CACHE_NMS_IOU, "feed_rgb": FEED_RGB})))
+    print(f"Predictions cached in {predictions_file}")
+    return predictions_file
+
+
+class Predictions:
+    """Columns of a predictions cache (.npz), loaded once and re-scored as often as needed."""
+
+    def __init__(self, predictions_file=PREDICTIONS_FILE):
+        with np.load(predictions_file) as data:
+            for key in data.files:
+                setattr(self, key, data[key])
+        self.meta = json.loads(str(self.meta))
+        self.names = {int(k): v for k, v in self.meta["names"].items()}
+        self.nc = max(len(self.names), int(max(self.pred_cls.max(initial=-1), self.gt_cls.max(initial=-1))) + 1)
+        self.pred_cls, self.gt_cls = self.pred_cls.astype(np.int64), self.gt_cls.astype(np.int64)
+        self.pred_boxes, self.gt_boxes = self.pred_boxes.reshape(-1, 4), self.gt_boxes.reshape(-1, 4)
+        self.num_images = len(self.files)
+
+
+# ===== VECTORIZED PRIMITIVES =====
+def pairs_by_key(key_a, key_b):
+    """All index pairs (i, j) with key_a[i] == key_b[j], built without a Python loop."""
+    order = np.argsort(key_b, kind="stable")
+    sorted_b = key_b[order]
+    start = np.searchsorted(sorted_b, key_a, side="left")
+    counts = np.searchsorted(sorted_b, key_a, side="right") - start
+    i = np.repeat(np.arange(len(key_a)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return i, order[np.repeat(start, counts) + offsets]
+
+
+def aligned_iou(a, b):
+    """IoU of a[k] with b[k] for two (N, 4) xyxy arrays."""
+    wh = np.clip(np.minimum(a[:, 2:], b[:, 2:]) - np.maximum(a[:, :2], b[:, :2]), 0, None)
+    inter = wh[:, 0] * wh[:, 1]
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-9)
+
+
+def nms(image, cls, boxes, conf, iou_threshold):
+    """
+    Class-aware greedy NMS over every image at once. Returns a keep mask. All overlapping
+    same-image, same-class pairs are found up front; the greedy result is then the fixed
+    point of "suppressed if a kept, higher-scoring box overlaps it too much".
+    """
+    key = image.astype(np.int64) * (int(cls.max(initial=0)) + 1) + cls
+    i, j = pairs_by_key(key, key)
+    higher = (conf[i] > conf[j]) | ((conf[i] == conf[j]) & (i < j))
+    i, j = i[higher], j[higher]
+    overlap = aligned_iou(boxes[i], boxes[j]) > iou_threshold
+    i, j = i[overlap], j[overlap]
+    keep = np.ones(len(conf), dtype=bool)
+    while True:
+        suppressed = np.zeros(len(conf), dtype=bool)
+        suppressed[j[keep[i]]] = True
+        if np.array_equal(~suppressed, keep):
+            return keep
+        keep = ~suppressed
+
+
+def match(pred_image, pred_cls, pred_boxes, gt_image, gt_cls, gt_boxes, iou_threshold, class_aware=True):
+    """
+    One-to-one matching of predictions to ground truth in the same image (and class),
+    highest IoU first, as Ultralytics' validator does. Returns (pred indices, gt indices, IoUs).
+    """
+    i, j = pairs_by_key(pred_image, gt_image)
+    if class_aware:
+        same = pred_cls[i] == gt_cls[j]
+        i, j = i[same], j[same]
+    iou = aligned_iou(pred_boxes[i], gt_boxes[j])
+    good = iou >= iou_threshold
+    i, j, iou = i[good], j[good], iou[good]
+    order = np.argsort(-iou, kind="stable")
+    i, j, iou = i[order], j[order], iou[order]
+    _, first = np.unique(i, return_index=True)
+    i, j, iou = i[first], j[first], iou[first]
+    order = np.argsort(-iou, kind="stable")
+    i, j, iou = i[order], j[order], iou[order]
+    _, first = np.unique(j, return_index=True)
+    return i[first], j[first], iou[first]
+
+
+def true_positives(preds, keep, iou_thresholds=IOU_THRESHOLDS):
+    """(N, T) true-positive flags of the kept predictions at each IoU threshold."""
+    index = np.nonzero(keep)[0]
+    tp = np.zeros((len(index), len(iou_thresholds)), dtype=bool)
+    for t, threshold in enumerate(iou_thresholds):
+        matched, _, _ = match(preds.pred_image[index], preds.pred_cls[index], preds.pred_boxes[index],
+                              preds.gt_image, preds.gt_cls, preds.gt_boxes, threshold)
+        tp[matched, t] = True
+    return tp
+
+
+def average_precision(tp, conf, pred_cls, gt_cls, nc):
+    """(nc, T) COCO-style AP per class and IoU threshold; NaN for classes without ground truth."""
+    order = np.argsort(-conf, kind="stable")
+    tp, pred_cls = tp[order], pred_cls[order]
+    gt_counts = np.bincount(gt_cls, minlength=nc)
+    ap = np.full((nc, tp.shape[1]), np.nan)
+    for c in np.nonzero(gt_counts)[0]:
+        hits = tp[pred_cls == c]
+        if len(hits) == 0:
+            ap[c] = 0.0
+            continue
+        tps = np.cumsum(hits, axis=0)
+        recall = tps / gt_counts[c]
+        precision = tps / np.arange(1, len(hits) + 1)[:, None]
+        precision = np.flip(np.maximum.accumulate(np.flip(precision, 0), axis=0), 0)  # Monotone envelope
+        for t in range(tp.shape[1]):
+            index = np.searchsorted(recall[:, t], RECALL_POINTS, side="left")
+            values = np.zeros(len(RECALL_POINTS))
+            valid = index < len(precision)
+            values[valid] = precision[index[valid], t]
+            ap[c, t] = values.mean()
+    return ap
+
+
+def confusion_matrix(preds, keep, nc, iou_threshold=0.5):
+    """
+    (nc + 1, nc + 1) matrix of predicted class (rows) against true class (columns), the
+    last row/column being background (missed products and false detections).
+    """
+    index = np.nonzero(keep)[0]
+    p, g, _ = match(preds.pred_image[index], preds.pred_cls[index], preds.pred_boxes[index],
+                    preds.gt_image, preds.gt_cls, preds.gt_boxes, iou_threshold, class_aware=False)
+    matrix = np.zeros((nc + 1, nc + 1), dtype=np.int64)
+    np.add.at(matrix, (preds.pred_cls[index[p]], preds.gt_cls[g]), 1)
+    unmatched_gt = np.setdiff1d(np.arange(len(preds.gt_cls)), g)
+    np.add.at(matrix, (nc, preds.gt_cls[unmatched_gt]), 1)
+    unmatched_pred = np.setdiff1d(np.arange(len(index)), p)
+    np.add.at(matrix, (preds.pred_cls[index[unmatched_pred]], nc), 1)
+    return matrix
+
+
+def cart_counts(image, cls, num_images, nc):
+    """(images, nc) product counts per image, i.e. the cart each image would produce."""
+    return np.bincount(image.astype(np.int64) * nc + cls, minlength=num_images * nc).reshape(num_images, nc)
+
+
+def class_thresholds(nc, conf, class_conf=None):
+    """Per-class confidence thresholds as an array indexed by class id."""
+    thresholds = np.full(nc, conf, dtype=np.float32)
+    for class_id, threshold in (class_conf or {}).items():
+        if int(class_id) < nc:
+            thresholds[int(class_id)] = threshold
+    return thresholds
+
+
+# ===== SCORING =====
+def evaluate(preds, conf=0.25, iou=0.7, class_conf=None):
+    """
+    Scores cached predictions under a detection policy (global conf, NMS IoU, per-class conf).
+    mAP uses every box that survives NMS; precision, recall and the confusion matrix use the
+    boxes that also pass the confidence thresholds, like the app sees them.
+    """
+    nc = preds.nc
+    after_nms = nms(preds.pred_image, preds.pred_cls, preds.pred_boxes, preds.pred_conf, iou) if iou < preds.meta["iou"] \
+        else np.ones(len(preds.pred_conf), dtype=bool)
+    tp = true_positives(preds, after_nms)
+    ap = average_precision(tp, preds.pred_conf[after_nms], preds.pred_cls[after_nms], preds.gt_cls, nc)
+
+    thresholds = class_thresholds(nc, conf, class_conf)
+    kept = after_nms & (preds.pred_conf >= thresholds[preds.pred_cls])
+    tp50 = tp[kept[after_nms], 0]
+    kept_cls = preds.pred_cls[kept]
+    tp_counts = np.bincount(kept_cls[tp50], minlength=nc)
+    pred_counts = np.bincount(kept_cls, minlength=nc)
+    gt_counts = np.bincount(preds.gt_cls, minlength=nc)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        precision = np.where(pred_counts > 0, tp_counts / pred_counts, np.nan)
+        recall = np.where(gt_counts > 0, tp_counts / gt_counts, np.nan)
+
+    return {
+        "mAP50-95": float(np.nanmean(ap)) if np.isfinite(ap).any() else 0.0,
+        "mAP50": float(np.nanmean(ap[:, 0])) if np.isfinite(ap).any() else 0.0,
+        "ap": ap,
+        "precision": precision,
+        "recall": recall,
+        "gt_counts": gt_counts,
+        "confusion": confusion_matrix(preds, kept, nc),
+        # Share of images whose predicted cart matches the labels exactly (every class, every count)
+        "cart_accuracy": float(np.mean(np.all(cart_counts(preds.pred_image[kept], kept_cls, preds.num_images, nc) ==
+                                              cart_counts(preds.gt_image, preds.gt_cls, preds.num_images, nc), axis=1))),
+        "kept": kept,
+    }
+
+
+def print_report(preds, metrics):
+    print(f"mAP50-95 {metrics['mAP50-95']:.4f}   mAP50 {metrics['mAP50']:.4f}   exact carts {metrics['cart_accuracy']:.1%}")
+    print(f"{'class':>5} {'name':<16} {'labels':>6} {'P':>6} {'R':>6} {'AP50':>6} {'AP50-95':>8}")
+    for c in range(preds.nc):
+        if metrics["gt_counts"][c] == 0 and np.isnan(metrics["precision"][c]):
+            continue
+        print(f"{c:>5} {str(preds.names.get(c, c))[:16]:<16} {metrics['gt_counts'][c]:>6} {metrics['precision'][c]:>6.3f} "
+              f"{metrics['recall'][c]:>6.3f} {metrics['ap'][c, 0]:>6.3f} {np.nanmean(metrics['ap'][c]) if metrics['gt_counts'][c] else np.nan:>8.3f}")
+    print("Confusion matrix (rows: predicted, columns: true, last: background)")
+    print(metrics["confusion"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cache a model's val predictions once, then score them under any thresholds")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    cache = subparsers.add_parser("cache", help="Run the model over the val split and cache the raw predictions")
+    cache.add_argument("model", nargs="?", default=MODEL_PATH)
+    cache.add_argument("--images", help="Image folder (default: val split of data.yaml)")
+    cache.add_argument("--out", default=PREDICTIONS_FILE)
+    cache.add_argument("--imgsz", type=int, default=IMGSZ)
+    score = subparsers.add_parser("score", help="Score cached predictions under a detection policy")
+    score.add_argument("predictions", nargs="?", default=PREDICTIONS_FILE)
+    score.add_argument("--policy", default=os.path.join(REPO_ROOT, DETECTION_POLICY_FILE), help="Detection policy YAML supplying the thresholds")
+    score.add_argument("--conf", type=float, help="Override the policy's global confidence")
+    score.add_argument("--iou", type=float, help="Override the policy's NMS IoU")
+    args = parser.parse_args()
+
+    if args.command == "cache":
+        from export_models import val_images_dir
+        cache_predictions(args.model, args.images or val_images_dir(DATA_YAML), args.out, args.imgsz)
+    else:
+        policy = load_detection_policy(os.path.abspath(args.policy), root=REPO_ROOT)
+        predictions = Predictions(args.predictions)
+        start = time.perf_counter()
+        result = evaluate(predictions, args.conf if args.conf is not None else policy.conf,
+                          args.iou if args.iou is not None else policy.iou, policy.class_conf)
+        print_report(predictions, result)
+        print(f"Scored {len(predictions.pred_conf)} cached boxes in {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,193 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+
+import cv2
+import numpy as np
+import yaml
+from ultralytics import YOLO
+
+# Shared checkout engine lives in app/app_code; relative paths below are anchored here, not on the cwd
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(os.path.join(REPO_ROOT, "app", "app_code"))
+from checkout_core.detector import Detector
+from checkout_core.model_registry import EXPORT_MANIFEST_FILE, MODELS_DIR, ModelRegistry, model_backend
+from checkout_core.policy import load_detection_policy
+from checkout_core.runtime import RUNTIME_CONFIG_FILE, load_runtime_config
+from checkout_core.scheduler import MAX_BATCH_SIZE
+from checkout_core.tiling import extract_detections
+from checkout_core.torch_fast_path import boxes_match, PARITY_IOU, PARITY_CONF_TOLERANCE
+
+# Configuration
+CHECKPOINT = os.path.join(SCRIPT_DIR, "runs/detect/train_yolov8m/weights/best.pt")  # Output of yolov8_trainig.py
+DATA_YAML = os.path.join(SCRIPT_DIR, "data.yaml")  # Held-out images default to its val split
+FORMATS = ["onnx", "openvino", "torchscript"]
+DYNAMIC_FORMATS = ("onnx", "openvino")   # Exported with a dynamic batch axis; the app sends lists of frames
+PARITY_BATCH = MAX_BATCH_SIZE            # Frames per call in the parity/latency check, like the service's micro-batches
+IMAGE_SIZES = [640, 512, 416, 320]
+MAX_IMAGES = 50                          # Held-out images used for parity and latency
+WARMUP_RUNS = 3
+MIN_MATCH_RATE = 1.0                     # Share of images whose boxes must match the .pt reference
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def load_images(images_dir, max_images=MAX_IMAGES):
+    """RGB frames from the held-out set, like the ones the app scans."""
+    names = sorted(name for name in os.listdir(images_dir) if name.lower().endswith(IMAGE_EXTENSIONS))[:max_images]
+    frames = []
+    for name in names:
+        image = cv2.imread(os.path.join(images_dir, name))
+        if image is not None:
+            frames.append(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    return frames
+
+
+def run_model(model, frames, imgsz, predict_kwargs):
+    """Returns (detections per frame, latency per frame in ms) after a short warm-up."""
+    for frame in frames[:WARMUP_RUNS]:
+        model(frame, imgsz=imgsz, verbose=False, **predict_kwargs)
+    detections, latencies = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        result = model(frame, imgsz=imgsz, verbose=False, **predict_kwargs)[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        detections.append(extract_detections(result))
+    return detections, latencies
+
+
+def run_detector(detector, frames, batch_size=PARITY_BATCH):
+    """
+    Returns (detections per frame, latency per frame in ms) through Detector.detect_batch, in
+    batches of batch_size as the scheduler, voting and tiling send them. A batch's time is
+    shared by its frames.
+    """
+    detector.detect_batch(frames[:batch_size], use_cache=False)  # Warm-up
+    detections, latencies = [], []
+    for first in range(0, len(frames), batch_size):
+        batch = frames[first:first + batch_size]
+        start = time.perf_counter()
+        detections.extend(detector.detect_batch(batch, use_cache=False))
+        latencies.extend([(time.perf_counter() - start) * 1000 / len(batch)] * len(batch))
+    return detections, latencies
+
+
+def export_artifact(checkpoint, fmt, imgsz, models_dir):
+    """Exports one format at one input size and moves it into the model registry. Returns its registry name."""
+    exported = YOLO(checkpoint).export(format=fmt, imgsz=imgsz, device="cpu", dynamic=fmt in DYNAMIC_FORMATS)
+    stem = os.path.splitext(os.path.basename(checkpoint))[0]
+    suffix = {"onnx": ".onnx", "torchscript": ".torchscript", "openvino": "_openvino_model"}[fmt]
+    name = f"{stem}_{imgsz}{suffix}"
+    target = os.path.join(models_dir, name)
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+    elif os.path.exists(target):
+        os.remove(target)
+    shutil.move(str(exported), target)
+    return name
+
+
+def write_sidecar(models_dir, name, imgsz, class_map, source):
+    """Registry metadata for an artifact (see ModelRegistry.model_info)."""
+    with open(os.path.join(models_dir, name + ".json"), mode='w') as file:
+        json.dump({"imgsz": imgsz, "backend": model_backend(name), "class_map": class_map, "source": source}, file, indent=2)
+
+
+def latency_summary(latencies):
+    return {"latency_ms": round(float(np.median(latencies)), 2), "p95_ms": round(float(np.percentile(latencies, 95)), 2)}
+
+
+def evaluate_checkpoint(model_path, images, device, data_yaml=DATA_YAML, imgsz=640):
+    """mAP on the val split of data_yaml and CPU latency on held-out images, for comparing trained checkpoints."""
+    metrics = YOLO(model_path).val(data=data_yaml, imgsz=imgsz, device=device, plots=False, verbose=False)
+    predict_kwargs = dict(load_detection_policy(root=REPO_ROOT).predict_kwargs(), device="cpu")
+    _, latencies = run_model(YOLO(model_path), images, imgsz, predict_kwargs)
+    return {
+        "model": model_path,
+        "mAP50-95": round(float(metrics.box.map), 4),
+        "mAP50": round(float(metrics.box.map50), 4),
+        **latency_summary(latencies),
+        "size_mb": round(os.path.getsize(model_path) / 2 ** 20, 1),
+    }
+
+
+def export_and_validate(checkpoint, images_dir, formats=FORMATS, image_sizes=IMAGE_SIZES, models_dir=os.path.join(REPO_ROOT, MODELS_DIR),
+                        iou_threshold=PARITY_IOU, conf_tolerance=PARITY_CONF_TOLERANCE):
+    frames = load_images(images_dir)
+    if not frames:
+        raise SystemExit(f"No images found in {images_dir}")
+    print(f"Validating on {len(frames)} held-out images from {images_dir}")
+
+    # Both sides run through the app's Detector with the same policy: batched calls, tiling and
+    # second stages included, no repeat-scan cache or adaptive control
+    policy = load_detection_policy(root=REPO_ROOT)
+    registry = ModelRegistry(models_dir)
+    class_map = {int(k): v for k, v in YOLO(checkpoint).names.items()}
+    artifacts = []
+
+    for imgsz in image_sizes:
+        reference_detector = Detector(checkpoint, policy=policy, registry=registry, adaptive=None, imgsz=imgsz)
+        reference, reference_latency = run_detector(reference_detector, frames)
+        artifacts.append({"name": os.path.basename(checkpoint), "path": checkpoint, "format": "pytorch", "imgsz": imgsz,
+                          **latency_summary(reference_latency), "match_rate": 1.0, "valid": True, "reference": True})
+        print(f"pytorch      imgsz={imgsz:<4} {artifacts[-1]['latency_ms']:8.1f} ms (reference)")
+
+        for fmt in formats:
+            entry = {"format": fmt, "imgsz": imgsz}
+            try:
+                name = export_artifact(checkpoint, fmt, imgsz, models_dir)
+                write_sidecar(models_dir, name, imgsz, class_map, checkpoint)
+                candidate_detector = Detector(os.path.join(models_dir, name), policy=policy, registry=registry, adaptive=None)
+                candidate, latency = run_detector(candidate_detector, frames)
+            except Exception as e:
+                print(f"{fmt:<12} imgsz={imgsz:<4} failed: {e}")
+                artifacts.append(dict(entry, valid=False, error=str(e)))
+                continue
+            matches = [boxes_match(ref, cand, iou_threshold, conf_tolerance) for ref, cand in zip(reference, candidate)]
+            match_rate = float(np.mean(matches))
+            entry.update(name=name, path=os.path.join(models_dir, name), **latency_summary(latency),
+                         match_rate=round(match_rate, 4), valid=match_rate >= MIN_MATCH_RATE)
+            artifacts.append(entry)
+            status = "ok" if entry["valid"] else "MISMATCH"
+            print(f"{fmt:<12} imgsz={imgsz:<4} {entry['latency_ms']:8.1f} ms  parity {match_rate:6.1%}  {status}")
+
+    valid = [artifact for artifact in artifacts if artifact["valid"] and not artifact.get("reference")]
+    manifest = {
+        "source": checkpoint,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "images": len(frames),
+        "batch": PARITY_BATCH,
+        "tolerance": {"iou": iou_threshold, "conf": conf_tolerance, "min_match_rate": MIN_MATCH_RATE},
+        "artifacts": artifacts,
+        "fastest_valid": min(valid, key=lambda artifact: artifact["latency_ms"])["name"] if valid else None,
+    }
+    manifest_path = os.path.join(models_dir, EXPORT_MANIFEST_FILE)
+    with open(manifest_path, mode='w') as file:
+        json.dump(manifest, file, indent=2)
+    print(f"Manifest written to {manifest_path}; fastest valid artifact: {manifest['fastest_valid']}")
+    return manifest
+
+
+def val_images_dir(data_yaml):
+    with open(data_yaml, mode='r') as file:
+        return yaml.safe_load(file)["val"].strip()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a checkpoint to ONNX/OpenVINO/TorchScript and validate it against the .pt")
+    parser.add_argument("checkpoint", nargs="?", default=CHECKPOINT)
+    parser.add_argument("--images", help="Held-out image folder (default: val split of data.yaml)")
+    parser.add_argument("--formats", nargs="+", default=FORMATS, choices=FORMATS)
+    parser.add_argument("--imgsz", nargs="+", type=int, default=IMAGE_SIZES)
+    parser.add_argument("--models-dir", default=os.path.join(REPO_ROOT, MODELS_DIR))
+    parser.add_argument("--iou", type=float, default=PARITY_IOU)
+    parser.add_argument("--conf-tolerance", type=float, default=PARITY_CONF_TOLERANCE)
+    args = parser.parse_args()
+
+    load_runtime_config(os.path.join(REPO_ROOT, RUNTIME_CONFIG_FILE)).apply_inference()  # Measure latency with the lanes' thread settings
+    export_and_validate(args.checkpoint, args.images or val_images_dir(DATA_YAML), args.formats, args.imgsz,
+                        args.models_dir, args.iou, args.conf_tolerance)
@@ -0,0 +1,158 @@
+import argparse
+import json
+import os
+from multiprocessing import Pool
+
+import cv2
+import numpy as np
+import yaml
+
+# Configuration (relative paths are anchored on this script, not on the cwd)
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_YAML = os.path.join(SCRIPT_DIR, "data.yaml")
+SHARDS_DIR = os.path.join(SCRIPT_DIR, "datasets/shards")  # Output: <split>.json index, <split>_labels.npz, <split>_NNN.npy image shards
+IMGSZ = 640                      # Longer side of the stored images; train at this imgsz to skip resizing too
+SHARD_SIZE = 512                 # Images per shard file (~600 MB at 640)
+PACK_WORKERS = os.cpu_count() or 2
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp")
+
+
+def label_path(image_path):
+    """YOLO label file for an image: .../images/x.jpg -> .../labels/x.txt."""
+    images_dir, labels_dir = f"{os.sep}images{os.sep}", f"{os.sep}labels{os.sep}"
+    return os.path.splitext(labels_dir.join(image_path.rsplit(images_dir, 1)))[0] + ".txt"
+
+
+def read_labels(image_path):
+    """(N, 5) class, x, y, w, h (normalized) rows; polygon labels are reduced to their bounding box."""
+    rows = []
+    path = label_path(image_path)
+    if os.path.exists(path):
+        with open(path, mode='r') as file:
+            for line in file:
+                values = [float(value) for value in line.split()]
+                if len(values) == 5:
+                    rows.append(values)
+                elif len(values) > 5:
+                    points = np.array(values[1:]).reshape(-1, 2)
+                    (x0, y0), (x1, y1) = points.min(0), points.max(0)
+                    rows.append([values[0], (x0 + x1) / 2, (y0 + y1) / 2, x1 - x0, y1 - y0])
+    return np.array(rows, dtype=np.float32).reshape(-1, 5)
+
+
+def decode(task):
+    """Reads and resizes one image the way Ultralytics' load_image() does. Runs in a worker process."""
+    image_path, imgsz, interpolation = task
+    image = cv2.imread(image_path)
+    if image is None:
+        return None
+    h0, w0 = image.shape[:2]
+    ratio = imgsz / max(h0, w0)
+    if ratio != 1:
+        w, h = min(int(np.ceil(w0 * ratio)), imgsz), min(int(np.ceil(h0 * ratio)), imgsz)
+        image = cv2.resize(image, (w, h), interpolation=interpolation if ratio < 1 else cv2.INTER_LINEAR)
+    return image, (h0, w0), read_labels(image_path)
+
+
+def pack_split(split, images_dir, out_dir=SHARDS_DIR, imgsz=IMGSZ, shard_size=SHARD_SIZE, workers=PACK_WORKERS):
+    """Decodes one split into memory-mappable image shards with the labels alongside. Returns the index file."""
+    files = sorted(os.path.join(images_dir, name) for name in os.listdir(images_dir)
+                   if name.lower().endswith(IMAGE_EXTENSIONS))
+    # Training resizes with INTER_LINEAR (augmented), validation with INTER_AREA
+    interpolation = cv2.INTER_LINEAR if split == "train" else cv2.INTER_AREA
+    os.makedirs(out_dir, exist_ok=True)
+
+    packed_files, shards, shapes, orig_shapes, labels, offsets = [], [], [], [], [], [0]
+    shard = None
+    with Pool(workers) as pool:
+        decoded = pool.imap(decode, [(path, imgsz, interpolation) for path in files], chunksize=8)
+        for path, item in zip(files, decoded):
+            if item is None:
+                print(f"Skipping unreadable image {path}")
+                continue
+            image, orig_shape, image_labels = item
+            slot = len(packed_files) % shard_size
+            if slot == 0:
+                if shard is not None:
+                    shard.flush()
+                count = min(shard_size, len(files) - len(packed_files))
+                shards.append(f"{split}_{len(shards):03d}.npy")
+                shard = np.lib.format.open_memmap(os.path.join(out_dir, shards[-1]), mode='w+', dtype=np.uint8,
+                                                  shape=(count, imgsz, imgsz, 3))
+            shard[slot, :image.shape[0], :image.shape[1]] = image  # Stored top-left in an imgsz square
+            packed_files.append(os.path.abspath(path))
+            shapes.append(image.shape[:2])
+            orig_shapes.append(orig_shape)
+            labels.append(image_labels)
+            offsets.append(offsets[-1] + len(image_labels))
+    if shard is not None:
+        shard.flush()
+
+    np.savez(os.path.join(out_dir, f"{split}_labels.npz"),
+             shapes=np.array(shapes, dtype=np.int32).reshape(-1, 2),
+             orig_shapes=np.array(orig_shapes, dtype=np.int32).reshape(-1, 2),
+             offsets=np.array(offsets, dtype=np.int64),
+             labels=np.concatenate(labels) if labels else np.zeros((0, 5), dtype=np.float32))
+    index_file = os.path.join(out_dir, f"{split}.json")
+    with open(index_file, mode='w') as file:
+        json.dump({"source": images_dir, "imgsz": imgsz, "shard_size": shard_size, "count": len(packed_files),
+                   "shards": shards, "files": packed_files}, file)
+    print(f"{split}: packed {len(packed_files)} images into {len(shards)} shards in {out_dir}")
+    return os.path.abspath(index_file)
+
+
+class ShardReader:
+    """Random access to a packed split: images come straight from memory-mapped shards, no decoding."""
+
+    def __init__(self, index_file):
+        out_dir = os.path.dirname(index_file)
+        split = os.path.splitext(os.path.basename(index_file))[0]
+        with open(index_file, mode='r') as file:
+            index = json.load(file)
+        self.imgsz = index["imgsz"]
+        self.shard_size = index["shard_size"]
+        self.files = index["files"]
+        self.shards = [np.load(os.path.join(out_dir, name), mmap_mode='r') for name in index["shards"]]
+        meta = np.load(os.path.join(out_dir, f"{split}_labels.npz"))
+        self.shapes, self.orig_shapes = meta["shapes"], meta["orig_shapes"]
+        self.offsets, self.all_labels = meta["offsets"], meta["labels"]
+
+    def __len__(self):
+        return len(self.files)
+
+    def image(self, i):
+        """(BGR image resized to imgsz on its longer side, original (h, w)). The image is a copy, safe to modify."""
+        h, w = self.shapes[i]
+        image = self.shards[i // self.shard_size][i % self.shard_size, :h, :w]
+        return np.array(image), tuple(int(v) for v in self.orig_shapes[i])
+
+    def labels(self, i):
+        """(N, 5) class, x, y, w, h rows (normalized) for image i."""
+        return self.all_labels[self.offsets[i]:self.offsets[i + 1]]
+
+
+def pack_dataset(data_yaml=DATA_YAML, out_dir=SHARDS_DIR, imgsz=IMGSZ, workers=PACK_WORKERS):
+    """Packs train and val and writes a data.yaml pointing at the packed splits (use it with ShardedDetectionTrainer)."""
+    with open(data_yaml, mode='r') as file:
+        data = yaml.safe_load(file)
+    packed = dict(data)
+    for split in ("train", "val"):
+        packed[split] = pack_split(split, data[split].strip(), out_dir, imgsz, workers=workers)
+    packed.pop("path", None)
+    packed_yaml = os.path.join(out_dir, "data.yaml")
+    with open(packed_yaml, mode='w') as file:
+        yaml.safe_dump(packed, file, sort_keys=False)
+    print(f"Wrote {packed_yaml}")
+    return packed_yaml
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack the train/val images into pre-decoded, memory-mappable shards")
+    parser.add_argument("--data", default=DATA_YAML)
+    parser.add_argument("--out", default=SHARDS_DIR)
+    parser.add_argument("--imgsz", type=int, default=IMGSZ)
+    parser.add_argument("--workers", type=int, default=PACK_WORKERS)
+    args = parser.parse_args()
+
+    pack_dataset(args.data, args.out, args.imgsz, args.workers)
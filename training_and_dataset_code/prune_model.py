@@ -0,0 +1,128 @@
+import argparse
+import functools
+import json
+import os
+import shutil
+import sys
+
+import torch
+from ultralytics import YOLO
+from ultralytics.models.yolo.detect import DetectionTrainer
+from ultralytics.nn.modules import Detect
+
+try:
+    import torch_pruning as tp
+except ImportError:
+    raise SystemExit("prune_model.py needs torch-pruning. Install it with `pip install torch-pruning`.")
+
+# Shared checkout engine lives in app/app_code; export_models.py sits next to this script.
+# Relative paths below are anchored here, not on the cwd.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(os.path.join(REPO_ROOT, "app", "app_code"))
+from checkout_core.pruning import split_c2f_blocks
+from checkout_core.runtime import RUNTIME_CONFIG_FILE, load_runtime_config
+from export_models import evaluate_checkpoint, load_images, val_images_dir
+
+# Configuration
+MODEL = os.path.join(SCRIPT_DIR, "runs/detect/train_yolov8m/weights/best.pt")  # Output of yolov8_trainig.py
+DATA_YAML = os.path.join(SCRIPT_DIR, "data.yaml")
+IMGSZ = 640
+PRUNE_RATIO = 0.5        # Fraction of prunable channels removed in total
+PRUNE_STEPS = 4          # Removed gradually, fine-tuning after each step
+FINETUNE_EPOCHS = 10     # Per step
+ROUND_TO = 8             # Keep channel counts multiples of this for efficient CPU kernels
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "runs/prune")
+
+
+class PrunedTrainer(DetectionTrainer):
+    """DetectionTrainer that fine-tunes a given (pruned) model instead of rebuilding it from its yaml."""
+
+    def __init__(self, *args, pruned_model=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pruned_model = pruned_model
+
+    def get_model(self, cfg=None, weights=None, verbose=True):
+        return self.pruned_model
+
+
+def count_cost(model, imgsz):
+    """(GFLOPs, million parameters) for one imgsz x imgsz frame."""
+    example = torch.zeros(1, 3, imgsz, imgsz)
+    macs, params = tp.utils.count_ops_and_params(model, example)
+    return round(2 * macs / 1e9, 2), round(params / 1e6, 2)
+
+
+def finetune(checkpoint, model, name, epochs, device):
+    """Fine-tunes the pruned model in place and returns the best checkpoint of the run."""
+    trainer = YOLO(checkpoint)
+    trainer.train(trainer=functools.partial(PrunedTrainer, pruned_model=model), data=DATA_YAML, epochs=epochs,
+                  imgsz=IMGSZ, batch=8, device=device, workers=2, project=OUTPUT_DIR, name=name, exist_ok=True)
+    best = str(trainer.trainer.best)
+    # Carry the EMA weights the checkpoint was saved from back into the model the pruner is tracking
+    model.load_state_dict(YOLO(best).model.float().state_dict())
+    return best
+
+
+def prune(model_path=MODEL, ratio=PRUNE_RATIO, steps=PRUNE_STEPS, epochs=FINETUNE_EPOCHS):
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    print(f"Using device: {device}")
+    load_runtime_config(os.path.join(REPO_ROOT, RUNTIME_CONFIG_FILE)).apply_inference(pin=False)  # Latency is measured with a lane's thread pools
+    images = load_images(val_images_dir(DATA_YAML))
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+
+    model = YOLO(model_path).model.float().cpu()
+    split_c2f_blocks(model)
+    for parameter in model.parameters():
+        parameter.requires_grad = True
+    model.eval()
+
+    gflops, params = count_cost(model, IMGSZ)
+    rows = [dict(evaluate_checkpoint(model_path, images, device, DATA_YAML, IMGSZ), step=0, ratio=0.0, gflops=gflops, params_m=params)]
+
+    # Channels are ranked by the L2 norm of their weights across each coupled group (a conv, its BN and
+    # every layer that consumes it), so whole groups are removed and the convolutions physically shrink.
+    # The detection head keeps its output layout; only the channels feeding it are pruned.
+    pruner = tp.pruner.MetaPruner(
+        model,
+        torch.zeros(1, 3, IMGSZ, IMGSZ),
+        importance=tp.importance.MagnitudeImportance(p=2),
+        pruning_ratio=ratio,
+        iterative_steps=steps,
+        ignored_layers=[module for module in model.modules() if isinstance(module, Detect)],
+        round_to=ROUND_TO,
+    )
+
+    checkpoint = model_path
+    for step in range(1, steps + 1):
+        model.cpu().eval()
+        pruner.step()
+        gflops, params = count_cost(model, IMGSZ)
+        print(f"Step {step}/{steps}: {gflops} GFLOPs, {params}M parameters; fine-tuning...")
+        checkpoint = finetune(checkpoint, model, f"{stem}_step{step}", epochs, device)
+        rows.append(dict(evaluate_checkpoint(checkpoint, images, device, DATA_YAML, IMGSZ),
+                         step=step, ratio=round(ratio * step / steps, 3), gflops=gflops, params_m=params))
+
+    pruned_path = os.path.join(OUTPUT_DIR, f"{stem}_pruned{int(ratio * 100)}.pt")
+    shutil.copy(checkpoint, pruned_path)
+
+    print(f"{'step':>4} {'ratio':>6} {'GFLOPs':>7} {'params':>7} {'mAP50-95':>9} {'mAP50':>6} {'CPU ms':>7} {'p95 ms':>7}")
+    for row in rows:
+        print(f"{row['step']:>4} {row['ratio']:>6.2f} {row['gflops']:>7.1f} {row['params_m']:>6.1f}M "
+              f"{row['mAP50-95']:>9.3f} {row['mAP50']:>6.3f} {row['latency_ms']:>7.1f} {row['p95_ms']:>7.1f}")
+    report_file = os.path.join(OUTPUT_DIR, f"{stem}_prune_report.json")
+    with open(report_file, mode='w') as file:
+        json.dump({"source": model_path, "pruned_model": pruned_path, "steps": rows}, file, indent=2)
+    print(f"Pruned model saved to {pruned_path}, report to {report_file}")
+    return pruned_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prune channels from the trained detector and fine-tune it")
+    parser.add_argument("model", nargs="?", default=MODEL)
+    parser.add_argument("--ratio", type=float, default=PRUNE_RATIO, help="Fraction of channels to remove")
+    parser.add_argument("--steps", type=int, default=PRUNE_STEPS)
+    parser.add_argument("--epochs", type=int, default=FINETUNE_EPOCHS, help="Fine-tuning epochs per step")
+    args = parser.parse_args()
+
+    prune(args.model, args.ratio, args.steps, args.epochs)
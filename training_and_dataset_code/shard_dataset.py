@@ -0,0 +1,90 @@
+import math
+
+import cv2
+from ultralytics.data import YOLODataset
+from ultralytics.models.yolo.detect import DetectionTrainer, DetectionValidator
+from ultralytics.utils import colorstr
+from ultralytics.utils.torch_utils import de_parallel
+
+from pack_dataset import ShardReader
+
+
+class ShardedYOLODataset(YOLODataset):
+    """
+    YOLODataset over a split packed by pack_dataset.py. img_path is the split's .json index;
+    images come from the memory-mapped shards and labels from the packed label arrays, so
+    nothing is decoded or re-scanned per epoch. Augmentation works exactly as before.
+    """
+
+    def get_img_files(self, img_path):
+        self.shards = ShardReader(img_path)
+        return list(self.shards.files)
+
+    def get_labels(self):
+        labels = []
+        for i, im_file in enumerate(self.im_files):
+            rows = self.shards.labels(i)
+            labels.append({
+                "im_file": im_file,
+                "shape": self.shards.orig_shapes[i].tolist(),
+                "cls": rows[:, 0:1].copy(),
+                "bboxes": rows[:, 1:].copy(),
+                "segments": [],
+                "keypoints": None,
+                "normalized": True,
+                "bbox_format": "xywh",
+            })
+        return labels
+
+    def load_image(self, i, rect_mode=True):
+        """Same contract as BaseDataset.load_image: (image, original hw, resized hw)."""
+        image, (h0, w0) = self.shards.image(i)
+        if rect_mode and max(image.shape[:2]) != self.imgsz:  # Packed at a different imgsz
+            ratio = self.imgsz / max(image.shape[:2])
+            h, w = image.shape[:2]
+            image = cv2.resize(image, (min(math.ceil(w * ratio), self.imgsz), min(math.ceil(h * ratio), self.imgsz)))
+        elif not rect_mode:
+            image = cv2.resize(image, (self.imgsz, self.imgsz))
+        if self.augment:  # Mosaic draws its partner images from this buffer
+            self.ims[i], self.im_hw0[i], self.im_hw[i] = image, (h0, w0), image.shape[:2]
+            self.buffer.append(i)
+            if 1 < len(self.buffer) >= self.max_buffer_length:
+                j = self.buffer.pop(0)
+                self.ims[j], self.im_hw0[j], self.im_hw[j] = None, None, None
+        return image, (h0, w0), image.shape[:2]
+
+
+def build_sharded_dataset(cfg, img_path, batch, data, mode="train", rect=False, stride=32):
+    """Ultralytics' build_yolo_dataset() with the shard-backed dataset (the shards replace cache=ram/disk)."""
+    return ShardedYOLODataset(
+        img_path=img_path,
+        imgsz=cfg.imgsz,
+        batch_size=batch,
+        augment=mode == "train",
+        hyp=cfg,
+        rect=cfg.rect or rect,
+        cache=None,
+        single_cls=cfg.single_cls or False,
+        stride=int(stride),
+        pad=0.0 if mode == "train" else 0.5,
+        prefix=colorstr(f"{mode}: "),
+        task=cfg.task,
+        classes=cfg.classes,
+        data=data,
+        fraction=cfg.fraction if mode == "train" else 1.0,
+    )
+
+
+class ShardedDetectionTrainer(DetectionTrainer):
+    """DetectionTrainer reading a packed data.yaml (datasets/shards/data.yaml) for training and validation."""
+
+    def build_dataset(self, img_path, mode="train", batch=None):
+        stride = max(int(de_parallel(self.model).stride.max() if self.model else 0), 32)
+        return build_sharded_dataset(self.args, img_path, batch, self.data, mode=mode, rect=mode == "val", stride=stride)
+
+
+class ShardedDetectionValidator(DetectionValidator):
+    """DetectionValidator for a packed split, e.g. YOLO(weights).val(data=packed_yaml, validator=ShardedDetectionValidator)."""
+
+    def build_dataset(self, img_path, mode="val", batch=None):
+        return build_sharded_dataset(self.args, img_path, batch, self.data, mode=mode, stride=self.stride)
@@ -0,0 +1,239 @@
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import statistics
+import sys
+from multiprocessing import get_context
+
+import yaml
+
+# Shared checkout engine lives in app/app_code. Torch and Ultralytics are only imported inside
+# the trial processes (after their thread limits are set) and for the final latency pass.
+# Relative paths below are anchored here, not on the cwd.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(os.path.join(REPO_ROOT, "app", "app_code"))
+from checkout_core.journal import write_atomic
+
+# Configuration
+SPACE_FILE = os.path.join(SCRIPT_DIR, "sweep_space.yaml")
+SWEEP_DIR = os.path.join(SCRIPT_DIR, "runs/sweep")
+N_TRIALS = 24
+TRIAL_EPOCHS = 50
+CORES_PER_TRIAL = 4          # Torch threads per trial; dataloader workers get half of this
+RAM_PER_TRIAL_GB = 6.0       # Peak resident memory of one trial, used to size the pool
+MAX_PARALLEL = None          # Upper bound on concurrent trials (None: whatever cores and RAM allow)
+PRUNE_WARMUP_EPOCHS = 10     # No trial is pruned before this epoch
+PRUNE_MIN_TRIALS = 3         # Trials that must have reached the same epoch before comparing
+SEED = 0
+METRIC = "metrics/mAP50-95(B)"
+
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+FINISHED = ("complete", "pruned")
+
+
+def available_ram_gb():
+    """Currently available memory in GB, or None if it can't be determined."""
+    try:
+        import psutil
+        return psutil.virtual_memory().available / 2 ** 30
+    except ImportError:
+        pass
+    if hasattr(os, "sysconf") and "SC_AVPHYS_PAGES" in os.sysconf_names:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 2 ** 30
+    return None
+
+
+def pool_size(cores_per_trial=CORES_PER_TRIAL, ram_per_trial=RAM_PER_TRIAL_GB, max_parallel=MAX_PARALLEL):
+    """How many trials fit in the machine's cores and free memory at once."""
+    limits = [(os.cpu_count() or 1) // cores_per_trial]
+    ram = available_ram_gb()
+    if ram is not None:
+        limits.append(int(ram // ram_per_trial))
+    if max_parallel:
+        limits.append(max_parallel)
+    return max(1, min(limits))
+
+
+def sample_params(space, rng):
+    """One point of the search space."""
+    params = {}
+    for name, spec in space.items():
+        if isinstance(spec, list):
+            params[name] = rng.choice(spec)
+        elif spec.get("log"):
+            params[name] = round(math.exp(rng.uniform(math.log(spec["min"]), math.log(spec["max"]))), 6)
+        else:
+            params[name] = round(rng.uniform(spec["min"], spec["max"]), 4)
+    return params
+
+
+def trial_file(sweep_dir, name):
+    return os.path.join(sweep_dir, "trials", f"{name}.json")
+
+
+def read_trial(sweep_dir, trial):
+    """A trial's progress record; new trials start as pending."""
+    try:
+        with open(trial_file(sweep_dir, trial["name"]), mode='r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return dict(trial, status="pending", history=[])
+
+
+def write_trial(sweep_dir, record):
+    write_atomic(trial_file(sweep_dir, record["name"]), json.dumps(record, indent=2))
+
+
+def load_sweep(sweep_dir, space, n_trials=N_TRIALS, seed=SEED):
+    """The sweep's trial list. Trials already sampled are kept as they are, so an interrupted sweep resumes."""
+    os.makedirs(os.path.join(sweep_dir, "trials"), exist_ok=True)
+    state_file = os.path.join(sweep_dir, "sweep.json")
+    state = {"space": space, "trials": []}
+    if os.path.exists(state_file):
+        with open(state_file, mode='r') as file:
+            state = json.load(file)
+    rng = random.Random(seed + len(state["trials"]))
+    while len(state["trials"]) < n_trials:
+        name = f"trial_{len(state['trials']):03d}"
+        state["trials"].append({"name": name, "params": sample_params(space, rng)})
+    write_atomic(state_file, json.dumps(state, indent=2))
+    return state["trials"]
+
+
+class MedianPruner:
+    """
+    on_fit_epoch_end callback: records the trial's val mAP and stops the trial when its best
+    mAP so far is below the median of the other trials' best at the same epoch.
+    """
+
+    def __init__(self, sweep_dir, record, trials):
+        self.sweep_dir = sweep_dir
+        self.record = record
+        self.others = [trial for trial in trials if trial["name"] != record["name"]]
+
+    def __call__(self, trainer):
+        epoch = trainer.epoch + 1
+        value = float(trainer.metrics.get(METRIC, 0.0))
+        self.record["history"] = self.record["history"][:epoch - 1] + [value]
+        best = max(self.record["history"])
+        if epoch >= PRUNE_WARMUP_EPOCHS:
+            peers = [max(history[:epoch]) for history in (read_trial(self.sweep_dir, other)["history"] for other in self.others)
+                     if len(history) >= epoch]
+            if len(peers) >= PRUNE_MIN_TRIALS and best < statistics.median(peers):
+                print(f"{self.record['name']}: pruned at epoch {epoch} (mAP {best:.3f} < median {statistics.median(peers):.3f})")
+                self.record["status"] = "pruned"
+                trainer.stop = True
+        write_trial(self.sweep_dir, self.record)
+
+
+def run_trial(task):
+    """Trains one trial in its own process. Returns (name, status)."""
+    sweep_dir, trial, trials, cores, epochs = task
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(cores)
+    import torch
+    torch.set_num_threads(cores)
+    from yolov8_trainig import train_yolo
+
+    record = read_trial(sweep_dir, trial)
+    last = os.path.join(sweep_dir, trial["name"], "weights", "last.pt")
+    resume = record["status"] == "running" and os.path.exists(last)
+    record.update(status="running", error=None)
+    write_trial(sweep_dir, record)
+    pruner = MedianPruner(sweep_dir, record, trials)
+    try:
+        if resume:
+            trainer = train_yolo({"resume": True}, {"on_fit_epoch_end": pruner}, model_path=last)
+        else:
+            overrides = dict(trial["params"], epochs=epochs, project=sweep_dir, name=trial["name"], exist_ok=True,
+                             workers=max(1, cores // 2), plots=False)
+            trainer = train_yolo(overrides, {"on_fit_epoch_end": pruner})
+    except Exception as e:
+        record.update(status="failed", error=str(e))
+        write_trial(sweep_dir, record)
+        return trial["name"], "failed"
+    if record["status"] != "pruned":
+        record["status"] = "complete"
+    record["best"] = str(trainer.best)
+    write_trial(sweep_dir, record)
+    return trial["name"], record["status"]
+
+
+def measure_latency(sweep_dir, records, data_yaml):
+    """CPU latency of every finished trial's best weights at its imgsz (cached in the trial record)."""
+    from ultralytics import YOLO
+    from checkout_core.policy import load_detection_policy
+    from checkout_core.runtime import RUNTIME_CONFIG_FILE, load_runtime_config
+    from export_models import latency_summary, load_images, run_model, val_images_dir
+
+    load_runtime_config(os.path.join(REPO_ROOT, RUNTIME_CONFIG_FILE)).apply_inference()  # A checkout lane's thread pools and cores
+    images = load_images(val_images_dir(data_yaml))
+    predict_kwargs = dict(load_detection_policy(root=REPO_ROOT).predict_kwargs(), device="cpu")
+    for record in records:
+        if "latency_ms" in record or not os.path.exists(record.get("best", "")):
+            continue
+        _, latencies = run_model(YOLO(record["best"]), images, record["params"].get("imgsz", 640), predict_kwargs)
+        record.update(latency_summary(latencies))
+        write_trial(sweep_dir, record)
+
+
+def write_leaderboard(sweep_dir, records):
+    """Finished trials ranked by best val mAP50-95, with their CPU latency and parameters."""
+    rows = []
+    for record in records:
+        if record["status"] not in FINISHED or not record["history"]:
+            continue
+        rows.append({"trial": record["name"], "status": record["status"], "mAP50-95": round(max(record["history"]), 4),
+                     "epochs": len(record["history"]), "latency_ms": record.get("latency_ms"), "p95_ms": record.get("p95_ms"),
+                     **record["params"]})
+    rows.sort(key=lambda row: row["mAP50-95"], reverse=True)
+    leaderboard_file = os.path.join(sweep_dir, "leaderboard.csv")
+    fields = list(dict.fromkeys(field for row in rows for field in row))
+    with open(leaderboard_file, mode='w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    for rank, row in enumerate(rows[:10], start=1):
+        latency = f"{row['latency_ms']:.1f} ms" if row["latency_ms"] is not None else "n/a"
+        print(f"{rank:>2}. {row['trial']} mAP50-95={row['mAP50-95']:.3f} CPU {latency} ({row['status']}, {row['epochs']} epochs)")
+    print(f"Leaderboard written to {leaderboard_file}")
+    return rows
+
+
+def sweep(space_file=SPACE_FILE, sweep_dir=SWEEP_DIR, n_trials=N_TRIALS, epochs=TRIAL_EPOCHS, cores=CORES_PER_TRIAL,
+          max_parallel=MAX_PARALLEL):
+    with open(space_file, mode='r') as file:
+        space = yaml.safe_load(file)
+    trials = load_sweep(sweep_dir, space, n_trials)
+    pending = [trial for trial in trials if read_trial(sweep_dir, trial)["status"] not in FINISHED]
+    parallel = pool_size(cores, RAM_PER_TRIAL_GB, max_parallel)
+    print(f"{len(trials) - len(pending)}/{len(trials)} trials already finished; running {len(pending)}, {parallel} at a time")
+
+    if pending:
+        # Fresh interpreter per trial: no CUDA/thread state leaks between trials and memory is returned
+        with get_context("spawn").Pool(parallel, maxtasksperchild=1) as pool:
+            tasks = [(sweep_dir, trial, trials, cores, epochs) for trial in pending]
+            for name, status in pool.imap_unordered(run_trial, tasks):
+                print(f"{name}: {status}")
+
+    records = [read_trial(sweep_dir, trial) for trial in trials]
+    from yolov8_trainig import TRAIN_ARGS
+    measure_latency(sweep_dir, [record for record in records if record["status"] in FINISHED], TRAIN_ARGS["data"])
+    return write_leaderboard(sweep_dir, records)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a resumable, parallel hyperparameter sweep over yolov8_trainig.py")
+    parser.add_argument("--space", default=SPACE_FILE)
+    parser.add_argument("--dir", default=SWEEP_DIR, help="Sweep directory; rerun with the same one to resume")
+    parser.add_argument("--trials", type=int, default=N_TRIALS)
+    parser.add_argument("--epochs", type=int, default=TRIAL_EPOCHS)
+    parser.add_argument("--cores", type=int, default=CORES_PER_TRIAL, help="CPU cores per trial")
+    parser.add_argument("--max-parallel", type=int, default=MAX_PARALLEL)
+    args = parser.parse_args()
+
+    sweep(args.space, args.dir, args.trials, args.epochs, args.cores, args.max_parallel)
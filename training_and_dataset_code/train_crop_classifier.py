@@ -0,0 +1,97 @@
+import argparse
+import os
+import shutil
+import sys
+
+import cv2
+import numpy as np
+import yaml
+from ultralytics import YOLO
+
+# Shared checkout engine lives in app/app_code; pack_dataset.py sits next to this script.
+# Relative paths below are anchored here, not on the cwd.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(os.path.join(REPO_ROOT, "app", "app_code"))
+from checkout_core.crop_classifier import CROP_MODEL, CROP_PADDING, CROP_SIZE, pad_boxes
+from checkout_core.policy import load_detection_policy
+from pack_dataset import IMAGE_EXTENSIONS, read_labels
+
+# Configuration
+DATA_YAML = os.path.join(SCRIPT_DIR, "data.yaml")
+CROPS_DIR = os.path.join(SCRIPT_DIR, "datasets/crops")  # Output: <split>/<class id>/<image>_<box>.jpg, the layout YOLOv8-cls trains on
+BASE_MODEL = "yolov8n-cls.pt"
+EPOCHS = 60
+BATCH = 128
+TRAIN_ARGS = {
+    "fliplr": 0.0,  # Mirrored labels would teach the classifier to ignore the printed text that tells SKUs apart
+    "project": os.path.join(SCRIPT_DIR, "runs/crop_classifier"),
+    "name": "train",
+    "exist_ok": True,
+}
+
+
+def build_crops(data_yaml=DATA_YAML, out_dir=CROPS_DIR, groups=None, crop_size=CROP_SIZE, padding=CROP_PADDING):
+    """Cuts every labelled box of a confusable class out of train/val, padded and resized like the app does."""
+    classes = {c for group in groups for c in group}
+    with open(data_yaml, mode='r') as file:
+        data = yaml.safe_load(file)
+    shutil.rmtree(out_dir, ignore_errors=True)  # Stale crops of classes no longer grouped would become extra outputs
+    for split in ("train", "val"):
+        images_dir = data[split].strip()
+        counts = dict.fromkeys(sorted(classes), 0)
+        for name in sorted(os.listdir(images_dir)):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            image_path = os.path.join(images_dir, name)
+            labels = read_labels(image_path)
+            labels = labels[np.isin(labels[:, 0].astype(int), list(classes))]
+            if len(labels) == 0:
+                continue
+            image = cv2.imread(image_path)
+            if image is None:
+                continue
+            height, width = image.shape[:2]
+            xy, wh = labels[:, 1:3] * [width, height], labels[:, 3:5] * [width, height]
+            boxes = pad_boxes(np.concatenate([xy - wh / 2, xy + wh / 2], axis=1), width, height, padding)
+            for k, (class_id, (x0, y0, x1, y1)) in enumerate(zip(labels[:, 0].astype(int), boxes)):
+                crop = image[int(y0):int(np.ceil(y1)), int(x0):int(np.ceil(x1))]
+                if crop.size == 0:
+                    continue
+                # Stretched to a square, as roi_align does at inference
+                crop = cv2.resize(crop, (crop_size, crop_size), interpolation=cv2.INTER_AREA)
+                class_dir = os.path.join(out_dir, split, str(class_id))
+                os.makedirs(class_dir, exist_ok=True)
+                cv2.imwrite(os.path.join(class_dir, f"{os.path.splitext(name)[0]}_{k}.jpg"), crop)
+                counts[class_id] += 1
+        print(f"{split}: " + ", ".join(f"class {c}: {n}" for c, n in counts.items()))
+    return out_dir
+
+
+def train(crops_dir=CROPS_DIR, base_model=BASE_MODEL, epochs=EPOCHS, batch=BATCH, out_model=os.path.join(REPO_ROOT, CROP_MODEL)):
+    """Trains the crop classifier and copies its best weights to where the detector loads them."""
+    model = YOLO(base_model)
+    model.train(data=crops_dir, imgsz=CROP_SIZE, epochs=epochs, batch=batch, **TRAIN_ARGS)
+    trainer = model.trainer
+    print(f"Val top-1 accuracy: {trainer.metrics.get('metrics/accuracy_top1', float('nan')):.4f}")
+    os.makedirs(os.path.dirname(out_model), exist_ok=True)
+    shutil.copy(trainer.best, out_model)
+    print(f"Crop classifier saved to {out_model}")
+    return out_model
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the crop classifier for the policy's confusable groups")
+    parser.add_argument("--data", default=DATA_YAML)
+    parser.add_argument("--crops", default=CROPS_DIR)
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--out", default=os.path.join(REPO_ROOT, CROP_MODEL))
+    parser.add_argument("--skip-crops", action="store_true", help="Reuse the crops already in --crops")
+    args = parser.parse_args()
+
+    groups = load_detection_policy(root=REPO_ROOT).confusable_groups
+    if not groups:
+        sys.exit("No confusable_groups in the detection policy; nothing to train.")
+    if not args.skip_crops:
+        build_crops(args.data, args.crops, groups)
+    train(args.crops, epochs=args.epochs, out_model=args.out)
@@ -0,0 +1,237 @@
+import argparse
+import functools
+import json
+import os
+import sys
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from ultralytics import YOLO
+from ultralytics.data.augment import LetterBox
+from ultralytics.models.yolo.detect import DetectionTrainer
+from ultralytics.utils.loss import v8DetectionLoss
+
+# Shared checkout engine lives in app/app_code; export_models.py sits next to this script.
+# Relative paths below are anchored here, not on the cwd.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(os.path.join(REPO_ROOT, "app", "app_code"))
+from checkout_core.runtime import RUNTIME_CONFIG_FILE, load_runtime_config
+from export_models import evaluate_checkpoint, load_images, val_images_dir
+
+# Configuration
+TEACHER_MODEL = os.path.join(SCRIPT_DIR, "runs/detect/train_yolov8m/weights/best.pt")  # Output of yolov8_trainig.py
+STUDENT_MODEL = "yolov8n.pt"            # Or yolov8s.pt; COCO weights, the head is rebuilt for data.yaml
+DATA_YAML = os.path.join(SCRIPT_DIR, "data.yaml")
+IMGSZ = 640
+TEACHER_CACHE_DIR = os.path.join(SCRIPT_DIR, "runs/distill/teacher_cache")  # Memory-mapped teacher outputs, reused while teacher and images match
+KD_TEMPERATURE = 2.0
+KD_CLS_WEIGHT = 1.0                     # Class-logit distillation (soft BCE against the teacher's scores)
+KD_BOX_WEIGHT = 0.5                     # Box-distribution distillation (KL on the DFL bins)
+KD_FG_CONF = 0.25                       # Box distillation only where the teacher sees a product
+
+# Teacher outputs are cached on the un-augmented training images, so the student must see the
+# same geometry: photometric augmentation only, no mosaic, flips or affine jitter.
+DISTILL_ARGS = dict(
+    epochs=100,
+    imgsz=IMGSZ,
+    batch=8,
+    workers=2,
+    project=os.path.join(SCRIPT_DIR, 'runs/distill'),
+    hsv_h=0.015,
+    hsv_s=0.5,
+    hsv_v=0.4,
+    mosaic=0.0,
+    close_mosaic=0,
+    mixup=0.0,
+    copy_paste=0.0,
+    fliplr=0.0,
+    flipud=0.0,
+    degrees=0.0,
+    translate=0.0,
+    scale=0.0,
+    shear=0.0,
+    perspective=0.0,
+)
+
+
+def teacher_inputs(dataset, indices, imgsz):
+    """Training images exactly as the un-augmented loader would hand them to the student (RGB, 0-1)."""
+    letterbox = LetterBox(new_shape=(imgsz, imgsz), auto=False, scaleup=False)
+    images = [letterbox(image=dataset.load_image(i)[0]) for i in indices]
+    batch = np.stack(images)[..., ::-1].transpose(0, 3, 1, 2)  # BGR HWC -> RGB CHW, as the loader's Format does
+    return torch.from_numpy(np.ascontiguousarray(batch)).float() / 255
+
+
+def head_outputs(feats):
+    """Raw head outputs (B, 4 * reg_max + nc, anchors) from the per-level feature maps."""
+    return torch.cat([feat.view(feats[0].shape[0], feat.shape[1], -1) for feat in feats], 2)
+
+
+class TeacherCache:
+    """
+    Teacher head outputs (box distributions and class logits) for every training image,
+    stored once as a float16 .npy and read back memory-mapped, indexed by image path.
+    """
+
+    def __init__(self, cache_file):
+        with open(cache_file + ".json", mode='r') as file:
+            self.index = json.load(file)
+        self.rows = {os.path.abspath(path): row for row, path in enumerate(self.index["files"])}
+        self.outputs = np.load(cache_file, mmap_mode='r')
+
+    @classmethod
+    def build(cls, teacher_path, dataset, imgsz, device, batch_size=16, cache_dir=TEACHER_CACHE_DIR):
+        """Runs the teacher over the training set unless a matching cache already exists."""
+        os.makedirs(cache_dir, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(teacher_path))[0]
+        cache_file = os.path.join(cache_dir, f"{stem}_{imgsz}.npy")
+        index = {"teacher": os.path.abspath(teacher_path), "teacher_modified": os.path.getmtime(teacher_path),
+                 "imgsz": imgsz, "files": [os.path.abspath(path) for path in dataset.im_files]}
+        if os.path.exists(cache_file) and os.path.exists(cache_file + ".json"):
+            cache = cls(cache_file)
+            if cache.index == index:
+                print(f"Reusing teacher cache {cache_file}")
+                return cache
+
+        teacher = YOLO(teacher_path).model.to(device).float().eval()
+        count = len(dataset.im_files)
+        outputs = None
+        print(f"Caching teacher outputs for {count} training images in {cache_file}...")
+        with torch.no_grad():
+            for start in range(0, count, batch_size):
+                indices = range(start, min(start + batch_size, count))
+                predictions = head_outputs(teacher(teacher_inputs(dataset, indices, imgsz).to(device))[1])
+                if outputs is None:
+                    outputs = np.lib.format.open_memmap(cache_file, mode='w+', dtype=np.float16,
+                                                        shape=(count,) + tuple(predictions.shape[1:]))
+                outputs[start:start + len(indices)] = predictions.cpu().numpy().astype(np.float16)
+        outputs.flush()
+        del outputs
+        with open(cache_file + ".json", mode='w') as file:
+            json.dump(index, file)  # Written last, so an interrupted run is rebuilt rather than reused
+        return cls(cache_file)
+
+    def lookup(self, files):
+        """Cached outputs for a batch of image paths, or None if any image isn't cached (e.g. validation)."""
+        rows = [self.rows.get(os.path.abspath(path)) for path in files]
+        if any(row is None for row in rows):
+            return None
+        return torch.from_numpy(np.asarray(self.outputs[rows], dtype=np.float32))
+
+
+class DistillationLoss(v8DetectionLoss):
+    """YOLOv8 detection loss plus distillation of the teacher's class logits and box distributions."""
+
+    def __init__(self, model, cache):
+        super().__init__(model)
+        if cache.outputs.shape[1] != self.no:
+            raise ValueError(f"Teacher outputs have {cache.outputs.shape[1]} channels, the student {self.no}; "
+                             f"both models must be trained on the same data.yaml")
+        self.cache = cache
+
+    def __call__(self, preds, batch):
+        loss, loss_items = super().__call__(preds, batch)
+        feats = preds[1] if isinstance(preds, tuple) else preds
+        student = head_outputs(feats).float()
+        teacher = self.cache.lookup(batch["im_file"])
+        kd = self.distillation_loss(student, teacher.to(student.device)) if teacher is not None else student.new_zeros(())
+        batch_size = student.shape[0]
+        if loss.dim() == 0:
+            loss = loss + kd * batch_size
+        else:  # Newer Ultralytics return the per-term losses and sum them in the trainer
+            loss = torch.cat([loss, (kd * batch_size).view(1)])
+        return loss, torch.cat([loss_items, kd.detach().view(1)])
+
+    def distillation_loss(self, student, teacher):
+        tau = KD_TEMPERATURE
+        box_channels = self.reg_max * 4
+        student_box, student_cls = student.split((box_channels, self.nc), 1)
+        teacher_box, teacher_cls = teacher.split((box_channels, self.nc), 1)
+
+        # Soft class targets, normalised like the detection loss normalises its class term
+        teacher_scores = teacher_cls.sigmoid()
+        cls_kd = F.binary_cross_entropy_with_logits(student_cls / tau, (teacher_cls / tau).sigmoid(), reduction='none')
+        cls_kd = cls_kd.sum() / max(teacher_scores.sum(), 1) * tau ** 2
+
+        # KL between the DFL bin distributions of each box side, on anchors the teacher calls foreground
+        batch_size, _, anchors = student.shape
+        student_bins = F.log_softmax(student_box.reshape(batch_size, 4, self.reg_max, anchors) / tau, dim=2)
+        teacher_bins = F.softmax(teacher_box.reshape(batch_size, 4, self.reg_max, anchors) / tau, dim=2)
+        kl = F.kl_div(student_bins, teacher_bins, reduction='none').sum(2).mean(1)
+        foreground = (teacher_scores.amax(1) > KD_FG_CONF).float()
+        box_kd = (kl * foreground).sum() / max(foreground.sum(), 1) * tau ** 2
+
+        return KD_CLS_WEIGHT * cls_kd + KD_BOX_WEIGHT * box_kd
+
+
+class DistillationTrainer(DetectionTrainer):
+    """DetectionTrainer whose student loss includes distillation from cached teacher outputs."""
+
+    def __init__(self, *args, teacher_path=TEACHER_MODEL, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.teacher_path = teacher_path
+
+    def get_validator(self):
+        validator = super().get_validator()
+        self.loss_names = (*self.loss_names, "kd_loss")
+        return validator
+
+    def _setup_train(self, *args, **kwargs):
+        super()._setup_train(*args, **kwargs)
+        cache = TeacherCache.build(self.teacher_path, self.train_loader.dataset, self.args.imgsz, self.device, self.batch_size)
+        # The EMA copy is what gets validated; it needs the same loss terms (its kd_loss stays 0 on val images)
+        for model in (self.model, self.ema.ema):
+            model.criterion = DistillationLoss(model, cache)
+
+    def save_model(self):
+        # Checkpoints must load without this script, so the distillation loss isn't pickled into them
+        models = [model for model in (self.model, self.ema.ema if self.ema else None) if "criterion" in getattr(model, "__dict__", {})]
+        criteria = [model.__dict__.pop("criterion") for model in models]
+        try:
+            super().save_model()
+        finally:
+            for model, criterion in zip(models, criteria):
+                model.criterion = criterion
+
+
+def distill(teacher_path=TEACHER_MODEL, student_model=STUDENT_MODEL, epochs=DISTILL_ARGS["epochs"]):
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    print(f"Using device: {device}")
+    name = f"distill_{os.path.splitext(os.path.basename(student_model))[0]}"
+
+    student = YOLO(student_model)
+    student.train(trainer=functools.partial(DistillationTrainer, teacher_path=teacher_path),
+                  data=DATA_YAML, device=device, name=name, **dict(DISTILL_ARGS, epochs=epochs))
+    student_path = str(student.trainer.best)
+
+    # Latency is measured the way a checkout lane runs: CPU only, with the lane's thread settings
+    load_runtime_config(os.path.join(REPO_ROOT, RUNTIME_CONFIG_FILE)).apply_inference()
+    images = load_images(val_images_dir(DATA_YAML))
+    report = {"teacher": evaluate_checkpoint(teacher_path, images, device, DATA_YAML, IMGSZ),
+              "student": evaluate_checkpoint(student_path, images, device, DATA_YAML, IMGSZ)}
+    report["mAP50-95_drop"] = round(report["teacher"]["mAP50-95"] - report["student"]["mAP50-95"], 4)
+    report["speedup"] = round(report["teacher"]["latency_ms"] / report["student"]["latency_ms"], 2)
+
+    for role in ("teacher", "student"):
+        result = report[role]
+        print(f"{role:<8} mAP50-95={result['mAP50-95']:.3f} mAP50={result['mAP50']:.3f} "
+              f"CPU {result['latency_ms']:.1f} ms (p95 {result['p95_ms']:.1f})  {result['size_mb']} MB")
+    print(f"Student is {report['speedup']}x faster for {report['mAP50-95_drop']:.3f} mAP50-95")
+
+    report_file = os.path.join(os.path.dirname(os.path.dirname(student_path)), "distill_report.json")
+    with open(report_file, mode='w') as file:
+        json.dump(report, file, indent=2)
+    print(f"Report written to {report_file}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distill the trained YOLOv8m into a small student for CPU lanes")
+    parser.add_argument("--teacher", default=TEACHER_MODEL)
+    parser.add_argument("--student", default=STUDENT_MODEL, help="yolov8n.pt or yolov8s.pt")
+    parser.add_argument("--epochs", type=int, default=DISTILL_ARGS["epochs"])
+    args = parser.parse_args()
+
+    distill(args.teacher, args.student, args.epochs)
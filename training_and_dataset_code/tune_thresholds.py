@@ -0,0 +1,113 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import yaml
+
+# Shared checkout engine lives in app/app_code; evaluate_model.py sits next to this script.
+# Relative paths below are anchored here, not on the cwd.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(os.path.join(REPO_ROOT, "app", "app_code"))
+from checkout_core.catalog import PRODUCT_DETAILS_FILE, load_catalog
+from checkout_core.policy import load_detection_policy
+from evaluate_model import PREDICTIONS_FILE, Predictions, cart_counts, evaluate, nms
+
+# Configuration
+THRESHOLDS_FILE = os.path.join(REPO_ROOT, "app/config/tuned_thresholds.yaml")  # Loaded through thresholds_file in detection_policy.yaml
+CONF_GRID = np.round(np.arange(0.05, 0.951, 0.025), 3)
+IOU_GRID = np.round(np.arange(0.4, 0.851, 0.05), 2)
+MAX_ROUNDS = 10          # Coordinate-ascent passes over the classes per IoU setting
+
+
+def count_table(preds, keep, grid=CONF_GRID):
+    """(images, nc, thresholds) number of boxes of each class in each image at or above each threshold."""
+    image, cls, conf = preds.pred_image[keep], preds.pred_cls[keep], preds.pred_conf[keep]
+    level = np.searchsorted(grid, conf, side="right")  # Box survives thresholds grid[:level]
+    table = np.zeros((preds.num_images, preds.nc, len(grid) + 1), dtype=np.int32)
+    np.add.at(table, (image, cls, level), 1)
+    # Boxes at level L count for every threshold below it: reverse cumulative sum
+    return np.flip(np.cumsum(np.flip(table, 2), 2), 2)[:, :, 1:]
+
+
+def tune_classes(correct, start):
+    """
+    Coordinate ascent on per-class threshold indices. correct[i, c, t] says whether image i
+    gets class c's count right at threshold t; an image's cart is right when every class is.
+    Returns (threshold index per class, exact-cart accuracy).
+    """
+    nc = correct.shape[1]
+    chosen = np.full(nc, start)
+    for _ in range(MAX_ROUNDS):
+        changed = False
+        for c in range(nc):
+            current = correct[:, np.arange(nc), chosen]                 # (images, nc) at the current choice
+            others = np.all(np.delete(current, c, axis=1), axis=1)      # Images every other class gets right
+            scores = np.mean(others[:, None] & correct[:, c, :], axis=0)
+            best = np.flatnonzero(scores == scores.max())
+            pick = best[len(best) // 2]  # Middle of the best plateau is the least sensitive choice
+            if scores[pick] > scores[chosen[c]]:
+                chosen[c], changed = pick, True
+        if not changed:
+            break
+    return chosen, float(np.mean(np.all(correct[:, np.arange(nc), chosen], axis=1)))
+
+
+def tune(preds, conf_grid=CONF_GRID, iou_grid=IOU_GRID):
+    """Per-class confidence and NMS IoU maximizing exact-cart accuracy. Returns (conf per class, iou, accuracy)."""
+    truth = cart_counts(preds.gt_image, preds.gt_cls, preds.num_images, preds.nc)
+    best = (None, None, -1.0)
+    for iou in iou_grid:
+        keep = nms(preds.pred_image, preds.pred_cls, preds.pred_boxes, preds.pred_conf, iou) if iou < preds.meta["iou"] \
+            else np.ones(len(preds.pred_conf), dtype=bool)
+        correct = count_table(preds, keep, conf_grid) == truth[:, :, None]
+        # Start from the best single global threshold, then let each class move
+        start = int(np.argmax(np.mean(np.all(correct, axis=1), axis=0)))
+        chosen, accuracy = tune_classes(correct, start)
+        print(f"  iou={iou:.2f}: exact carts {accuracy:.1%}")
+        if accuracy > best[2]:
+            best = (conf_grid[chosen], float(iou), accuracy)
+    return best
+
+
+def write_thresholds(thresholds_file, class_conf, iou, accuracy, preds, names):
+    """Global conf is the most common tuned value; classes that differ get an override."""
+    values, counts = np.unique(class_conf, return_counts=True)
+    conf = float(values[np.argmax(counts)])
+    overrides = {int(c): float(t) for c, t in enumerate(class_conf) if t != conf}
+    lines = [
+        f"# Written by training_and_dataset_code/tune_thresholds.py on {time.strftime('%Y-%m-%d %H:%M')}",
+        f"# Model {preds.meta.get('model')}, {preds.num_images} val images, exact carts {accuracy:.1%}",
+        yaml.safe_dump({"conf": conf, "iou": iou}, sort_keys=False).strip(),
+        "class_conf:" if overrides else "class_conf: {}",
+    ]
+    lines += [f"  {c}: {t}   # {names.get(c, '')}".rstrip(" #") for c, t in overrides.items()]
+    os.makedirs(os.path.dirname(thresholds_file) or ".", exist_ok=True)
+    with open(thresholds_file, mode='w') as file:
+        file.write("\n".join(lines) + "\n")
+    print(f"Thresholds written to {thresholds_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune per-class confidence and NMS IoU for exact cart correctness")
+    parser.add_argument("predictions", nargs="?", default=PREDICTIONS_FILE, help="Cache from evaluate_model.py cache")
+    parser.add_argument("--out", default=THRESHOLDS_FILE)
+    args = parser.parse_args()
+
+    preds = Predictions(args.predictions)
+    policy = load_detection_policy(root=REPO_ROOT)
+    baseline = evaluate(preds, policy.conf, policy.iou, policy.class_conf)
+
+    start = time.perf_counter()
+    class_conf, iou, accuracy = tune(preds)
+    print(f"Tuned in {time.perf_counter() - start:.2f}s")
+
+    tuned = evaluate(preds, 0.0, iou, dict(enumerate(class_conf)))
+    print(f"Current policy: exact carts {baseline['cart_accuracy']:.1%}, mAP50-95 {baseline['mAP50-95']:.4f}")
+    print(f"Tuned policy:   exact carts {tuned['cart_accuracy']:.1%}, mAP50-95 {tuned['mAP50-95']:.4f} (iou={iou})")
+
+    catalog = load_catalog(os.path.join(REPO_ROOT, PRODUCT_DETAILS_FILE))
+    names = {c: catalog.get(c).name if c in catalog else preds.names.get(c, "") for c in range(preds.nc)}
+    write_thresholds(args.out, class_conf, iou, accuracy, preds, names)
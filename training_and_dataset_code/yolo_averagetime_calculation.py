@@ -1,16 +1,31 @@
-from ultralytics import YOLO
+import os
+import sys
 import time
 import numpy as np
 
+# Shared checkout engine lives in app/app_code
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app", "app_code"))
+from checkout_core.policy import load_detection_policy
+from checkout_core.runtime import load_runtime_config, runtime_diagnostics
+
+# Same thread pools and inference cores as a checkout lane (app/config/runtime.yaml)
+load_runtime_config().apply_inference()
+print(f"Runtime: {runtime_diagnostics()}")
+
+from ultralytics import YOLO  # After the runtime config: OpenMP/MKL read their pool sizes when torch loads
+
 # Load the model
 model = YOLO("yolov8n.pt")  # Replace with your model path
 
 # Test image (replace with your image path)
 image_path = "test.jpg"
 
+# Time the model with the same thresholds the app uses
+predict_kwargs = load_detection_policy().predict_kwargs()
+
 # Warm-up runs
 for _ in range(5):
-    _ = model(image_path)
+    _ = model(image_path, **predict_kwargs)
 
 # Measure inference time
 num_runs = 100
@@ -18,7 +33,7 @@ inference_times = []
 
 for _ in range(num_runs):
     start_time = time.time()
-    results = model(image_path)
+    results = model(image_path, **predict_kwargs)
     end_time = time.time()
     inference_time = (end_time - start_time) * 1000  # Convert to milliseconds
     inference_times.append(inference_time)
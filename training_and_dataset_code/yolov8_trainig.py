@@ -1,32 +1,59 @@
+import os
+
 from ultralytics import YOLO
 import torch
 
-def train_yolo():
+# Dataset and run paths are relative to this script, so training works from any directory
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Train from pre-decoded shards (run pack_dataset.py first) instead of decoding the JPEGs every epoch
+USE_SHARDS = False
+SHARDS_DATA = os.path.join(SCRIPT_DIR, 'datasets/shards/data.yaml')
+
+BASE_MODEL = 'yolov8m.pt'
+
+# Default training run with mild augmentations (sweep_hyperparameters.py overrides any of these)
+TRAIN_ARGS = dict(
+    data=os.path.join(SCRIPT_DIR, 'data.yaml'),  # Path to your dataset YAML file
+    epochs=100,        # Number of training epochs
+    imgsz=640,         # Input image size
+    batch=8,           # Reduce batch size for GTX 1050 (adjust if needed)
+    workers=2,         # Reduce workers for low VRAM
+    project=os.path.join(SCRIPT_DIR, 'runs/detect'),  # Save results in 'runs/detect/train/'
+    name='train_yolov8m',   # Experiment name
+    augment=True,      # Enable augmentation
+    flipud=0.2,        # Slight vertical flip
+    fliplr=0.5,        # Horizontal flip
+    hsv_h=0.015,       # Slight hue shift
+    hsv_s=0.5,         # Moderate saturation shift
+    hsv_v=0.4,         # Brightness variation
+    mosaic=0.2,        # Mild mosaic augmentation
+)
+
+def train_yolo(overrides=None, callbacks=None, model_path=BASE_MODEL):
+    """Trains with TRAIN_ARGS updated by overrides; callbacks maps Ultralytics events to functions. Returns the trainer."""
     # Check if CUDA (GPU) is available
     device = 'cuda' if torch.cuda.is_available() else 'cpu'
     print(f"Using device: {device}")
-    
-    # Load the YOLOv8m model
-    model = YOLO('yolov8m.pt')
-    
-    # Train the model with mild augmentations
-    model.train(
-        data='data.yaml',  # Path to your dataset YAML file
-        epochs=100,         # Number of training epochs
-        imgsz=640,         # Input image size
-        batch=8,           # Reduce batch size for GTX 1050 (adjust if needed)
-        device=device,     # Use GPU if available, otherwise CPU
-        workers=2,         # Reduce workers for low VRAM
-        project='runs/detect',  # Save results in 'runs/detect/train/'
-        name='train_yolov8m',   # Experiment name
-        augment=True,      # Enable augmentation
-        flipud=0.2,        # Slight vertical flip
-        fliplr=0.5,        # Horizontal flip
-        hsv_h=0.015,       # Slight hue shift
-        hsv_s=0.5,         # Moderate saturation shift
-        hsv_v=0.4,         # Brightness variation
-        mosaic=0.2,        # Mild mosaic augmentation
-    )
+
+    # Load the YOLOv8m model (or a last.pt to resume)
+    model = YOLO(model_path)
+    for event, callback in (callbacks or {}).items():
+        model.add_callback(event, callback)
+
+    overrides = overrides or {}
+    trainer = None
+    if USE_SHARDS:
+        from shard_dataset import ShardedDetectionTrainer
+        trainer = ShardedDetectionTrainer
+    if overrides.get('resume'):
+        args = {'resume': True}  # A last.pt carries its own arguments; passing imgsz/batch here would replace them
+    else:
+        args = dict(TRAIN_ARGS, device=device, data=SHARDS_DATA if USE_SHARDS else TRAIN_ARGS['data'])
+        args.update(overrides)
+
+    model.train(trainer=trainer, **args)
+    return model.trainer
 
 if __name__ == "__main__":
     train_yolo()